@@ -38,6 +38,10 @@ NAME_VIDEO = "100_NL_D_FA-Canet"
 # Time range for pointing
 POINTING_STARTING_TIME = 4
 POINTING_ENDING_TIME = 17
+
+# Number of processes to save the LANES
+# On Windows, the processes re-import this script, so keep 1 or call create_data from a main guard.
+NB_WORKERS = 1
 # END : !! TO MODIFY !! #
 
 
@@ -71,6 +75,7 @@ try:
         destination=DESTINATION_LANES,
         time_begin=POINTING_STARTING_TIME,
         time_end=POINTING_ENDING_TIME,
+        nb_workers=NB_WORKERS,
     )
 except FindPathError as find_error:
     print(find_error.__repr__())
@@ -24,6 +24,9 @@ DIMENSIONS = [108, 1820]
 SCALE = 35
 AUGMENTATION = True
 FLIP = True
+NB_WORKERS = 2  # The number of threads that load the batches, 0 to load them in the training loop
+SEED = None  # The seed of the shuffling and of the augmentation
+LOG_INTERVAL = 100  # The number of batches between two prints of the running metrics, 0 to print them at the end of the epochs
 VALID_LANE_NUMBER = 7
 
 # Parameters for the training
@@ -36,12 +39,13 @@ DISTRIBUTION = 0.3
 MARGIN = 5
 TRADE_OFF = 0
 CLOSE_TO_HEAD = True
+CHECKPOINT_INTERVAL = 500  # The number of batches between two checkpoints, 0 to never resume the training
 # --- END : !! TO MODIFY !! --- #
 
 
 # Pack the variables
 DATA_PARAM = [VIDEO_NAMES_TRAIN, VIDEO_NAMES_VALID, NUMBER_TRAINING, DIMENSIONS, VALID_LANE_NUMBER]
-LOADING_PARAM = [SCALE, AUGMENTATION, FLIP]
+LOADING_PARAM = [SCALE, AUGMENTATION, FLIP, NB_WORKERS, SEED]
 TRAINING_PARAM = [NB_EPOCHS, BATCH_SIZE, WINDOW_SIZE, NB_SAMPLES, DISTRIBUTION, MARGIN, TRADE_OFF, CLOSE_TO_HEAD]
 
 
@@ -66,7 +70,7 @@ else:
 print("Is a GPU used for computations ?\n", tf.config.experimental.list_physical_devices('GPU'))
 
 try:
-    train_magnifier(DATA_PARAM, LOADING_PARAM, TRAINING_PARAM, TRIES, MODEL_TYPE)
+    train_magnifier(DATA_PARAM, LOADING_PARAM, TRAINING_PARAM, TRIES, MODEL_TYPE, LOG_INTERVAL, checkpoint_interval=CHECKPOINT_INTERVAL)
 except AlreadyExistError as exist_error:
     print(exist_error.__repr__())
 except FindPathDataError as find_path_data_error:
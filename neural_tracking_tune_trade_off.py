@@ -7,8 +7,11 @@ from pathlib import Path
 from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.exception_classes import FindPathDataError, PaddingError
 from src.d0_utils.store_load_data.exceptions.exception_classes import AlreadyExistError
 
-# To train the model
-from src.d4_modelling_neural_magnifier import train_magnifier
+# To train the models in parallel
+from src.d4_modelling_neural.trade_off_sweep import run_sweep
+
+# To decode the images once
+from src.d4_modelling_neural.loading_data.packed_lanes import get_packed_lanes
 
 # To manage the trade offs
 from src.d4_modelling_neural.trade_off_manager import TradeOffManager
@@ -29,7 +32,10 @@ DIMENSIONS = [108, 1820]
 SCALE = 35
 AUGMENTATION = True
 FLIP = True
+NB_WORKERS = 2  # The number of threads that load the batches, 0 to load them in the training loop
+SEED = None  # The seed of the shuffling and of the augmentation
 VALID_LANE_NUMBER = 7
+PACK_LANES = True  # If True, the lanes are decoded once in memory-mapped arrays shared by the processes
 
 # Parameters for the training
 DEEP_MODEL = False
@@ -41,12 +47,17 @@ DISTRIBUTION = 0.3
 MARGIN = 5
 TRADE_OFF_MANAGER = TradeOffManager(0.01, 100, 7, WINDOW_SIZE, NB_EPOCHS, BATCH_SIZE)
 CLOSE_TO_HEAD = True
+
+# Parameters for the sweep
+NB_PROCESSES = 2  # The number of trainings run at the same time
+NB_THREADS = 2  # The number of threads of TensorFlow in each process
+REDUCTION_FACTOR = 2  # Only the best 1 / REDUCTION_FACTOR runs continue after 1, 2, 4... epochs, 1 to never stop a run
 # --- END : !! TO MODIFY !! --- #
 
 
 # Pack the variables
 DATA_PARAM = [VIDEO_NAMES_TRAIN, VIDEO_NAMES_VALID, NUMBER_TRAINING, DIMENSIONS, VALID_LANE_NUMBER]
-LOADING_PARAM = [SCALE, AUGMENTATION, FLIP]
+LOADING_PARAM = [SCALE, AUGMENTATION, FLIP, NB_WORKERS, SEED]
 TRAINING_PARAM = [NB_EPOCHS, BATCH_SIZE, WINDOW_SIZE, NB_SAMPLES, DISTRIBUTION, MARGIN, None, CLOSE_TO_HEAD]
 
 
@@ -67,24 +78,27 @@ else:
     MODEL_TYPE = "/simple_model"
 
 
-# -- Verify that a GPU is used -- #
-print("Is a GPU used for computations ?\n", tf.config.experimental.list_physical_devices('GPU'))
-
-try:
-    for trade_off in TRADE_OFF_MANAGER:
-        # Change the trade_off
-        TRAINING_PARAM[-2] = trade_off
-
-        # Train with the trade_off
-        INFORMATION_TRAINING = train_magnifier(DATA_PARAM, LOADING_PARAM, TRAINING_PARAM, TRIES, MODEL_TYPE)
-
-        # Register the training information
-        TRADE_OFF_MANAGER.add(INFORMATION_TRAINING)
-
-    TRADE_OFF_MANAGER.save(Path("reports/trade_off_results{}/{}".format(TRIES, MODEL_TYPE)))
-except AlreadyExistError as exist_error:
-    print(exist_error.__repr__())
-except FindPathDataError as find_path_data_error:
-    print(find_path_data_error.__repr__())
-except PaddingError as padding_error:
-    print(padding_error.__repr__())
+if __name__ == "__main__":
+    # -- Verify that a GPU is used -- #
+    print("Is a GPU used for computations ?\n", tf.config.experimental.list_physical_devices('GPU'))
+
+    try:
+        # Decode the images once
+        PACKED_LANES = None
+        if PACK_LANES:
+            PACKED_LANES = get_packed_lanes(VIDEO_NAMES_TRAIN + VIDEO_NAMES_VALID,
+                                            Path("data/2_intermediate_top_down_lanes/lanes{}".format(TRIES)),
+                                            Path("data/2_intermediate_top_down_lanes/calibration{}".format(TRIES)),
+                                            SCALE, DIMENSIONS, Path("data/2_intermediate_top_down_lanes/packed{}".format(TRIES)))
+
+        # Train with all the trade offs
+        run_sweep(TRADE_OFF_MANAGER, DATA_PARAM, LOADING_PARAM, TRAINING_PARAM, TRIES, MODEL_TYPE, packed_lanes=PACKED_LANES,
+                  nb_processes=NB_PROCESSES, nb_threads=NB_THREADS, reduction_factor=REDUCTION_FACTOR)
+
+        TRADE_OFF_MANAGER.save(Path("reports/trade_off_results{}/{}".format(TRIES, MODEL_TYPE)))
+    except AlreadyExistError as exist_error:
+        print(exist_error.__repr__())
+    except FindPathDataError as find_path_data_error:
+        print(find_path_data_error.__repr__())
+    except PaddingError as padding_error:
+        print(padding_error.__repr__())
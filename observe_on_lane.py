@@ -8,11 +8,14 @@ from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.excep
 from src.d0_utils.store_load_data.exceptions.exception_classes import AlreadyExistError, FindPathError
 
 # To compute the predictions
-from src.d5_model_evaluation_magnifier import evaluate_model
+from src.d5_model_evaluation_magnifier import evaluate_lanes
 
 # To observe the model
 from src.d7_visualization_predictions import observe_model
 
+# To store the predictions
+from src.d5_model_evaluation.prediction_cache import PredictionCache
+
 # To manage the graphic
 from src.d7_visualization.graphic_manager import GraphicManager
 
@@ -37,6 +40,10 @@ NB_EPOCHS = [1, 22]
 BATCH_SIZES = [12, 12]
 WINDOW_SIZES = [150, 30]
 RECOVERIES = [75, 29]
+
+# For the cache of the predictions
+USE_CACHE = True  # To evaluate the models only on the frames that have not been evaluated yet
+CACHE_SIZE = 2 ** 28  # The maximal size of the cache in bytes
 # --- END : !! TO MODIFY !! --- #
 
 
@@ -53,6 +60,10 @@ if DEEP_MODELS[1]:
     MODEL_TYPE2 = "/deep_model"
 else:
     MODEL_TYPE2 = "/simple_model"
+if USE_CACHE:
+    PREDICTION_CACHE = PredictionCache(Path("data/5_model_output/prediction_cache{}".format(TRIES)), CACHE_SIZE)
+else:
+    PREDICTION_CACHE = None
 
 
 # Pack the variables
@@ -62,13 +73,13 @@ MODELS_PARAM = [MODEL_TYPE1, MODEL_TYPE2, NUMBER_TRAININGS, NB_EPOCHS, BATCH_SIZ
 
 try:
     # --- Get the predictions --- #
-    PREDICTION_MEMORIES = observe_model(DATA_PARAM, MODELS_PARAM, evaluate_model, TRIES)
+    PREDICTION_MEMORIES = observe_model(DATA_PARAM, MODELS_PARAM, evaluate_lanes, TRIES, prediction_cache=PREDICTION_CACHE)
 
     # --- Make the video --- #
     print("Making the video...")
     destination_video = Path("data/5_model_output/videos{}".format(TRIES))
     name_predicted_video = "predicted_{}_{}_window_{}_{}_window_{}.mp4".format(VIDEO_NAME, MODEL_TYPE1[1:], WINDOW_SIZES[0], MODEL_TYPE2[1:], WINDOW_SIZES[1])
-    make_video(name_predicted_video, PREDICTION_MEMORIES.get_lanes(LANE_NUMBER, TRIES), PREDICTION_MEMORIES.fps, destination=destination_video)
+    make_video(name_predicted_video, PREDICTION_MEMORIES.get_lanes(LANE_NUMBER, TRIES), PREDICTION_MEMORIES.fps, destination=destination_video, background=True)
 
 except FindPathDataError as find_path_data_error:
     print(find_path_data_error.__repr__())
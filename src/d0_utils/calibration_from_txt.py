@@ -10,16 +10,17 @@ from src.d0_utils.extractions.exceptions.exception_classes import FindPathExtrac
 # To get the homography
 from src.d0_utils.perspective_correction.undo_perspective import read_homography
 
-# To extract image from a video
-from src.d0_utils.extractions.extract_image import extract_image_video
+# To read the frames of a video
+from src.d0_utils.extractions.video_frames import VideoFrames
 
 # To transform image to get the top-down view
 from src.d0_utils.perspective_correction.perspective_correction import get_top_down_image
 
 
-def calibrate_from_txt(path_video, path_txt, time_begin=0, time_end=-1):
+def calibrate_frames_from_txt(path_video, path_txt, time_begin=0, time_end=-1, stride=1):
     """
-    Extract the image and transform them to get the top-down view.
+    Read the frames one by one and transform them to get the top-down view.
+    Only one frame is kept in memory at a time.
 
     Args:
         path_video (WindowsPath): the path that leads to the video.
@@ -33,8 +34,15 @@ def calibrate_from_txt(path_video, path_txt, time_begin=0, time_end=-1):
             Default value = -1
             if time_end == -1, the video is viewed until the end.
 
+        stride (integer): only one frame every stride frames is read.
+            Default value = 1
+
     Returns:
-        list_images (list of array): list of the calibrated image.
+        (integer): the index of the frame in the video.
+
+        (float): the time of the frame in second.
+
+        (array): the calibrated image.
     """
     # Check that the paths exists
     if not path_video.exists():
@@ -45,15 +53,34 @@ def calibrate_from_txt(path_video, path_txt, time_begin=0, time_end=-1):
     # Get the homography
     homography = read_homography(path_txt)
 
-    # Get the image
-    list_images = extract_image_video(path_video, time_begin, time_end)
-    nb_images = len(list_images)
+    # Transform the image one by one
+    with VideoFrames(path_video, time_begin, time_end, stride) as frames:
+        for (index_frame, time_frame, image) in frames:
+            yield index_frame, time_frame, get_top_down_image(image, homography)
+
 
-    # Transform the image
-    for index_image in range(nb_images):
-        list_images[index_image] = get_top_down_image(list_images[index_image], homography)
+def calibrate_from_txt(path_video, path_txt, time_begin=0, time_end=-1):
+    """
+    Extract the image and transform them to get the top-down view.
+    Convenience wrapper of calibrate_frames_from_txt for short clips : all the images are kept in memory,
+    the pipelines iterate over calibrate_frames_from_txt instead.
+
+    Args:
+        path_video (WindowsPath): the path that leads to the video.
 
-    return list_images
+        path_txt (WindowsPath): the path that leads to the txt file for the calibration.
+
+        time_begin (integer): the beginning time in second.
+            Default value = 0
+
+        time_end (integer): the ending time in second.
+            Default value = -1
+            if time_end == -1, the video is viewed until the end.
+
+    Returns:
+        list_images (list of array): list of the calibrated image.
+    """
+    return [image for (index_frame, time_frame, image) in calibrate_frames_from_txt(path_video, path_txt, time_begin, time_end)]
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ Classes:
     TimeError
     EmptyFolder
     NoMoreFrame
+    StrideError
 """
 
 
@@ -70,3 +71,15 @@ class NoMoreFrame(Exception):
 
     def __repr__(self):
         return "All the frames in {} have been labeled.".format(self.path_folder)
+
+
+class StrideError(Exception):
+    """The exception class error to tell that the stride to read a video is not possible"""
+    def __init__(self, stride):
+        """
+        Construct the stride.
+        """
+        self.stride = stride
+
+    def __repr__(self):
+        return "The stride {} is not possible. It has to be a positive integer.".format(self.stride)
@@ -5,6 +5,9 @@ from pathlib import Path
 import cv2
 from src.d0_utils.extractions.exceptions.exception_classes import TimeError, FindPathExtractError
 
+# To read the video frame by frame
+from src.d0_utils.extractions.video_frames import VideoFrames
+
 
 def extract_image_video(path_video, time_begin=0, time_end=-1, register=False, destination=None):
     """
@@ -12,7 +15,8 @@ def extract_image_video(path_video, time_begin=0, time_end=-1, register=False, d
     save them.
     This raises an exception if the duration is not possible regarding the video.
     If time_end is bigger than the duration of the video,
-    the function register until the end
+    the function register until the end.
+    All the images are kept in memory, use VideoFrames to read long videos.
 
     Args:
         path_video (WindowsPath): path of the video.
@@ -43,41 +47,15 @@ def extract_image_video(path_video, time_begin=0, time_end=-1, register=False, d
     if register and not destination.exists():
         raise FindPathExtractError(destination)
 
-    # Get the video and its characteristics
-    video = cv2.VideoCapture(str(path_video))
-    fps = video.get(cv2.CAP_PROP_FPS)
-    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-    nb_image_wait = int(time_begin * fps)
     images = []
 
-    # We make sure that the video will be register until the end if time_end is
-    # bigger than the duration of the video.
-    if time_end == -1:
-        time_end = frame_count / fps
-    number_image = min(int(time_end * fps), frame_count) - int(time_begin * fps)
-
-    # If time_begin == time_end, one picture is registered.
-    if number_image == 0:
-        number_image = 1
-
-    # Check if the time or the number of image asked is possible
-    if time_begin > time_end or nb_image_wait > frame_count:
-        raise TimeError(path_video, time_begin, time_end)
-
-    # We find the first interesting image
-    video.set(cv2.CAP_PROP_POS_FRAMES, nb_image_wait)
-    (success, image) = video.read()
-
-    count_image = 0
-    # We register the interesting image
-    while success and count_image < number_image:
-        images.append(image)
-        nb_count_image = nb_image_wait + count_image
-        if register:
-            end_path = "{}_frame{}.jpg".format(path_video.parts[-1][: -4], nb_count_image)
-            cv2.imwrite(str(destination / end_path), image)
-        (success, image) = video.read()
-        count_image += 1
+    # Read the frames one by one
+    with VideoFrames(path_video, time_begin, time_end) as frames:
+        for (index_frame, time_frame, image) in frames:
+            images.append(image)
+            if register:
+                end_path = "{}_frame{}.jpg".format(path_video.parts[-1][: -4], index_frame)
+                cv2.imwrite(str(destination / end_path), image)
 
     return images
 
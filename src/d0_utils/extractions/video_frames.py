@@ -0,0 +1,172 @@
+"""
+This module streams the frames of a video one by one, without keeping them in memory.
+"""
+from pathlib import Path
+import numpy as np
+import cv2
+from src.d0_utils.extractions.exceptions.exception_classes import TimeError, FindPathExtractError, StrideError
+
+
+class VideoFrames:
+    """
+    The class that reads the frames of a video lazily.
+    It can be used as a context manager to release the video at the end.
+    """
+    def __init__(self, path_video, time_begin=0, time_end=-1, stride=1, buffer=None):
+        """
+        Open the video and find the frames to read.
+        This raises an exception if the duration is not possible regarding the video.
+        If time_end is bigger than the duration of the video, the frames are read until the end.
+
+        Args:
+            path_video (WindowsPath): path of the video.
+
+            time_begin (integer in second): the first frame read will be at the second 'time_begin'.
+                Default value = 0
+
+            time_end (integer in second): the time at which the reading stops.
+                if time_end == -1, the video is read until the end.
+                Default value = -1
+
+            stride (integer): only one frame every stride frames is decoded.
+                Default value = 1
+
+            buffer (array of 3 dimensions: height, width, layers): if given, every frame is decoded in it.
+                The same array is then yielded at each step, copy it to keep a frame.
+                Default value = None
+        """
+        # Verify if the video exists
+        if not path_video.exists():
+            raise FindPathExtractError(path_video)
+
+        # Verify the stride
+        if stride < 1:
+            raise StrideError(stride)
+
+        # Get the video and its characteristics
+        self.path_video = path_video
+        self.video = cv2.VideoCapture(str(path_video))
+        self.fps = self.video.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.dimensions = [int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))]
+
+        # We make sure that the video will be read until the end if time_end is
+        # bigger than the duration of the video.
+        if time_end == -1:
+            time_end = self.frame_count / self.fps
+        self.begin_frame = int(time_begin * self.fps)
+        number_image = min(int(time_end * self.fps), self.frame_count) - self.begin_frame
+
+        # If time_begin == time_end, one picture is read.
+        if number_image == 0:
+            number_image = 1
+
+        # Check if the time or the number of image asked is possible
+        if time_begin > time_end or self.begin_frame > self.frame_count:
+            self.video.release()
+            raise TimeError(path_video, time_begin, time_end)
+
+        self.end_frame = self.begin_frame + number_image
+        self.stride = stride
+        self.buffer = buffer
+
+        # The index of the next frame that will be read
+        self.position = self.begin_frame
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, self.begin_frame)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """
+        Computes the number of frames that will be yielded from the current position.
+
+        Returns:
+            (integer): the number of frames.
+        """
+        # The first frame to yield is the first one that respects the stride
+        first_frame = self.position + (self.begin_frame - self.position) % self.stride
+        return max(0, int(np.ceil((self.end_frame - first_frame) / self.stride)))
+
+    def __iter__(self):
+        """
+        Yield the frames one by one.
+
+        Returns:
+            (integer): the index of the frame in the video.
+
+            (float): the time of the frame in second.
+
+            (array of 3 dimensions: height, width, layers): the frame.
+        """
+        while self.position < self.end_frame:
+            # Grabbing a frame does not decode it
+            if not self.video.grab():
+                break
+            index_frame = self.position
+            self.position += 1
+
+            # Only decode the frames that respect the stride
+            if (index_frame - self.begin_frame) % self.stride != 0:
+                continue
+            (success, frame) = self.video.retrieve(self.buffer)
+            if not success:
+                break
+
+            yield index_frame, index_frame / self.fps, frame
+
+    def seek(self, index_frame):
+        """
+        Move to a specific frame. The next frame yielded will be this one
+        if it respects the stride.
+
+        Args:
+            index_frame (integer): the index of the frame in the video.
+        """
+        if not 0 <= index_frame <= self.frame_count:
+            raise TimeError(self.path_video, index_frame / self.fps, self.end_frame / self.fps)
+
+        self.position = index_frame
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, index_frame)
+
+    def read_frame(self, index_frame):
+        """
+        Read a single frame of the video.
+
+        Args:
+            index_frame (integer): the index of the frame in the video.
+
+        Returns:
+            (array of 3 dimensions: height, width, layers): the frame.
+        """
+        self.seek(index_frame)
+        (success, frame) = self.video.read(self.buffer)
+        if not success:
+            raise TimeError(self.path_video, index_frame / self.fps, self.end_frame / self.fps)
+        self.position = index_frame + 1
+
+        return frame
+
+    def close(self):
+        """
+        Release the video.
+        """
+        self.video.release()
+
+
+if __name__ == "__main__":
+    PATH_VIDEO = Path("../../../data/1_raw_videos/vid0.mp4")
+    try:
+        with VideoFrames(PATH_VIDEO, time_begin=18, time_end=19, stride=5) as FRAMES:
+            print("Number of frames", len(FRAMES))
+            BUFFER = np.empty((FRAMES.dimensions[0], FRAMES.dimensions[1], 3), dtype=np.uint8)
+            FRAMES.buffer = BUFFER
+            for (INDEX_FRAME, TIME_FRAME, FRAME) in FRAMES:
+                print(INDEX_FRAME, TIME_FRAME, FRAME is BUFFER)
+    except TimeError as time_error:
+        print(time_error.__repr__())
+    except FindPathExtractError as find_error:
+        print(find_error.__repr__())
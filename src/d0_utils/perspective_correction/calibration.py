@@ -0,0 +1,182 @@
+"""
+This module reads the calibration files once and keeps what is derived from them.
+
+The calibration file of a video has the homography on its second to last line
+and the extreme points in meters on its last line : left, top, right, bottom.
+The calibrations are kept in a registry of the process, a file is read again only if it has been modified.
+"""
+import os
+from pathlib import Path
+from threading import Lock
+from time import time
+import numpy as np
+
+# Exceptions
+from src.d0_utils.store_load_data.exceptions.exception_classes import FindPathError
+
+# To warp the lanes
+from src.d0_utils.perspective_correction.lane_remap import LaneRemap
+
+
+class Calibration:
+    """
+    The class that contains the calibration of a video and the products derived from it.
+    The maps of the warps are computed the first time they are asked.
+    """
+    def __init__(self, homography, extreme_points):
+        """
+        Construct the calibration.
+
+        Args:
+            homography (array of shape : (3, 3)): the homography that gives the top-down view.
+
+            extreme_points (array of 4 floats): the extreme points in meters. [left, top, right, bottom]
+        """
+        self.homography = homography
+        self.inverse_homography = np.linalg.inv(homography)
+        self.extreme_points = extreme_points
+
+        # The left limit and the length of the video in meters
+        self.left_limit = extreme_points[0]
+        self.length_video = abs(extreme_points[2] - extreme_points[0])
+
+        # The maps of the warps of the lanes
+        self.lane_remaps = {}
+
+    @classmethod
+    def from_txt(cls, path_txt):
+        """
+        Read a calibration file.
+
+        Args:
+            path_txt (WindowsPath): the path to the calibration file.
+
+        Returns:
+            (Calibration): the calibration.
+        """
+        with open(path_txt, 'r') as file:
+            lines = file.readlines()
+        homography = np.array(lines[-2].split(','), dtype=float).reshape((3, 3))
+        extreme_points = np.array(lines[-1].split(','), dtype=float)
+
+        return cls(homography, extreme_points)
+
+    @classmethod
+    def from_npz(cls, path_npz):
+        """
+        Read a calibration saved by save_npz.
+
+        Args:
+            path_npz (WindowsPath): the path to the .npz file.
+
+        Returns:
+            (Calibration): the calibration.
+        """
+        with np.load(path_npz) as arrays:
+            return cls(arrays["homography"], arrays["extreme_points"])
+
+    def save_npz(self, path_npz):
+        """
+        Save the calibration in a .npz file, which is faster to read than the calibration file.
+
+        Args:
+            path_npz (WindowsPath): the path to the .npz file.
+        """
+        np.savez(path_npz, homography=self.homography, extreme_points=self.extreme_points)
+
+    def get_pixels_per_meter(self, width):
+        """
+        Compute the horizontal scale of a top-down image.
+
+        Args:
+            width (integer): the width of the top-down image in pixels.
+
+        Returns:
+            (float): the number of pixels per meter.
+        """
+        return width / self.length_video
+
+    def get_lane_remap(self, dimensions, margin=0, nb_lines=10, lanes=None):
+        """
+        Get the maps that warp the lanes of the original image, see LaneRemap.
+        The maps are computed once for each set of parameters.
+
+        Args:
+            dimensions (list of 2 integers): the dimensions of the original image. [vertical, horizontal]
+
+            margin (integer): the margin to take to be sure not to lose information.
+                Default value = 0
+
+            nb_lines (integer): the number of lines in the pool.
+                Default value = 10
+
+            lanes (list of integers): the lanes to compute. if None, the lanes 1 to nb_lines - 2 are computed.
+                Default value = None
+
+        Returns:
+            (LaneRemap): the maps of the lanes.
+        """
+        key = (tuple(dimensions), margin, nb_lines, None if lanes is None else tuple(lanes))
+        if key not in self.lane_remaps:
+            self.lane_remaps[key] = LaneRemap(self.homography, dimensions, margin, nb_lines, lanes)
+
+        return self.lane_remaps[key]
+
+
+# The calibrations that have been read : path -> (modification time, calibration)
+CALIBRATIONS = {}
+CALIBRATIONS_LOCK = Lock()
+
+
+def load_calibration(path_calibration, use_sidecar=False):
+    """
+    Get the calibration of a video, the file is only read if it has been modified since the last call.
+
+    Args:
+        path_calibration (WindowsPath): the path to the calibration file.
+
+        use_sidecar (boolean): if True, the calibration is saved in a .calibration.npz file next to the calibration file
+            and read from it the next times.
+            Default value = False
+
+    Returns:
+        (Calibration): the calibration.
+    """
+    try:
+        modification_time = os.stat(path_calibration).st_mtime_ns
+    except FileNotFoundError:
+        raise FindPathError(path_calibration)
+    key = os.path.abspath(path_calibration)
+
+    with CALIBRATIONS_LOCK:
+        if key in CALIBRATIONS and CALIBRATIONS[key][0] == modification_time:
+            return CALIBRATIONS[key][1]
+
+        path_sidecar = Path(path_calibration).with_suffix(".calibration.npz")
+        if use_sidecar and path_sidecar.exists() and path_sidecar.stat().st_mtime_ns >= modification_time:
+            calibration = Calibration.from_npz(path_sidecar)
+        else:
+            calibration = Calibration.from_txt(path_calibration)
+            if use_sidecar:
+                calibration.save_npz(path_sidecar)
+
+        CALIBRATIONS[key] = (modification_time, calibration)
+
+    return calibration
+
+
+if __name__ == "__main__":
+    PATH_TXT = Path("../../../data/2_intermediate_top_down_lanes/calibration/vid0.txt")
+    NB_TRIES = 1000
+
+    TIME_START = time()
+    for idx_try in range(NB_TRIES):
+        CALIBRATION = Calibration.from_txt(PATH_TXT)
+    print("Read the calibration file : {:.3f} ms".format(1000 * (time() - TIME_START) / NB_TRIES))
+
+    TIME_START = time()
+    for idx_try in range(NB_TRIES):
+        CALIBRATION = load_calibration(PATH_TXT)
+    print("Load the calibration from the registry : {:.3f} ms".format(1000 * (time() - TIME_START) / NB_TRIES))
+
+    print("Length of the video : {} meters, homography :\n{}".format(CALIBRATION.length_video, CALIBRATION.homography))
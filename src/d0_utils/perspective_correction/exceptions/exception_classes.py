@@ -0,0 +1,19 @@
+"""
+This module is where you can find all the exception classes link with the perspective correction.
+
+Classes:
+    LaneError
+"""
+
+
+class LaneError(Exception):
+    """The exception class error to tell that the lane does not exist."""
+    def __init__(self, lane, nb_lines):
+        """
+        Construct the lane and the number of lines.
+        """
+        self.lane = lane
+        self.nb_lines = nb_lines
+
+    def __repr__(self):
+        return "The lane {} does not exist. The lanes go from 1 to {}.".format(self.lane, self.nb_lines - 2)
@@ -0,0 +1,173 @@
+"""
+This module computes the top-down view of the lanes directly from the original image.
+The full top-down image is never computed, only the rows of the kept lanes are.
+"""
+from pathlib import Path
+from time import time
+import numpy as np
+import cv2
+
+# Exceptions
+from src.d0_utils.perspective_correction.exceptions.exception_classes import LaneError
+
+# To cut the top-down image into lanes
+from src.d0_utils.split_and_save_data.crop.crop_lines import crop
+
+
+def get_lane_rows(height, margin, nb_lines):
+    """
+    Compute the rows of the top-down image that are kept for each lane.
+    The rows are the same as the ones of split_and_save.
+
+    Args:
+        height (integer): the height of the top-down image.
+
+        margin (integer): the margin to take to be sure not to lose information.
+
+        nb_lines (integer): the number of lines in the pool.
+
+    Returns:
+        (list of array of integers): the rows of the lanes 1 to nb_lines - 2.
+    """
+    # List of the cuts, the same as in split_and_save
+    list_y = [int(1/nb_lines * idx_lane * height) for idx_lane in range(1, nb_lines)]
+
+    # Crop the indexes of the rows to have exactly the same cuts as the ones of the image
+    return [rows[:, 0] for rows in crop(np.arange(height)[:, np.newaxis], list_y, margin)]
+
+
+def check_lanes(lanes, nb_lines):
+    """
+    Verify that the lanes exist.
+
+    Args:
+        lanes (list of integers): the lanes.
+
+        nb_lines (integer): the number of lines in the pool.
+    """
+    for lane in lanes:
+        if not 1 <= lane <= nb_lines - 2:
+            raise LaneError(lane, nb_lines)
+
+
+class LaneRemap:
+    """
+    The class that warps the original image to get the top-down view of the lanes.
+    The maps of the warp are computed once and then applied to every frame.
+    The maps are in fixed-point, so the lanes differ by a few gray levels from the crop of get_top_down_image.
+    """
+    def __init__(self, homography, dimensions, margin=0, nb_lines=10, lanes=None):
+        """
+        Compute the maps for each lane.
+
+        Args:
+            homography (array of shape : (3, 3)): the homography that gives the top-down view.
+
+            dimensions (list of 2 integers): the dimensions of the original image. [vertical, horizontal]
+
+            margin (integer): the margin to take to be sure not to lose information.
+                Default value = 0
+
+            nb_lines (integer): the number of lines in the pool.
+                Default value = 10
+
+            lanes (list of integers): the lanes to compute. if None, the lanes 1 to nb_lines - 2 are computed.
+                Default value = None
+        """
+        if lanes is None:
+            lanes = range(1, nb_lines - 1)
+
+        self.dimensions = dimensions
+        self.nb_lines = nb_lines
+        self.lanes = list(lanes)
+
+        # Verify that the lanes exist
+        check_lanes(self.lanes, nb_lines)
+
+        # For each pixel of the top-down image, find the pixel of the original image
+        inverse_homography = np.linalg.inv(homography)
+        lane_rows = get_lane_rows(dimensions[0], margin, nb_lines)
+        columns = np.arange(dimensions[1], dtype=np.float64)
+
+        self.maps = {}
+        for lane in self.lanes:
+            (grid_x, grid_y) = np.meshgrid(columns, lane_rows[lane - 1].astype(np.float64))
+
+            # Apply the inverse homography
+            homogeneous = inverse_homography[2, 0] * grid_x + inverse_homography[2, 1] * grid_y + inverse_homography[2, 2]
+            map_x = (inverse_homography[0, 0] * grid_x + inverse_homography[0, 1] * grid_y + inverse_homography[0, 2]) / homogeneous
+            map_y = (inverse_homography[1, 0] * grid_x + inverse_homography[1, 1] * grid_y + inverse_homography[1, 2]) / homogeneous
+
+            # Fixed-point maps are faster to apply
+            self.maps[lane] = cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+
+    def get_lane(self, image, lane, destination=None):
+        """
+        Compute the top-down view of a lane.
+
+        Args:
+            image (array): the original image.
+
+            lane (integer): the lane to compute.
+
+            destination (array): if given, the lane is written in it.
+                Default value = None
+
+        Returns:
+            (array): the top-down view of the lane.
+        """
+        if lane not in self.maps:
+            raise LaneError(lane, self.nb_lines)
+
+        (map_fixed, map_interpolation) = self.maps[lane]
+        return cv2.remap(image, map_fixed, map_interpolation, cv2.INTER_LINEAR, dst=destination)
+
+    def split(self, image):
+        """
+        Compute the top-down view of all the lanes.
+
+        Args:
+            image (array): the original image.
+
+        Returns:
+            (list of (integer, array)): the list of [lane, top-down view of the lane].
+        """
+        return [(lane, self.get_lane(image, lane)) for lane in self.lanes]
+
+
+if __name__ == "__main__":
+    # To compare with the warp of the full image
+    from src.d0_utils.perspective_correction.undo_perspective import read_homography
+    from src.d0_utils.perspective_correction.perspective_correction import get_top_down_image
+
+    PATH_TXT = Path("../../../data/2_intermediate_top_down_lanes/calibration/vid0.txt")
+    HOMOGRAPHY = read_homography(PATH_TXT)
+    NB_TRIES = 50
+
+    # For HD and 4K images
+    for FACTOR in [1, 2]:
+        DIMENSIONS = [1080 * FACTOR, 1920 * FACTOR]
+        IMAGE = np.random.randint(0, 255, (DIMENSIONS[0], DIMENSIONS[1], 3), dtype=np.uint8)
+
+        # The homography of the bigger image
+        SCALING = np.diag([FACTOR, FACTOR, 1.])
+        SCALED_HOMOGRAPHY = SCALING @ HOMOGRAPHY @ np.linalg.inv(SCALING)
+
+        # Warp the full image then crop it
+        TIME_START = time()
+        for idx_try in range(NB_TRIES):
+            TOP_DOWN_IMAGE = get_top_down_image(IMAGE, SCALED_HOMOGRAPHY)
+            LANES_WARP = crop(TOP_DOWN_IMAGE, [int(1/10 * idx_lane * DIMENSIONS[0]) for idx_lane in range(1, 10)])
+        TIME_WARP = (time() - TIME_START) / NB_TRIES
+
+        # Warp only the lanes
+        LANE_REMAP = LaneRemap(SCALED_HOMOGRAPHY, DIMENSIONS)
+        TIME_START = time()
+        for idx_try in range(NB_TRIES):
+            LANES_REMAP = LANE_REMAP.split(IMAGE)
+        TIME_REMAP = (time() - TIME_START) / NB_TRIES
+
+        MAX_DIFFERENCE = max([np.max(np.abs(LANES_WARP[lane - 1].astype(int) - lane_image)) for (lane, lane_image) in LANES_REMAP])
+        print("Dimensions", DIMENSIONS)
+        print("Warp and crop : {:.2f} ms, remap of the lanes : {:.2f} ms".format(1000 * TIME_WARP, 1000 * TIME_REMAP))
+        print("Maximum difference between the two methods", MAX_DIFFERENCE)
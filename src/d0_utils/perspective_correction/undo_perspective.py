@@ -5,6 +5,9 @@ from pathlib import Path
 import numpy as np
 import cv2
 
+# To read the calibration file
+from src.d0_utils.perspective_correction.calibration import load_calibration
+
 
 def read_homography(path_calibration):
     """
@@ -16,13 +19,8 @@ def read_homography(path_calibration):
     Returns:
         (array of shape : (3, 3)): the homography matrix.
     """
-    # Get the homography
-    file = open(path_calibration, 'r')
-    lines = file.readlines()
-    homography = np.fromstring(lines[-2], dtype=float, sep=',')
-    file.close()
-
-    return np.reshape(homography, (3, 3))
+    # The calibration file is only read once
+    return load_calibration(path_calibration).homography.copy()
 
 
 def get_original_image(transformed_image, homography, original_dimensions):
@@ -43,6 +41,24 @@ def get_original_image(transformed_image, homography, original_dimensions):
     return cv2.warpPerspective(transformed_image, np.linalg.inv(homography), (original_dimensions[1], original_dimensions[0]), flags=cv2.INTER_LINEAR)
 
 
+def project_points(points, homography):
+    """
+    Get the points of the original image from points of a transformed image.
+    It is the transformation of get_original_image, applied to points instead of a whole image.
+
+    Args:
+        points (array of shape : (n, 2)): the points in the transformed image. [horizontal, vertical]
+
+        homography (array of shape : (3, 3)) : the matrix of the homography.
+
+    Returns:
+        (array of shape : (n, 2)): the points in the original image. [horizontal, vertical]
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 1, 2)
+
+    return cv2.perspectiveTransform(points, np.linalg.inv(homography)).reshape(-1, 2)
+
+
 if __name__ == "__main__":
     # Define the paths
     CALIBRATION_PATH = Path("../../../data/2_intermediate_top_down_lanes/calibration/tries/vid0.txt")
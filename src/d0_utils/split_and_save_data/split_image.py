@@ -29,5 +29,21 @@ def split_and_save(image, margin, destination, frame, nb_lines):
 
     # Save the cropped image except the first and the last one
     for idx_lane in range(1, nb_lines - 1):
-        name = 'l%d' % idx_lane + '_f' + '0' * (4 - (len(str(frame)))) + str(frame) + '.jpg'
-        cv2.imwrite(str(destination / name), list_images[idx_lane - 1])
+        save_lane(list_images[idx_lane - 1], destination, idx_lane, frame)
+
+
+def save_lane(lane, destination, idx_lane, frame):
+    """
+    Save a lane.
+
+    Args:
+        lane (array): the image of the lane.
+
+        destination (WindowsPath): the path to the folder where the image will be stored.
+
+        idx_lane (integer): the number of the lane.
+
+        frame (integer): the number of the frame.
+    """
+    name = 'l%d' % idx_lane + '_f' + '0' * (4 - (len(str(frame)))) + str(frame) + '.jpg'
+    cv2.imwrite(str(destination / name), lane)
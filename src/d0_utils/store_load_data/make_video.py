@@ -2,40 +2,170 @@
 This file makes a video with a list of image.
 """
 from pathlib import Path
+from threading import Thread
+from queue import Queue
 import cv2
 from src.d0_utils.store_load_data.exceptions.exception_classes import AlreadyExistError, FindPathError
 
 
-def make_video(name_video, images, fps=25, destination=None):
+class VideoSink:
+    """
+    The class that writes the images in a video as they are produced.
+    The size of the video is the one of the first image.
+    The images can be encoded by a background thread, so that the producer does not wait for the encoder.
+    """
+    def __init__(self, name_video, fps=25, destination=None, background=False, queue_size=8):
+        """
+        Verify the path of the video.
+
+        Args:
+            name_video (string): the name of the video.
+
+            fps (int): the fps of the created video.
+                Default value = 25
+
+            destination (pathlib): the path leading to the folder where the video will be registered.
+                Default value = None
+
+            background (boolean): if True, the images are encoded by a background thread.
+                The images are copied, so the producer can reuse its arrays.
+                Default value = False
+
+            queue_size (integer): the maximal number of images waiting for the background thread.
+                Default value = 8
+        """
+        if destination is None:
+            destination = Path("../../data/4_model_output/tries/videos")
+
+        # Check that the folder exists
+        if not destination.exists():
+            raise FindPathError(destination)
+
+        # Verify that the video does not exist
+        self.path_video = destination / name_video
+        if self.path_video.exists():
+            raise AlreadyExistError(self.path_video)
+
+        self.fps = fps
+        self.out = None
+
+        # The background encoder
+        self.queue = None
+        self.thread = None
+        self.error = None
+        if background:
+            self.queue = Queue(queue_size)
+            self.thread = Thread(target=self.encode, daemon=True)
+            self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_image(self, image):
+        """
+        Write an image in the video, the video is created with the first image.
+
+        Args:
+            image (array of 3 dimensions - height, width, layers): the image.
+        """
+        if self.out is None:
+            (height, width) = image.shape[: 2]
+            self.out = cv2.VideoWriter(str(self.path_video), cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (width, height))
+        self.out.write(image)
+
+    def encode(self):
+        """
+        Write the images of the queue until None is received.
+        """
+        image = self.queue.get()
+        while image is not None:
+            # After an error, the images are only taken from the queue so that the producer is not blocked
+            if self.error is None:
+                try:
+                    self.write_image(image)
+                except Exception as error:
+                    self.error = error
+            image = self.queue.get()
+
+    def write(self, image):
+        """
+        Add an image to the video.
+
+        Args:
+            image (array of 3 dimensions - height, width, layers): the image.
+        """
+        if self.thread is None:
+            self.write_image(image)
+        elif self.error is not None:
+            raise self.error
+        else:
+            self.queue.put(image.copy())
+
+    def close(self):
+        """
+        Write the last images and close the video.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.out is not None:
+            self.out.release()
+            self.out = None
+        if self.error is not None:
+            raise self.error
+
+
+def make_video(name_video, images, fps=25, destination=None, background=False):
     """
     Makes a video with all the image in image.
 
     Args:
         name_video (string): the name of the video.
 
-        images (list of array of 3 dimensions - height, width, layers): list of the image.
+        images (iterable of array of 3 dimensions - height, width, layers): the images.
+            It can be a generator, the images are written as they come.
 
         fps (int): the fps of the created video.
 
         destination (pathlib): the path leading to the folder where the video will be registered.
+
+        background (boolean): if True, the images are encoded by a background thread.
+            Default value = False
+    """
+    with VideoSink(name_video, fps, destination, background) as sink:
+        for image in images:
+            sink.write(image)
+
+
+def make_videos(names_video, images, fps=25, destination=None, background=False):
     """
-    if destination is None:
-        destination = Path("../../data/4_model_output/tries/videos")
-
-    # Check that the folder exists
-    if not destination.exists():
-        raise FindPathError(destination)
-
-    # Verify that the video does not exist
-    path_video = destination / name_video
-    if path_video.exists():
-        raise AlreadyExistError(path_video)
-
-    # Parameters
-    (height, width) = images[0].shape[: 2]
-    size = (width, height)
-
-    out = cv2.VideoWriter(str(path_video), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
-    for image in images:
-        out.write(image)
-    out.release()
+    Makes several videos in one pass, for instance the lanes and the original video clip.
+
+    Args:
+        names_video (list of strings): the names of the videos.
+
+        images (iterable of tuples of array of 3 dimensions - height, width, layers): the images.
+            Each element gives one image per video.
+
+        fps (int): the fps of the created videos.
+
+        destination (pathlib): the path leading to the folder where the videos will be registered.
+
+        background (boolean): if True, each video is encoded by a background thread.
+            Default value = False
+    """
+    sinks = []
+    try:
+        for name_video in names_video:
+            sinks.append(VideoSink(name_video, fps, destination, background))
+
+        for images_videos in images:
+            for (sink, image) in zip(sinks, images_videos):
+                sink.write(image)
+    finally:
+        for sink in sinks:
+            sink.close()
@@ -7,10 +7,9 @@ It can create a txt file to register the parameters of the calibration.
 from pathlib import Path
 import random as rd
 import numpy as np
-import cv2
 
-# To extract image from videos
-from src.d0_utils.extractions.extract_image import extract_image_video
+# To read the frames of videos
+from src.d0_utils.extractions.video_frames import VideoFrames
 
 # Exception classes
 from src.d0_utils.extractions.exceptions.exception_classes import TimeError
@@ -142,33 +141,27 @@ def calibrate_video(path_video, time_begin=0, time_end=-1, destination_video=Non
     if path_txt.exists():
         raise AlreadyExistError(path_txt)
 
-    # Get the image
-    print("Get the image ...")
-    list_images = extract_image_video(path_video, time_begin, time_end)
-    nb_images = len(list_images)
-
-    # Selection of the 8 points in a random image
-    print("Point selection for calibration ...")
-    (points_src, points_meter) = calibration_selection(list_images[rd.randint(int(nb_images / 10), int(nb_images / 5))])
+    with VideoFrames(path_video, time_begin, time_end) as frames:
+        # Get a random image
+        print("Get the image ...")
+        nb_images = len(frames)
+        image = frames.read_frame(frames.begin_frame + rd.randint(int(nb_images / 10), int(nb_images / 5)))
 
-    # Get the coordinate of the points in the final image in pixels and the extreme points
-    (points_dst, exteme_points) = meter_to_pixel(points_src, points_meter, list_images[0])
-
-    # Get the homography matrix
-    homography = get_homography(points_src, points_dst)
+        # Selection of the 8 points in a random image
+        print("Point selection for calibration ...")
+        (points_src, points_meter) = calibration_selection(image)
 
-    # Transform the image
-    print("Correction of image ...")
-    for index_image in range(nb_images):
-        list_images[index_image] = get_top_down_image(list_images[index_image], homography)
+        # Get the coordinate of the points in the final image in pixels and the extreme points
+        (points_dst, exteme_points) = meter_to_pixel(points_src, points_meter, image)
 
-    # Get the fps
-    video = cv2.VideoCapture(str(path_video))
-    fps_video = int(video.get(cv2.CAP_PROP_FPS))
+        # Get the homography matrix
+        homography = get_homography(points_src, points_dst)
 
-    # Make the video
-    print("Make the corrected video ...")
-    make_video(corrected_video, list_images, fps_video, destination_video)
+        # Make the video, the image are corrected one by one
+        print("Correction of image and make the corrected video ...")
+        frames.seek(frames.begin_frame)
+        corrected_images = (get_top_down_image(frame, homography) for (index_frame, time_frame, frame) in frames)
+        make_video(corrected_video, corrected_images, int(frames.fps), destination_video)
 
     # Construct the txt file
     to_store = [name_video, points_src, points_dst, homography, exteme_points]
@@ -212,7 +205,8 @@ def calibrate_video_text(path_video, calibration_time, destination_txt=None):
         raise AlreadyExistError(path_txt)
 
     # Get the image
-    image = extract_image_video(path_video, calibration_time, calibration_time)[0]
+    with VideoFrames(path_video, calibration_time, calibration_time) as frames:
+        image = frames.read_frame(frames.begin_frame)
 
     # Selection of the 8 points in a random image
     print("Point selection for calibration ...")
@@ -2,23 +2,106 @@
 This module creates a folder filled with lanes taken from a video.
 """
 import os
-import cv2
+from time import time
+from multiprocessing import Pool
 from pathlib import Path
+import numpy as np
 
 # Exceptions
 from src.d0_utils.extractions.exceptions.exception_classes import TimeError
 from src.d0_utils.store_load_data.exceptions.exception_classes import FindPathError, AlreadyExistError
+from src.d0_utils.perspective_correction.exceptions.exception_classes import LaneError
 
-# To calibrate an image from a txt file
-from src.d0_utils.calibration_from_txt import calibrate_from_txt
+# To read the frames of the video
+from src.d0_utils.extractions.video_frames import VideoFrames
 
-# To split the image into LANES and save them
-from src.d0_utils.split_and_save_data.split_image import split_and_save
+# To get the calibration and the top-down view of the LANES
+from src.d0_utils.perspective_correction.calibration import load_calibration
+from src.d0_utils.perspective_correction.lane_remap import check_lanes
 
+# To save the LANES
+from src.d0_utils.split_and_save_data.split_image import save_lane
 
-def create_data(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_lines=10, destination=None):
+
+def get_legacy_frame_name(index_frame, fps, frame_count):
     """
-    Fill the destination path with pictures of the LANES taken from the video.
+    Compute the number of a frame in the names of the lanes of the former version, which saved the video second per second.
+    In the second 'time', the frame number idx_image of the nb_images frames was named time * nb_images + idx_image.
+    It is the index of the frame in the video only if the fps is an integer.
+
+    Args:
+        index_frame (integer): the index of the frame in the video.
+
+        fps (float): the number of frames per second of the video.
+
+        frame_count (integer): the number of frames of the video.
+
+    Returns:
+        (integer): the number of the frame in the former names.
+    """
+    # The second of the frame, the frames of the second 'time' are int(time * fps) to int((time + 1) * fps) - 1
+    time = int(index_frame / fps)
+    while int(time * fps) > index_frame:
+        time -= 1
+    while int((time + 1) * fps) <= index_frame:
+        time += 1
+
+    nb_images = min(int((time + 1) * fps), frame_count) - int(time * fps)
+
+    return time * nb_images + index_frame - int(time * fps)
+
+
+def save_lanes_range(job, verbose=False):
+    """
+    Save the lanes of a range of frames of a video.
+    The function is called by the workers of the pool, each one decodes its own range.
+
+    Args:
+        job (tuple): (path_video, path_txt, margin, nb_lines, lanes, path_directory, begin_frame, end_frame, legacy_names)
+            The frames from begin_frame to end_frame - 1 are saved in path_directory.
+
+        verbose (boolean): if True, the progress is printed every 500 frames.
+            Default value = False
+
+    Returns:
+        (integer): the number of frames that have been saved.
+    """
+    (path_video, path_txt, margin, nb_lines, lanes, path_directory, begin_frame, end_frame, legacy_names) = job
+
+    with VideoFrames(path_video) as frames:
+        # The maps of the lanes are computed once
+        lane_remap = load_calibration(path_txt).get_lane_remap(frames.dimensions, margin, nb_lines, lanes)
+
+        # Decode all the frames in the same array
+        frames.buffer = np.empty((frames.dimensions[0], frames.dimensions[1], 3), dtype=np.uint8)
+
+        # Only read the frames of the range
+        frames.seek(begin_frame)
+        frames.end_frame = end_frame
+
+        time_start = time()
+        nb_frames = 0
+        for (index_frame, time_frame, frame) in frames:
+            if legacy_names:
+                index_frame = get_legacy_frame_name(index_frame, frames.fps, frames.frame_count)
+
+            # Compute and save the lanes
+            for (idx_lane, lane) in lane_remap.split(frame):
+                save_lane(lane, path_directory, idx_lane, index_frame)
+            nb_frames += 1
+
+            # Print the progress
+            if verbose and nb_frames % 500 == 0:
+                print("{} frames saved, {:.1f} frames per second".format(nb_frames, nb_frames / (time() - time_start)))
+
+    return nb_frames
+
+
+def get_jobs(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_lines=10, destination=None, lanes=None, nb_chunks=1,
+             legacy_names=False):
+    """
+    Verify the parameters and split the frames of the video into ranges.
+    The directory of the video is only created by run_jobs, once all the videos have been verified.
 
     Args:
         path_video (WindowsPath): path to the video
@@ -26,11 +109,9 @@ def create_data(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_line
         path_txt (WindowsPath): path to the txt file to calibrate the video
 
         margin (integer): number of lines of pixels to add to lanes
-            - we remove (if margin > 0)
-            - we add (if margin < 0)
 
         time_begin (integer): the beginning time
-            Default value = -1
+            Default value = 0
 
         time_end (integer): the ending time
             Default value = -1
@@ -41,9 +122,24 @@ def create_data(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_line
 
         destination (integer): the path where the lanes will be saves
             Default value = None
+
+        lanes (list of integers): the lanes to save. if None, the lanes 1 to nb_lines - 2 are saved.
+            Default value = None
+
+        nb_chunks (integer): the number of ranges of frames.
+            Default value = 1
+
+        legacy_names (boolean): if True, the lanes are named as in the former version, see get_legacy_frame_name.
+            Default value = False
+
+    Returns:
+        (list of tuples): the jobs to give to save_lanes_range.
     """
     if destination is None:
         destination = Path("../data/2_intermediate_top_down_lanes/lanes/tries")
+    if lanes is None:
+        lanes = range(1, nb_lines - 1)
+    lanes = list(lanes)
 
     # Verify that the paths exists
     if not path_video.exists():
@@ -60,22 +156,150 @@ def create_data(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_line
     # Check if the data has already been generated
     if path_directory.exists():
         raise AlreadyExistError(path_directory)
-    else:
-        # Create the directory where to save the data
+
+    # Verify that the lanes exist
+    check_lanes(lanes, nb_lines)
+
+    # Get the frames to save
+    with VideoFrames(path_video, time_begin, time_end) as frames:
+        (begin_frame, end_frame) = (frames.begin_frame, frames.end_frame)
+
+    # Split the frames into contiguous ranges
+    nb_chunks = max(1, min(nb_chunks, end_frame - begin_frame))
+    limits = np.linspace(begin_frame, end_frame, nb_chunks + 1).astype(int)
+
+    return [(path_video, path_txt, margin, nb_lines, lanes, path_directory, int(limits[idx_chunk]), int(limits[idx_chunk + 1]), legacy_names)
+            for idx_chunk in range(nb_chunks)]
+
+
+def run_jobs(jobs, nb_workers=1):
+    """
+    Create the directories of the videos and save the lanes of every job, in a pool of processes if nb_workers > 1.
+
+    Args:
+        jobs (list of tuples): the jobs given by get_jobs.
+
+        nb_workers (integer): the number of processes.
+            Default value = 1
+
+    Returns:
+        (integer): the number of frames that have been saved.
+
+        (float): the number of frames processed per second.
+    """
+    # Create the directories where to save the data, the jobs of a video share its directory
+    for path_directory in dict.fromkeys(job[5] for job in jobs):
         os.makedirs(path_directory)
 
-    # Save the image second per second
-    for time in range(time_begin, time_end):
-        # Calibrate and extract image from the corrected video
-        corrected_images = calibrate_from_txt(path_video, path_txt, time, time + 1)
+    time_start = time()
+    nb_frames = 0
+
+    if nb_workers > 1:
+        with Pool(nb_workers) as pool:
+            for (idx_job, nb_frames_job) in enumerate(pool.imap_unordered(save_lanes_range, jobs)):
+                nb_frames += nb_frames_job
+
+                # Print the progress
+                print("{}/{} chunks done, {} frames saved, {:.1f} frames per second".format(
+                    idx_job + 1, len(jobs), nb_frames, nb_frames / (time() - time_start)))
+    else:
+        for job in jobs:
+            nb_frames += save_lanes_range(job, verbose=True)
+
+    frames_per_second = nb_frames / max(time() - time_start, 1e-9)
+    print("{} frames have been saved at {:.1f} frames per second.".format(nb_frames, frames_per_second))
+
+    return nb_frames, frames_per_second
+
+
+def create_data(path_video, path_txt, margin, time_begin=0, time_end=-1, nb_lines=10, destination=None, lanes=None, nb_workers=1,
+                legacy_names=False):
+    """
+    Fill the destination path with pictures of the LANES taken from the video.
+    The video is read once, the top-down view of each lane is computed directly from the frame
+    and saved before reading the next frame.
+    With several workers, the video is split into ranges of frames that are saved in parallel.
+    The saved images are the same in both cases.
+    The lanes are warped with the fixed-point maps of LaneRemap, they are not exactly the ones of the former
+    warpPerspective of the whole image : on a frame of noise with the calibration of vid0, the pixels differ
+    by 0.75 gray level on average and by 7 at most. The lanes saved before can differ from the new ones.
+    The lanes are named with the index of the frame in the video. The former version numbered the frames second
+    per second, which gives other names when the fps is not an integer, for instance 29.97 : the labels of these
+    videos have to be made again, or the lanes saved with legacy_names.
+
+    Args:
+        path_video (WindowsPath): path to the video
+
+        path_txt (WindowsPath): path to the txt file to calibrate the video
+
+        margin (integer): number of lines of pixels to add to lanes
+            - we remove (if margin > 0)
+            - we add (if margin < 0)
+
+        time_begin (integer): the beginning time
+            Default value = 0
+
+        time_end (integer): the ending time
+            Default value = -1
+            if time_end == -1, the video is viewed until the end.
+
+        nb_lines (integer): the number of lanes in the pool
+            Default value = 10
+
+        destination (integer): the path where the lanes will be saves
+            Default value = None
+
+        lanes (list of integers): the lanes to save. if None, the lanes 1 to nb_lines - 2 are saved.
+            Default value = None
+
+        nb_workers (integer): the number of processes.
+            Default value = 1
+
+        legacy_names (boolean): if True, the lanes are named as in the former version, see get_legacy_frame_name.
+            Default value = False
+
+    Returns:
+        (integer): the number of frames that have been saved.
+
+        (float): the number of frames processed per second.
+    """
+    # Several ranges per worker to balance the load
+    nb_chunks = 4 * nb_workers if nb_workers > 1 else 1
+    jobs = get_jobs(path_video, path_txt, margin, time_begin, time_end, nb_lines, destination, lanes, nb_chunks, legacy_names)
+
+    return run_jobs(jobs, nb_workers)
+
+
+def create_data_videos(paths_video, paths_txt, margin, time_begin=0, time_end=-1, nb_lines=10, destination=None, lanes=None, nb_workers=1,
+                       legacy_names=False):
+    """
+    Fill the destination path with pictures of the LANES taken from several videos.
+    Each video is a job of the pool.
+
+    Args:
+        paths_video (list of WindowsPath): paths to the videos
+
+        paths_txt (list of WindowsPath): paths to the txt files to calibrate the videos
+
+        The other arguments are the ones of create_data, they are the same for every video.
+
+    Returns:
+        (integer): the number of frames that have been saved.
+
+        (float): the number of frames processed per second.
+    """
+    # All the videos are verified before any directory is created
+    (jobs, paths_directory) = ([], [])
+    for (path_video, path_txt) in zip(paths_video, paths_txt):
+        jobs_video = get_jobs(path_video, path_txt, margin, time_begin, time_end, nb_lines, destination, lanes, legacy_names=legacy_names)
 
-        # fps = frame per second
-        fps = len(corrected_images)
+        # Two videos with the same name would be saved in the same directory
+        if jobs_video[0][5] in paths_directory:
+            raise AlreadyExistError(jobs_video[0][5])
+        paths_directory.append(jobs_video[0][5])
+        jobs.extend(jobs_video)
 
-        # Save the data
-        for idx_image in range(fps):
-            # Split and save the image
-            split_and_save(corrected_images[idx_image], margin, path_directory, time * fps + idx_image, nb_lines)
+    return run_jobs(jobs, nb_workers)
 
 
 if __name__ == "__main__":
@@ -85,10 +309,12 @@ if __name__ == "__main__":
     MARGIN = 0
 
     try:
-        create_data(PATH_VIDEO, PATH_TXT, MARGIN, time_begin=0, time_end=1)
+        create_data(PATH_VIDEO, PATH_TXT, MARGIN, time_begin=0, time_end=1, nb_workers=4)
     except FindPathError as find_error:
         print(find_error.__repr__())
     except AlreadyExistError as already_exists:
         print(already_exists.__repr__())
     except TimeError as time_error:
         print(time_error.__repr__())
+    except LaneError as lane_error:
+        print(lane_error.__repr__())
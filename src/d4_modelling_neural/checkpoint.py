@@ -0,0 +1,93 @@
+"""
+This module saves and restores the state of a training, so that a stopped training can be resumed.
+"""
+import os
+import shutil
+import pickle
+from pathlib import Path
+
+# To save the model and the optimizer
+from tensorflow.train import Checkpoint
+
+
+class TrainingCheckpoint:
+    """
+    The class that saves the model, the optimizer and the state of the training loop in a folder.
+    The variables of TensorFlow are saved by a Checkpoint, the state of the loop is pickled.
+    The state is written last and points to the variables saved with it, so an interrupted save keeps the previous checkpoint.
+    """
+    def __init__(self, path_checkpoint, model, optimizer):
+        """
+        Construct the checkpoint.
+
+        Args:
+            path_checkpoint (WindowsPath): the folder of the checkpoint.
+
+            model (TensorFlow Model): the MODEL.
+
+            optimizer (TensorFlow Optimizer): the optimizer.
+        """
+        self.path_checkpoint = path_checkpoint
+        self.path_state = path_checkpoint / "state.pkl"
+        self.checkpoint = Checkpoint(model=model, optimizer=optimizer)
+        self.nb_saves = 0
+
+    def exists(self):
+        """
+        Says if there is a checkpoint to restore.
+        """
+        return self.path_state.exists()
+
+    def save(self, state):
+        """
+        Save the variables and the state of the training loop.
+
+        Args:
+            state (dictionary): the state of the training loop, it has to be picklable.
+        """
+        self.path_checkpoint.mkdir(parents=True, exist_ok=True)
+
+        # Alternate between two prefixes, so that the variables of the previous checkpoint are kept until the state is written
+        self.nb_saves += 1
+        prefix_variables = self.checkpoint.write(str(self.path_checkpoint / "variables_{}".format(self.nb_saves % 2)))
+
+        path_tmp = self.path_checkpoint / "state.pkl.tmp"
+        with open(path_tmp, "wb") as file:
+            pickle.dump(dict(state, prefix_variables=prefix_variables, nb_saves=self.nb_saves), file)
+        os.replace(path_tmp, self.path_state)
+
+    def restore(self):
+        """
+        Restore the variables and read the state of the training loop.
+        The variables that are not created yet, like the slots of the optimizer, are restored when they are created.
+
+        Returns:
+            (dictionary): the state of the training loop.
+        """
+        with open(self.path_state, "rb") as file:
+            state = pickle.load(file)
+
+        self.checkpoint.read(state["prefix_variables"])
+        self.nb_saves = state["nb_saves"]
+
+        return state
+
+    def remove(self):
+        """
+        Delete the checkpoint.
+        """
+        if self.path_checkpoint.exists():
+            shutil.rmtree(self.path_checkpoint)
+
+
+if __name__ == "__main__":
+    from tensorflow.keras.optimizers import Adam
+    from src.d4_modelling_neural.zoom_model import ZoomModel
+
+    MODEL = ZoomModel(True)
+    MODEL.build((None, 108, 30, 3))
+    CHECKPOINT = TrainingCheckpoint(Path("../../data/4_models_weights/tries/checkpoint_try"), MODEL, Adam())
+
+    CHECKPOINT.save({"epoch": 0, "idx_batch": 10})
+    print("Restored state", CHECKPOINT.restore())
+    CHECKPOINT.remove()
@@ -0,0 +1,161 @@
+"""
+This module evaluates a ZoomModel or a ZoomModelDeep on whole lanes, as a fully-convolutional network.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# For the computations
+from tensorflow import nn, reshape, tensordot, convert_to_tensor, float32
+from tensorflow.python.keras.layers import (
+    Dense,
+    Conv2D,
+    Flatten,
+    MaxPooling2D,
+    BatchNormalization,
+    ReLU
+)
+
+# To have the limits of the sub-images
+from src.d5_model_evaluation.slice_lane.image_magnifier.lane_iterator import LaneIterator, get_limits_lanes
+
+
+def dense_call(model, lanes, window_size):
+    """
+    Computes the outputs of the model for the windows starting at every column of the lanes.
+    The strides along the width are replaced by dilations, so that each layer is computed once per column.
+    The dense layers become convolutions which kernel is the size of the last features of a window.
+    The outputs are the same as the ones of the model on each window.
+
+    Args:
+        model (ZoomModel or ZoomModelDeep): the built model.
+
+        lanes (array of 4 dimensions): the list of LANES.
+
+        window_size (integer): the width of the sub-images the model was trained on.
+
+    Returns:
+        (array of 3 dimensions): the outputs. (lanes, column of the beginning of the window, 3)
+    """
+    x = convert_to_tensor(lanes, dtype=float32)
+    # Distance between two consecutive features of the same window along the width
+    dilation = 1
+    flattened = False
+
+    for layer in model.layers:
+        if isinstance(layer, Conv2D):
+            x = nn.convolution(x, layer.kernel, padding="VALID", dilations=(1, dilation)) + layer.bias
+            x = x[:, :: layer.strides[0]]
+            dilation *= layer.strides[1]
+
+        elif isinstance(layer, MaxPooling2D):
+            x = nn.pool(x, layer.pool_size, "MAX", padding="VALID", dilations=(1, dilation))
+            x = x[:, :: layer.strides[0]]
+            dilation *= layer.strides[1]
+
+        elif isinstance(layer, BatchNormalization):
+            x = layer(x, training=False)
+
+        elif isinstance(layer, ReLU):
+            x = layer(x)
+
+        elif isinstance(layer, Flatten):
+            flattened = True
+
+        elif isinstance(layer, Dense):
+            # The first dense layer sees all the features of a window
+            if flattened:
+                (height, channels) = (x.shape[1], x.shape[3])
+                kernel = reshape(layer.kernel, (height, -1, channels, layer.units))
+                x = nn.convolution(x, kernel, padding="VALID", dilations=(1, dilation))
+                flattened = False
+            else:
+                x = tensordot(x, layer.kernel, axes=1)
+            x = layer.activation(x + layer.bias)
+
+    return x.numpy()[:, 0, : lanes.shape[2] - window_size + 1]
+
+
+def get_horizontal_stride(model):
+    """
+    Computes the number of columns between two consecutive features of a window at the end of the convolutions.
+
+    Args:
+        model (ZoomModel or ZoomModelDeep): the model.
+
+    Returns:
+        (integer): the product of the strides along the width.
+    """
+    return int(np.prod([layer.strides[1] for layer in model.layers if isinstance(layer, (Conv2D, MaxPooling2D))]))
+
+
+def predict_lanes(model, lanes, window_size, recovery, left_columns, right_columns):
+    """
+    Compute the predictions of the model on the sub-images of crops of several lanes, in one call.
+    The crops, which widths can differ, are put one after the other in a single lane,
+    so that the outputs of the windows across two crops are never computed.
+    When the sub-images are closer than the stride of the model, the model is run with dense_call,
+    otherwise the sub-images are gathered and run as one batch.
+
+    Args:
+        model (ZoomModel or ZoomModelDeep): the built model.
+
+        lanes (array of 4 dimensions): the list of LANES.
+
+        window_size (integer): the width of the sub-images.
+
+        recovery (integer): the number of pixels to be taken twice per sub-image.
+
+        left_columns (array of integers): the first column of the crop of each lane.
+
+        right_columns (array of integers): the column after the crop of each lane.
+
+    Returns:
+        (array of 3 dimensions): the predictions, the sub-images after the last one of a crop are predicted without head.
+            (lanes, sub-images, 3)
+
+        (array of 2 dimensions): the beginning limits of the sub-images in their crop. (lanes, sub-images)
+    """
+    crop_widths = right_columns - left_columns
+    (begin_limits, nb_sub_images) = get_limits_lanes(crop_widths, window_size, recovery)
+    is_sub_image = np.arange(begin_limits.shape[1]) < nb_sub_images[:, np.newaxis]
+
+    # Put the crops one after the other
+    offsets = np.cumsum(crop_widths) - crop_widths
+    idx_lanes = np.repeat(np.arange(len(lanes)), crop_widths)
+    idx_columns = np.arange(np.sum(crop_widths)) + np.repeat(left_columns - offsets, crop_widths)
+    packed_lane = np.moveaxis(lanes[idx_lanes, :, idx_columns], 0, 1)[np.newaxis]
+    packed_limits = (begin_limits + offsets[:, np.newaxis])[is_sub_image]
+
+    predictions = np.zeros(begin_limits.shape + (3,), dtype=np.float32)
+    predictions[~ is_sub_image] = [0, 1, -1]
+
+    if window_size - recovery < get_horizontal_stride(model):
+        predictions[is_sub_image] = dense_call(model, packed_lane, window_size)[0, packed_limits]
+    else:
+        windows = sliding_window_view(packed_lane[0], window_size, axis=1)[:, packed_limits]
+        predictions[is_sub_image] = model(np.moveaxis(windows, (0, 3), (1, 2)).astype(np.float32))
+
+    return predictions, begin_limits
+
+
+def predict_lane(model, lane, window_size, recovery):
+    """
+    Computes the outputs of the model on the sub-images given by slice_lane, without slicing the lane.
+
+    Args:
+        model (ZoomModel or ZoomModelDeep): the built model.
+
+        lane (array of 3 dimensions): the lane.
+
+        window_size (integer): the width of the sub-images.
+
+        recovery (integer): the number of pixels to be taken twice per sub-image.
+
+    Returns:
+        (array of 2 dimensions): the outputs of the sub-images. [is_in_sub_image, is_not_in_sub_image, column]
+
+        (LaneIterator): the lane iterator that enables to have the limits of the sub-images.
+    """
+    predictions = predict_lanes(model, lane[np.newaxis], window_size, recovery, np.array([0]), np.array([lane.shape[1]]))[0][0]
+
+    return predictions, LaneIterator(len(predictions), window_size, recovery, lane.shape[1])
@@ -2,6 +2,8 @@
 This module generate an object that holds the paths to the image
 and the label of these image.
 """
+import os
+from time import time
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -9,11 +11,14 @@ import numpy as np
 # Exceptions
 from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.exception_classes import FindPathDataError, SwimmingWayError
 
+# To read the calibration file
+from src.d0_utils.perspective_correction.calibration import load_calibration
+
 
 def generate_data(paths_label, starting_data_paths=None, starting_calibration_paths=None, take_all=False, lane_number=-1):
     """
-    Produce a list of list of 5 elements : path_to_image, y_head, x_head, swimming_way, video_length.
-    We look in the label and if the image is in the computer, we add it to the list.
+    Produce a structured array with the fields : path, video, lane, frame, y_head, x_head, swimming_way, video_length.
+    We look in the label and if the image is in the computer, we add it to the array.
 
     Args:
         paths_label (List of WindowsPath): the list of paths to the label.
@@ -33,8 +38,8 @@ def generate_data(paths_label, starting_data_paths=None, starting_calibration_pa
             Default value = -1
 
     Returns:
-        full_data (array of 2 dimensions, one line : (WindowsPath, integer, integer, integer, float):
-            list of elements like (path_to_image, y_head, x_head, swimming_way, length_image) for the training.
+        full_data (structured array, one element : (string, string, integer, integer, float, float, float, float)):
+            array of elements like (path_to_image, video_name, lane, frame, y_head, x_head, swimming_way, length_image) for the training.
     """
     if starting_data_paths is None:
         starting_data_paths = Path("../../../data/2_intermediate_top_down_lanes/lanes/tries")
@@ -65,7 +70,7 @@ def generate_data(paths_label, starting_data_paths=None, starting_calibration_pa
         if not paths_calibration[idx_video].exists():
             raise FindPathDataError(paths_calibration[idx_video])
 
-    full_data = []
+    full_data = [get_data_type(0, 0)]
 
     for idx_video in range(nb_videos):
         # Get the label
@@ -81,15 +86,32 @@ def generate_data(paths_label, starting_data_paths=None, starting_calibration_pa
         data = get_full_data(paths_data[idx_video], labels, length_image, take_all)
 
         # Add the data
-        full_data.extend(data)
+        full_data.append(data)
+
+    return np.concatenate(full_data)
+
+
+def get_data_type(length_path, length_video):
+    """
+    Create an empty structured array for the data.
 
-    return np.array(full_data)
+    Args:
+        length_path (integer): the maximal number of characters of the paths.
+
+        length_video (integer): the maximal number of characters of the names of the videos.
+
+    Returns:
+        (structured array): an empty array with the fields of DATA_FIELDS.
+    """
+    return np.zeros(0, dtype=[("path", "U{}".format(length_path)), ("video", "U{}".format(length_video)),
+                              ("lane", int), ("frame", int),
+                              ("y_head", float), ("x_head", float), ("swimming_way", float), ("video_length", float)])
 
 
 def get_full_data(path_data, labels, length_image, take_all):
     """
-    Produce a list of list of 5 elements : path_to_image, y_head, x_head, swimming_way, length_image.
-    We look in the label and if the image is in the computer, we add it to the list.
+    Produce a structured array with the fields : path, video, lane, frame, y_head, x_head, swimming_way, video_length.
+    The folder of the images is listed once and joined with the label.
 
     Args:
         path_data (WindowsPath): path to the image.
@@ -102,24 +124,40 @@ def get_full_data(path_data, labels, length_image, take_all):
             with a positive label is taken.
 
     Returns:
-        full_data (array of 2 dimensions, one line : (WindowsPath, integer, integer, integer, float):
-            list of elements like (path_to_image, y_head, x_head, swimming_way, length_image) for the training.
+        full_data (structured array, one element : (string, string, integer, integer, float, float, float, float)):
+            array of elements like (path_to_image, video_name, lane, frame, y_head, x_head, swimming_way, length_image) for the training.
     """
-    full_data = []
-
     if 'swimming_way' not in labels.columns:
         raise SwimmingWayError(path_data)
 
-    for ((lane, frame), (x_head, y_head, swimming_way)) in labels.iterrows():
-        # Add to the list only if the image has been labeled with a right position
-        if x_head >= 0 or take_all:
-            name_image = "l{}_f{}.jpg".format(lane, str(frame).zfill(4))
-            path_image = path_data / name_image
-            # Add to the list only if the image is in the computer
-            if path_image.exists():
-                full_data.append([path_image, y_head, x_head, swimming_way, length_image])
+    # Keep only the image that have been labeled with a right position
+    if not take_all:
+        labels = labels[labels["x_head"].to_numpy() >= 0]
+
+    # Get the names of the images from the label
+    lanes = labels.index.get_level_values(0).to_numpy().astype(int)
+    frames = labels.index.get_level_values(1).to_numpy().astype(int)
+    names_image = np.char.add(np.char.add(np.char.add("l", lanes.astype(str)), "_f"), np.char.zfill(frames.astype(str), 4))
+    names_image = np.char.add(names_image, ".jpg")
+
+    # Keep only the image that are in the computer
+    with os.scandir(path_data) as entries:
+        names_in_folder = [entry.name for entry in entries]
+    in_folder = np.isin(names_image, names_in_folder)
+
+    # Fill the array
+    paths_image = np.char.add(str(path_data) + os.sep, names_image[in_folder])
+    full_data = np.zeros(len(paths_image), dtype=get_data_type(max(1, paths_image.dtype.itemsize // 4), len(path_data.name)).dtype)
+    full_data["path"] = paths_image
+    full_data["video"] = path_data.name
+    full_data["lane"] = lanes[in_folder]
+    full_data["frame"] = frames[in_folder]
+    full_data["y_head"] = labels["y_head"].to_numpy()[in_folder]
+    full_data["x_head"] = labels["x_head"].to_numpy()[in_folder]
+    full_data["swimming_way"] = labels["swimming_way"].to_numpy()[in_folder]
+    full_data["video_length"] = length_image
 
-    return np.array(full_data)
+    return full_data
 
 
 def get_length_image(path_calibration):
@@ -132,22 +170,32 @@ def get_length_image(path_calibration):
     Returns:
         (float): the length of the video in meters.
     """
-    file = open(path_calibration, 'r')
-    lines = file.readlines()
-    extreme_values = np.fromstring(lines[-1], dtype=float, sep=',')
-
-    return abs(extreme_values[2] - extreme_values[0])
+    return load_calibration(path_calibration).length_video
 
 
 if __name__ == "__main__":
-    PATHS_LABEL = [Path("../../../data/3_processed_positions/tries/vid1_try.csv")]
-                   # Path("../../../data/3_processed_positions/tries/vid1.csv")]
-    try:
-        GENERATOR = generate_data(PATHS_LABEL, take_all=False, lane_number=-1)
+    PATHS_LABEL = sorted(Path("../../../data/3_processed_positions").glob("*.csv"))
+    STARTING_DATA_PATHS = Path("../../../data/2_intermediate_top_down_lanes/lanes")
+    STARTING_CALIBRATION_PATHS = Path("../../../data/2_intermediate_top_down_lanes/calibration")
 
-        print(len(GENERATOR))
+    # Only take the videos that have lanes
+    PATHS_LABEL = [path_label for path_label in PATHS_LABEL if (STARTING_DATA_PATHS / path_label.stem).exists()]
+    try:
+        TIME_START = time()
+        GENERATOR = generate_data(PATHS_LABEL, STARTING_DATA_PATHS, STARTING_CALIBRATION_PATHS, take_all=True, lane_number=-1)
+        TIME_GENERATE = time() - TIME_START
+
+        # Compare with a loop over the rows of the label that checks every image
+        TIME_START = time()
+        NB_IMAGES = 0
+        for PATH_LABEL in PATHS_LABEL:
+            for ((LANE, FRAME), ROW) in pd.read_csv(PATH_LABEL).iterrows():
+                NB_IMAGES += (STARTING_DATA_PATHS / PATH_LABEL.stem / "l{}_f{}.jpg".format(LANE, str(FRAME).zfill(4))).exists()
+        TIME_LOOP = time() - TIME_START
+
+        print("{} images, generate_data : {:.3f} s, loop over the rows : {:.3f} s".format(len(GENERATOR), TIME_GENERATE, TIME_LOOP))
+        print("Same number of images", len(GENERATOR) == NB_IMAGES)
     except FindPathDataError as find_path_data_error:
         print(find_path_data_error.__repr__())
     except SwimmingWayError as swimming_way_error:
         print(swimming_way_error.__repr__())
-
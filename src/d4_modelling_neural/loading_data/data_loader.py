@@ -17,20 +17,20 @@ from tensorflow.keras.utils import Sequence
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
 # To transform the image
-from src.d4_modelling_neural.loading_data.transformations.image_transformations import transform_image
+from src.d4_modelling_neural.loading_data.transformations.image_transformations import transform_image, transform_packed_image
 
 
 class DataLoader(Sequence):
     """
     The class to load the data.
     """
-    def __init__(self, data, batch_size=2, scale=35, dimensions=[108, 1820], standardization=True, augmentation=False, flip=True):
+    def __init__(self, data, batch_size=2, scale=35, dimensions=[108, 1820], standardization=True, augmentation=False, flip=True, packed_lanes=None, seed=None, nb_buffers=0):
         """
         Create the loader.
 
         Args:
-            data (list of 4 : [WindowsPath, integer, integer, integer, float):
-                List of [image_path, x_head, y_head, swimming_way, video_length]
+            data (structured array): the array given by generate_data, with the fields
+                path, video, lane, frame, y_head, x_head, swimming_way, video_length.
                 if swimming_way = 1, the swimmer swims toward the right.
                 if swimming_way = -1, the swimmer swims toward the left.
 
@@ -51,11 +51,24 @@ class DataLoader(Sequence):
 
             flip (boolean): if True, each image where the swimmer is swimming toward the left side is flipped.
                 Default value = True
+
+            packed_lanes (dictionary): associates the name of the video to its PackedLanes.
+                if None, the images are read from the jpg files.
+                Default value = None
+
+            seed (integer): if given, the order of the images and the augmentation of each batch
+                only depend on the seed, the epoch and the index of the batch.
+                Default value = None
+
+            nb_buffers (integer): the number of batches that are allocated once and then reused.
+                The batch idx is written in the buffer idx % nb_buffers, so it is overwritten nb_buffers batches later.
+                if 0, a new batch is allocated each time.
+                Default value = 0
         """
         # The data
-        self.samples = data[:, 0]
-        self.labels = data[:, 1: -1]
-        self.video_length = data[:, -1]
+        self.samples = data["path"]
+        self.labels = np.stack((data["y_head"], data["x_head"], data["swimming_way"]), axis=1)
+        self.video_length = data["video_length"]
 
         # The parameters
         self.batch_size = batch_size
@@ -65,6 +78,41 @@ class DataLoader(Sequence):
         self.augmentation = augmentation
         self.flip = flip
 
+        # The order of the images, it changes at each epoch
+        self.order = np.arange(len(self.samples))
+        self.seed = seed
+        self.epoch = 0
+
+        # The batch where the next iteration starts, to resume an epoch
+        self.start_batch = 0
+
+        # The buffers of the batches : [images, labels, rescaled images]
+        self.nb_buffers = nb_buffers
+        self.buffers = {}
+
+        # The position of each image in the packed lanes
+        self.packed_lanes = packed_lanes
+        if packed_lanes is not None:
+            self.get_packed_index(data)
+
+    def get_packed_index(self, data):
+        """
+        Find the position of each image in the packed lanes of its video.
+
+        Args:
+            data (structured array): the array given by generate_data.
+        """
+        self.packed_videos = data["video"]
+        self.packed_index = np.zeros((len(self.samples), 2), dtype=int)
+
+        for name_video in np.unique(self.packed_videos):
+            if name_video not in self.packed_lanes:
+                raise FindPathDataError(name_video)
+
+            is_video = self.packed_videos == name_video
+            (idx_lanes, idx_frames) = self.packed_lanes[name_video].get_index(data["lane"][is_video], data["frame"][is_video])
+            self.packed_index[is_video] = np.stack((idx_lanes, idx_frames), axis=1)
+
     def __len__(self):
         """
         Returns the length of the object, i.e. the number of batches.
@@ -78,21 +126,95 @@ class DataLoader(Sequence):
         Args:
             idx (integer): the wanted index.
 
+        Returns:
+            (array, 4 dimensions): list of images.
+
+            (array, 3 dimensions): list of the labels linked to the images.
+        """
+        return self.get_batch(self.order[idx * self.batch_size: (idx + 1) * self.batch_size], self.get_random_generator(idx), idx)
+
+    def __iter__(self):
+        """
+        Yield the batches one by one, from start_batch. The next iteration starts from the first batch.
+        """
+        (start_batch, self.start_batch) = (self.start_batch, 0)
+        for idx in range(start_batch, len(self)):
+            yield self[idx]
+
+    def get_buffers(self, idx, length_batch):
+        """
+        Get the arrays where the batch is written.
+
+        Args:
+            idx (integer): the index of the batch.
+
+            length_batch (integer): the number of images in the batch.
+
+        Returns:
+            (array, 4 dimensions, float32): the images.
+
+            (array, 2 dimensions, float32): the labels.
+
+            (array, 3 dimensions, uint8): the rescaled image before its conversion to float32.
+        """
+        if self.nb_buffers == 0 or idx is None:
+            return (np.empty((length_batch, self.dimensions[0], self.dimensions[1], 3), dtype=np.float32),
+                    np.empty((length_batch, 2), dtype=np.float32),
+                    np.empty((self.dimensions[0], self.dimensions[1], 3), dtype=np.uint8))
+
+        # Allocate the buffer the first time it is used
+        idx_buffer = idx % self.nb_buffers
+        if idx_buffer not in self.buffers:
+            self.buffers[idx_buffer] = (np.empty((self.batch_size, self.dimensions[0], self.dimensions[1], 3), dtype=np.float32),
+                                        np.empty((self.batch_size, 2), dtype=np.float32),
+                                        np.empty((self.dimensions[0], self.dimensions[1], 3), dtype=np.uint8))
+        (batch_img, batch_labs, rescaled_buffer) = self.buffers[idx_buffer]
+
+        # The last batch can be smaller
+        return batch_img[: length_batch], batch_labs[: length_batch], rescaled_buffer
+
+    def get_random_generator(self, idx):
+        """
+        Get the generator of the random numbers of the augmentation of a batch.
+
+        Args:
+            idx (integer): the index of the batch.
+
+        Returns:
+            (Generator): numpy.random if there is no seed, otherwise a generator seeded by the seed, the epoch and the index.
+        """
+        if self.seed is None:
+            return np.random
+
+        return np.random.default_rng([self.seed, self.epoch, idx])
+
+    def get_batch(self, indexes, random_generator, idx=None):
+        """
+        Load the images at the given indexes.
+
+        Args:
+            indexes (array of integers): the indexes of the images.
+
+            random_generator (Generator): the generator of the random numbers of the augmentation.
+
+            idx (integer): the index of the batch, to choose its buffer. if None, the batch is allocated.
+                Default value = None
+
         Returns:
             (array, 4 dimensions): list of images.
 
             (array, 3 dimensions): list of the labels linked to the images.
         """
         # Get the paths, the LABELS and the lengths of the videos
-        batch_path = self.samples[idx * self.batch_size: (idx + 1) * self.batch_size]
-        batch_labels = self.labels[idx * self.batch_size: (idx + 1) * self.batch_size].astype(float)
-        batch_video_length = self.video_length[idx * self.batch_size: (idx + 1) * self.batch_size]
+        batch_path = self.samples[indexes]
+        batch_labels = self.labels[indexes]
+        batch_video_length = self.video_length[indexes]
 
         # Get the specific size of the batch
         length_batch = len(batch_path)
 
-        batch_img = []
-        batch_labs = []
+        # The images are written directly in the batch
+        (batch_img, batch_labs, rescaled_buffer) = self.get_buffers(idx, length_batch)
 
         for idx_img in range(length_batch):
             # Get the information
@@ -101,24 +223,28 @@ class DataLoader(Sequence):
             video_length = batch_video_length[idx_img]
 
             # Get the image and transform it
-            (trans_image, trans_label) = transform_image(image_path, label, self.scale, video_length, self.dimensions, self.standardization, self.augmentation, self.flip)
+            if self.packed_lanes is None:
+                trans_label = transform_image(image_path, label, self.scale, video_length, self.dimensions,
+                                              self.standardization, self.augmentation, self.flip, random_generator, batch_img[idx_img], rescaled_buffer)[1]
+            else:
+                packed_lanes = self.packed_lanes[self.packed_videos[indexes[idx_img]]]
+                (idx_lane, idx_frame) = self.packed_index[indexes[idx_img]]
+                trans_label = transform_packed_image(packed_lanes, idx_lane, idx_frame, label,
+                                                     self.standardization, self.augmentation, self.flip, random_generator, batch_img[idx_img])[1]
 
-            # Fill the lists
-            batch_img.append(trans_image)
-            batch_labs.append(trans_label)
+            batch_labs[idx_img] = trans_label
 
-        return np.array(batch_img, dtype=np.float32), np.array(batch_labs, dtype=np.float32)
+        return batch_img, batch_labs
 
     def on_epoch_end(self):
         """
         Shuffle the data set.
         """
-        full_data = list(zip(self.samples, self.labels, self.video_length))
-        rd.shuffle(full_data)
-        (self.samples, self.labels, self.video_length) = zip(*full_data)
-        self.samples = np.array(self.samples)
-        self.labels = np.array(self.labels)
-        self.video_length = np.array(self.video_length)
+        self.epoch += 1
+        if self.seed is None:
+            rd.shuffle(self.order)
+        else:
+            self.order = np.random.default_rng([self.seed, self.epoch]).permutation(len(self.samples))
 
 
 if __name__ == "__main__":
@@ -135,9 +261,9 @@ if __name__ == "__main__":
 
         for (IDX, (BATCH, LABELS)) in enumerate(TRAIN_SET):
             # Print the name of the image
-            print(TRAIN_SET.samples[IDX])
-            print(TRAIN_SET.labels[IDX])
-            print(TRAIN_SET.video_length[IDX])
+            print(TRAIN_SET.samples[TRAIN_SET.order[IDX]])
+            print(TRAIN_SET.labels[TRAIN_SET.order[IDX]])
+            print(TRAIN_SET.video_length[TRAIN_SET.order[IDX]])
 
             # Get the image
             image = BATCH[0]
@@ -0,0 +1,315 @@
+"""
+This module packs the lanes of a video in a single memory-mapped array.
+The lanes are rescaled and padded once, so the images do not have to be decoded at each epoch.
+
+The array is saved in <name_video>.npy and has the shape (lanes, frames, vertical, horizontal, 3).
+The index is saved in <name_video>.npz.
+"""
+import os
+from time import time
+from pathlib import Path
+import numpy as np
+import cv2
+
+# Exceptions
+from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.exception_classes import FindPathDataError, PaddingError, PackingError
+from src.d0_utils.store_load_data.exceptions.exception_classes import AlreadyExistError
+
+# To get the length of the video
+from src.d4_modelling_neural.loading_data.data_generator import get_length_image
+
+
+def get_lane_frame(name_image):
+    """
+    Get the lane and the frame from the name of an image.
+
+    Args:
+        name_image (string): the name of the image, like l{lane}_f{frame}.jpg
+
+    Returns:
+        (integer): the lane.
+
+        (integer): the frame.
+    """
+    idx_separator = name_image.index("_f")
+
+    return int(name_image[1: idx_separator]), int(name_image[idx_separator + 2: -4])
+
+
+def pack_lanes(path_lanes, path_calibration, scale, dimensions, destination):
+    """
+    Rescale, pad and save all the lanes of a video in a memory-mapped array.
+    The frames that are not in the folder are filled with black pixels.
+
+    Args:
+        path_lanes (WindowsPath): the path to the folder of the lanes of the video.
+
+        path_calibration (WindowsPath): the path to the calibration file of the video.
+
+        scale (integer): the number of pixel per meters.
+
+        dimensions (list of 2 integers): the final dimensions of the image. [vertical, horizontal]
+
+        destination (WindowsPath): the folder where the array and the index are saved.
+
+    Returns:
+        (WindowsPath): the path to the array.
+    """
+    # Verify that the paths exists
+    for path in [path_lanes, path_calibration, destination]:
+        if not path.exists():
+            raise FindPathDataError(path)
+
+    name_video = path_lanes.parts[-1]
+    path_packed = destination / "{}.npy".format(name_video)
+    if path_packed.exists():
+        raise AlreadyExistError(path_packed)
+
+    # List the images once
+    names_image = [name for name in os.listdir(path_lanes) if name.endswith(".jpg")]
+    if len(names_image) == 0:
+        raise FindPathDataError(path_lanes / "l1_f0000.jpg")
+    lanes_frames = np.array([get_lane_frame(name_image) for name_image in names_image])
+
+    lanes = np.unique(lanes_frames[:, 0])
+    frames = np.arange(np.min(lanes_frames[:, 1]), np.max(lanes_frames[:, 1]) + 1)
+
+    # The dimensions of the rescaled image, as in rescale
+    original_dimensions = cv2.imread(str(path_lanes / names_image[0])).shape[: 2]
+    video_length = get_length_image(path_calibration)
+    rescaled_dimensions = [dimensions[0], int(scale * video_length)]
+
+    # The position of the rescaled image in the padded image, as in pad
+    vertic_pad = dimensions[0] - rescaled_dimensions[0]
+    horiz_pad = dimensions[1] - rescaled_dimensions[1]
+    if vertic_pad < 0 or horiz_pad < 0:
+        raise PaddingError(rescaled_dimensions, dimensions)
+    window = np.array([vertic_pad // 2, horiz_pad // 2, rescaled_dimensions[0], rescaled_dimensions[1]])
+
+    # The padding is already filled with zeros
+    packed = np.lib.format.open_memmap(path_packed, mode="w+", dtype=np.uint8, shape=(len(lanes), len(frames), dimensions[0], dimensions[1], 3))
+    exists = np.zeros((len(lanes), len(frames)), dtype=bool)
+
+    time_start = time()
+    for (name_image, (lane, frame)) in zip(names_image, lanes_frames):
+        (idx_lane, idx_frame) = (np.searchsorted(lanes, lane), frame - frames[0])
+
+        # Rescale the image directly in the array
+        image = cv2.imread(str(path_lanes / name_image))
+        packed[idx_lane, idx_frame, window[0]: window[0] + window[2], window[1]: window[1] + window[3]] = cv2.resize(image, (window[3], window[2]))
+        exists[idx_lane, idx_frame] = True
+
+    packed.flush()
+    del packed
+
+    # Save the index
+    np.savez(destination / "{}.npz".format(name_video), lanes=lanes, frames=frames, exists=exists, scale=scale, dimensions=dimensions,
+             original_dimensions=original_dimensions, video_length=video_length, window=window)
+    print("{} images have been packed in {:.1f} seconds.".format(len(names_image), time() - time_start))
+
+    return path_packed
+
+
+class PackedLanes:
+    """
+    The class that reads the lanes packed by pack_lanes.
+    The images are views of the memory-mapped array, nothing is read before they are used.
+    """
+    def __init__(self, path_packed):
+        """
+        Open the array and read the index.
+
+        Args:
+            path_packed (WindowsPath): the path to the array.
+        """
+        path_index = path_packed.parent / "{}.npz".format(path_packed.stem)
+        for path in [path_packed, path_index]:
+            if not path.exists():
+                raise FindPathDataError(path)
+
+        self.path_packed = path_packed
+        self.images = np.load(path_packed, mmap_mode="r")
+
+        index = np.load(path_index)
+        self.lanes = index["lanes"]
+        self.frames = index["frames"]
+        self.exists = index["exists"]
+        self.scale = int(index["scale"])
+        self.dimensions = list(index["dimensions"])
+        self.original_dimensions = list(index["original_dimensions"])
+        self.video_length = float(index["video_length"])
+        # [vertical position, horizontal position, vertical dimension, horizontal dimension] of the rescaled image
+        self.window = index["window"]
+
+    def __getstate__(self):
+        """
+        Do not copy the array when the object is sent to another process, it is opened again.
+        """
+        state = self.__dict__.copy()
+        del state["images"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.images = np.load(self.path_packed, mmap_mode="r")
+
+    def check(self, scale, dimensions):
+        """
+        Verify that the lanes have been packed with the scale and the dimensions.
+
+        Args:
+            scale (integer): the number of pixel per meters.
+
+            dimensions (list of 2 integers): the final dimensions of the image. [vertical, horizontal]
+        """
+        if scale != self.scale or list(dimensions) != self.dimensions:
+            raise PackingError(self.path_packed, scale, dimensions)
+
+    def get_index(self, lanes, frames):
+        """
+        Get the position of the images in the array.
+
+        Args:
+            lanes (array of integers): the lanes.
+
+            frames (array of integers): the frames.
+
+        Returns:
+            (array of integers): the positions on the first axis.
+
+            (array of integers): the positions on the second axis.
+        """
+        idx_lanes = np.searchsorted(self.lanes, lanes)
+        idx_frames = np.asarray(frames) - self.frames[0]
+
+        # Verify that the images have been packed
+        for (idx_lane, idx_frame, lane, frame) in zip(idx_lanes, idx_frames, lanes, frames):
+            if idx_lane >= len(self.lanes) or self.lanes[idx_lane] != lane or not 0 <= idx_frame < len(self.frames) or not self.exists[idx_lane, idx_frame]:
+                raise FindPathDataError("{} : l{}_f{}".format(self.path_packed, lane, str(frame).zfill(4)))
+
+        return idx_lanes, idx_frames
+
+    def get_image(self, idx_lane, idx_frame):
+        """
+        Get a rescaled and padded image without copying it.
+
+        Args:
+            idx_lane (integer): the position on the first axis.
+
+            idx_frame (integer): the position on the second axis.
+
+        Returns:
+            (array of 3 dimensions, uint8): the read-only view of the image.
+        """
+        return self.images[idx_lane, idx_frame]
+
+    def transform_label(self, label, flip):
+        """
+        Transform the label of the original image like rescale and pad do.
+
+        Args:
+            label (List of 2 float): the position of the head in pixels in the original image. [vertical, horizontal]
+
+            flip (boolean): if True, the image is flipped.
+
+        Returns:
+            (array of 2 integers): the position of the head in pixels in the packed image. [vertical, horizontal]
+        """
+        pos_label = np.array(label, dtype=float)
+        if flip:
+            pos_label[1] = self.original_dimensions[1] - pos_label[1]
+
+        rescaled_label = pos_label.copy()
+        rescaled_label[0] = int(np.floor(pos_label[0] * self.window[2] / self.original_dimensions[0]))
+        rescaled_label[1] = int(np.floor(pos_label[1] * self.window[3] / self.original_dimensions[1]))
+
+        return rescaled_label + self.window[: 2]
+
+
+def load_packed_lanes(path_packed_directory, names_video, scale, dimensions):
+    """
+    Open the packed lanes of several videos.
+
+    Args:
+        path_packed_directory (WindowsPath): the folder where the arrays are saved.
+
+        names_video (list of string): the names of the videos.
+
+        scale (integer): the number of pixel per meters.
+
+        dimensions (list of 2 integers): the final dimensions of the image. [vertical, horizontal]
+
+    Returns:
+        (dictionary): associates the name of the video to its PackedLanes.
+    """
+    packed_lanes = {}
+    for name_video in names_video:
+        packed_lanes[name_video] = PackedLanes(path_packed_directory / "{}.npy".format(name_video))
+        packed_lanes[name_video].check(scale, dimensions)
+
+    return packed_lanes
+
+
+def get_packed_lanes(names_video, path_lanes_directory, path_calibration_directory, scale, dimensions, destination):
+    """
+    Pack the lanes of the videos that have not been packed yet, then open the packed lanes of all the videos.
+
+    Args:
+        names_video (list of string): the names of the videos.
+
+        path_lanes_directory (WindowsPath): the folder that contains the folder of the lanes of each video.
+
+        path_calibration_directory (WindowsPath): the folder that contains the calibration file of each video.
+
+        scale (integer): the number of pixel per meters.
+
+        dimensions (list of 2 integers): the final dimensions of the image. [vertical, horizontal]
+
+        destination (WindowsPath): the folder where the arrays are saved.
+
+    Returns:
+        (dictionary): associates the name of the video to its PackedLanes.
+    """
+    for name_video in names_video:
+        if not (destination / "{}.npy".format(name_video)).exists():
+            pack_lanes(path_lanes_directory / name_video, path_calibration_directory / "{}.txt".format(name_video), scale, dimensions, destination)
+
+    return load_packed_lanes(destination, names_video, scale, dimensions)
+
+
+if __name__ == "__main__":
+    PATH_LANES = Path("../../../data/2_intermediate_top_down_lanes/lanes/tries/vid0")
+    PATH_CALIBRATION = Path("../../../data/2_intermediate_top_down_lanes/calibration/tries/vid0.txt")
+    DESTINATION = Path("../../../data/2_intermediate_top_down_lanes/packed/tries")
+    SCALE = 35
+    DIMENSIONS = [108, 1820]
+
+    try:
+        PATH_PACKED = pack_lanes(PATH_LANES, PATH_CALIBRATION, SCALE, DIMENSIONS, DESTINATION)
+    except AlreadyExistError as exist_error:
+        print(exist_error.__repr__())
+        PATH_PACKED = DESTINATION / "vid0.npy"
+
+    try:
+        PACKED_LANES = PackedLanes(PATH_PACKED)
+        (IDX_LANES, IDX_FRAMES) = np.nonzero(PACKED_LANES.exists)
+        print("Shape of the packed lanes", PACKED_LANES.images.shape)
+
+        # Compare the reading of the packed lanes with the decoding of the images
+        TIME_START = time()
+        for (IDX_LANE, IDX_FRAME) in zip(IDX_LANES, IDX_FRAMES):
+            IMAGE = np.array(PACKED_LANES.get_image(IDX_LANE, IDX_FRAME), dtype=np.float32)
+        TIME_PACKED = time() - TIME_START
+
+        TIME_START = time()
+        for (IDX_LANE, IDX_FRAME) in zip(IDX_LANES, IDX_FRAMES):
+            NAME_IMAGE = "l{}_f{}.jpg".format(PACKED_LANES.lanes[IDX_LANE], str(PACKED_LANES.frames[IDX_FRAME]).zfill(4))
+            IMAGE = cv2.resize(cv2.imread(str(PATH_LANES / NAME_IMAGE)).astype(np.float32), (PACKED_LANES.window[3], PACKED_LANES.window[2]))
+        TIME_JPG = time() - TIME_START
+
+        print("{} images, packed : {:.2f} ms per image, jpg : {:.2f} ms per image".format(
+            len(IDX_LANES), 1000 * TIME_PACKED / len(IDX_LANES), 1000 * TIME_JPG / len(IDX_LANES)))
+    except FindPathDataError as find_path_data_error:
+        print(find_path_data_error.__repr__())
+    except PaddingError as padding_error:
+        print(padding_error.__repr__())
@@ -0,0 +1,205 @@
+"""
+This module loads the batches of a DataLoader in the background while the model is trained.
+"""
+from pathlib import Path
+from time import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+
+# Exceptions
+from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.exception_classes import FindPathDataError, PaddingError, SwimmingWayError
+
+# To generate and load the data
+from src.d4_modelling_neural.loading_data.data_generator import generate_data
+from src.d4_modelling_neural.loading_data.data_loader import DataLoader
+
+
+# The loader of each process
+PROCESS_LOADER = None
+
+
+def set_process_loader(data_loader):
+    """
+    Give the loader to a process of the pool.
+
+    Args:
+        data_loader (DataLoader): the loader.
+    """
+    global PROCESS_LOADER
+    PROCESS_LOADER = data_loader
+
+    # The processes must not share the state of numpy.random
+    np.random.seed()
+
+
+def get_process_batch(indexes, epoch, idx):
+    """
+    Load a batch in a process of the pool.
+
+    Args:
+        indexes (array of integers): the indexes of the images.
+
+        epoch (integer): the epoch of the loader.
+
+        idx (integer): the index of the batch.
+
+    Returns:
+        (array, 4 dimensions): list of images.
+
+        (array, 3 dimensions): list of the labels linked to the images.
+    """
+    PROCESS_LOADER.epoch = epoch
+    return PROCESS_LOADER.get_batch(indexes, PROCESS_LOADER.get_random_generator(idx), idx)
+
+
+class PrefetchLoader:
+    """
+    The class that loads the batches of a DataLoader with several workers.
+    The batches are given in the same order as the DataLoader.
+    """
+    def __init__(self, data_loader, nb_workers=2, queue_size=4, use_processes=False):
+        """
+        Create the workers.
+
+        Args:
+            data_loader (DataLoader): the loader of the batches.
+
+            nb_workers (integer): the number of workers.
+                Default value = 2
+
+            queue_size (integer): the maximal number of batches that are loaded in advance.
+                Default value = 4
+
+            use_processes (boolean): if True, the workers are processes, otherwise they are threads.
+                Default value = False
+        """
+        self.data_loader = data_loader
+        self.queue_size = max(1, queue_size)
+        self.use_processes = use_processes
+
+        # The batches that are loaded and the one that is used must not share their buffers.
+        # The processes send a copy of the batch, one buffer is enough.
+        if data_loader.nb_buffers > 0:
+            data_loader.nb_buffers = 1 if use_processes else max(data_loader.nb_buffers, self.queue_size + 2)
+
+        if use_processes:
+            self.executor = ProcessPoolExecutor(nb_workers, initializer=set_process_loader, initargs=(data_loader,))
+        else:
+            self.executor = ThreadPoolExecutor(nb_workers)
+        self.futures = []
+
+        # The time spent waiting for the batches
+        self.stall_time = 0
+        self.stall_times = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """
+        Returns the number of batches.
+        """
+        return len(self.data_loader)
+
+    def submit(self, idx):
+        """
+        Start the loading of a batch.
+
+        Args:
+            idx (integer): the index of the batch.
+
+        Returns:
+            (Future): the future batch.
+        """
+        if self.use_processes:
+            batch_size = self.data_loader.batch_size
+            indexes = self.data_loader.order[idx * batch_size: (idx + 1) * batch_size]
+            return self.executor.submit(get_process_batch, indexes, self.data_loader.epoch, idx)
+
+        return self.executor.submit(self.data_loader.__getitem__, idx)
+
+    def __iter__(self):
+        """
+        Yield the batches one by one, from the start_batch of the DataLoader.
+
+        Returns:
+            (array, 4 dimensions): list of images.
+
+            (array, 3 dimensions): list of the labels linked to the images.
+        """
+        nb_batches = len(self)
+        (start_batch, self.data_loader.start_batch) = (self.data_loader.start_batch, 0)
+        self.futures = [self.submit(idx) for idx in range(start_batch, min(start_batch + self.queue_size, nb_batches))]
+
+        for idx in range(start_batch, nb_batches):
+            # Keep the queue full
+            if idx + self.queue_size < nb_batches:
+                self.futures.append(self.submit(idx + self.queue_size))
+
+            time_start = time()
+            batch = self.futures.pop(0).result()
+            self.stall_time += time() - time_start
+
+            yield batch
+
+        # Register the stall time of the epoch
+        print("Time spent waiting for the batches : {:.2f} s".format(self.stall_time))
+        self.stall_times.append(self.stall_time)
+        self.stall_time = 0
+
+    def on_epoch_end(self):
+        """
+        Cancel the batches that have not been used and shuffle the data set.
+        """
+        self.cancel()
+        self.stall_time = 0
+        self.data_loader.on_epoch_end()
+
+    def cancel(self):
+        """
+        Cancel the batches that are not needed anymore.
+        """
+        for future in self.futures:
+            future.cancel()
+        for future in self.futures:
+            if not future.cancelled():
+                future.exception()
+        self.futures = []
+
+    def close(self):
+        """
+        Stop the workers.
+        """
+        self.cancel()
+        self.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    PATHS_LABEL = [Path("../../../data/3_processed_positions/tries/vid0.csv"),
+                   Path("../../../data/3_processed_positions/tries/vid1.csv")]
+
+    try:
+        TRAIN_DATA = generate_data(PATHS_LABEL, take_all=False)
+        TRAIN_SET = DataLoader(TRAIN_DATA, scale=35, batch_size=12, augmentation=True, seed=0)
+
+        # Compare the loading with and without workers
+        for NB_WORKERS in [0, 2, 4]:
+            TIME_START = time()
+            if NB_WORKERS == 0:
+                for (IDX, (BATCH, LABELS)) in enumerate(TRAIN_SET):
+                    pass
+            else:
+                with PrefetchLoader(TRAIN_SET, nb_workers=NB_WORKERS) as PREFETCH_SET:
+                    for (IDX, (BATCH, LABELS)) in enumerate(PREFETCH_SET):
+                        pass
+            print("{} workers : {:.2f} s per epoch".format(NB_WORKERS, time() - TIME_START))
+
+    except FindPathDataError as find_path_data_error:
+        print(find_path_data_error.__repr__())
+    except PaddingError as padding_error:
+        print(padding_error.__repr__())
+    except SwimmingWayError as swimming_way_error:
+        print(swimming_way_error.__repr__())
@@ -1,9 +1,12 @@
 """
 This module transform the image.
 It standardizes, rescales and fills with black the image with its label.
+The image stays in uint8 until it is written in a float32 buffer by fill.
 """
 from pathlib import Path
+from time import time
 import numpy as np
+import numpy.random as rd
 import cv2
 
 # Exceptions
@@ -22,12 +25,16 @@ from src.d4_modelling_neural.loading_data.transformations.tools.standardize impo
 from src.d4_modelling_neural.loading_data.transformations.tools.rescale import rescale
 
 # To pad the image
-from src.d4_modelling_neural.loading_data.transformations.tools.pad import pad
+from src.d4_modelling_neural.loading_data.transformations.tools.pad import pad, get_padding
 
+# To augment, standardize and pad the image in a buffer
+from src.d4_modelling_neural.loading_data.transformations.tools.fill import fill
 
-def transform_image(image_path, label, scale, video_length, dimensions, standardization, augmentation, flip):
+
+def transform_image(image_path, label, scale, video_length, dimensions, standardization, augmentation, flip, random_generator=rd, destination=None,
+                    rescaled_buffer=None):
     """
-    Transform the image by augmenting, standardizing, rescaling, padding the image and its label.
+    Transform the image by rescaling, augmenting, standardizing, padding the image and its label.
 
     Args:
         image_path (WindowsPath): path that leads to the image.
@@ -46,32 +53,92 @@ def transform_image(image_path, label, scale, video_length, dimensions, standard
 
         flip (boolean): flip the image if the swimmer goes to the left, if flip = True.
 
+        random_generator (Generator): the generator of the random numbers of the augmentation.
+            Default value = numpy.random
+
+        destination (array of 3 dimensions, float32): if given, the image is written in it.
+            Default value = None
+
+        rescaled_buffer (array of 3 dimensions, uint8): if given, the image is rescaled in it.
+            It has the final dimensions, the rescaled image is written where it will be in the padded image.
+            Default value = None
+
     Returns:
-        (array): the image that have been standardized, rescaled and padded.
+        (array, float32): the image that have been standardized, rescaled and padded.
 
         (list of 2 integers): the position of the head in pixels. [vertical, horizontal]
     """
+    if destination is None:
+        destination = np.empty((dimensions[0], dimensions[1], 3), dtype=np.float32)
+    if rescaled_buffer is None:
+        rescaled_buffer = np.empty((dimensions[0], dimensions[1], 3), dtype=np.uint8)
+
     # Load the image and define the position label
-    image = cv2.imread(str(image_path)).astype(np.float)
+    image = cv2.imread(str(image_path))
     pos_label = label[:-1]
 
     # Flip the image if flip = True and if it has to be flipped.
     if flip and label[-1] == -1:
         flip_image(image, pos_label)
 
-    # Augment the image
-    if augmentation:
-        augment(image)
+    # Rescale the image where it will be in the padded image, the vertical dimension is not padded
+    rescaled_width = int(scale * video_length)
+    left = get_padding([dimensions[0], rescaled_width], dimensions)[1]
+    (image, rescaled_label) = rescale(image, scale, video_length, pos_label, dimensions[0], rescaled_buffer[:, left: left + rescaled_width])
+
+    # Augment, standardize and pad the image
+    padding = fill(image, destination, augmentation, standardization, random_generator)
+
+    return destination, rescaled_label + padding
+
+
+def transform_packed_image(packed_lanes, idx_lane, idx_frame, label, standardization, augmentation, flip, random_generator=rd, destination=None):
+    """
+    Transform an image that has already been rescaled and padded by pack_lanes.
+    Only the rescaled part of the image is flipped, augmented and standardized, the padding stays black.
+
+    Args:
+        packed_lanes (PackedLanes): the packed lanes of the video.
+
+        idx_lane (integer): the position of the lane in the packed lanes.
+
+        idx_frame (integer): the position of the frame in the packed lanes.
+
+        label (List of 3 float): the position of the head in pixels. [vertical, horizontal, swimming_way]
+
+        standardization (boolean): standardize the lane, if standardization = True.
+
+        augmentation (boolean): augment the lane, if augmentation = True.
+
+        flip (boolean): flip the image if the swimmer goes to the left, if flip = True.
+
+        random_generator (Generator): the generator of the random numbers of the augmentation.
+            Default value = numpy.random
+
+        destination (array of 3 dimensions, float32): if given, the image is written in it.
+            Default value = None
 
-    # Standardize the image
-    if standardization:
-        standardize(image)
+    Returns:
+        (array, float32): the image that have been standardized, rescaled and padded.
+
+        (list of 2 integers): the position of the head in pixels. [vertical, horizontal]
+    """
+    if destination is None:
+        destination = np.empty((packed_lanes.dimensions[0], packed_lanes.dimensions[1], 3), dtype=np.float32)
 
-    # Rescale the image
-    (image, rescaled_label) = rescale(image, scale, video_length, pos_label, dimensions[0])
+    # View of the rescaled image in the memory-mapped array
+    (top, left, height, width) = packed_lanes.window
+    image = packed_lanes.get_image(idx_lane, idx_frame)[top: top + height, left: left + width]
 
-    # Pad the image
-    return pad(image, dimensions, rescaled_label)
+    # Flip the image if flip = True and if it has to be flipped.
+    to_flip = flip and label[-1] == -1
+    if to_flip:
+        image = image[:, ::-1]
+
+    # Augment, standardize and pad the image
+    fill(image, destination, augmentation, standardization, random_generator)
+
+    return destination, packed_lanes.transform_label(label[:-1], to_flip)
 
 
 if __name__ == "__main__":
@@ -92,15 +159,56 @@ if __name__ == "__main__":
     LABEL = np.array([83, 644, 1])
     LABEL = np.array([53, 1003, 1])
     LABEL = np.array([83, 2903, -1])
+    NB_TRIES = 100
 
     try:
+        # --- Time each stage --- #
+        STAGES = {}
+        DESTINATION = np.empty((DIMENSIONS[0], DIMENSIONS[1], 3), dtype=np.float32)
+        for idx_try in range(NB_TRIES):
+            # uint8 until the buffer
+            TIME_START = time()
+            IMAGE = cv2.imread(str(PATH_IMAGE))
+            TIME_READ = time()
+            flip_image(IMAGE, LABEL[:-1].astype(float))
+            TIME_FLIP = time()
+            (RESCALED_IMAGE, RESCALED_LABEL) = rescale(IMAGE, SCALE, VIDEO_LENGTH, LABEL[:-1].astype(float), DIMENSIONS[0])
+            TIME_RESCALE = time()
+            fill(RESCALED_IMAGE, DESTINATION, True, True)
+            TIME_FILL = time()
+            for (STAGE, DURATION) in [("uint8 : read", TIME_READ - TIME_START), ("uint8 : flip", TIME_FLIP - TIME_READ),
+                                      ("uint8 : rescale", TIME_RESCALE - TIME_FLIP), ("uint8 : augment, standardize, pad", TIME_FILL - TIME_RESCALE)]:
+                STAGES[STAGE] = STAGES.get(STAGE, 0) + DURATION
+
+            # float64 for every transformation
+            TIME_START = time()
+            IMAGE = cv2.imread(str(PATH_IMAGE)).astype(np.float64)
+            TIME_READ = time()
+            flip_image(IMAGE, LABEL[:-1].astype(float))
+            TIME_FLIP = time()
+            augment(IMAGE)
+            TIME_AUGMENT = time()
+            standardize(IMAGE)
+            TIME_STANDARDIZE = time()
+            (RESCALED_IMAGE, RESCALED_LABEL) = rescale(IMAGE, SCALE, VIDEO_LENGTH, LABEL[:-1].astype(float), DIMENSIONS[0])
+            TIME_RESCALE = time()
+            pad(RESCALED_IMAGE, DIMENSIONS, RESCALED_LABEL)[0].astype(np.float32)
+            TIME_PAD = time()
+            for (STAGE, DURATION) in [("float64 : read", TIME_READ - TIME_START), ("float64 : flip", TIME_FLIP - TIME_READ),
+                                      ("float64 : augment", TIME_AUGMENT - TIME_FLIP), ("float64 : standardize", TIME_STANDARDIZE - TIME_AUGMENT),
+                                      ("float64 : rescale", TIME_RESCALE - TIME_STANDARDIZE), ("float64 : pad", TIME_PAD - TIME_RESCALE)]:
+                STAGES[STAGE] = STAGES.get(STAGE, 0) + DURATION
+
+        for (STAGE, DURATION) in STAGES.items():
+            print("{} : {:.3f} ms".format(STAGE, 1000 * DURATION / NB_TRIES))
+
         # All in one function
         (FINAL_IMAGE, FINAL_LABEL) = transform_image(PATH_IMAGE, LABEL, SCALE, VIDEO_LENGTH, DIMENSIONS, False, True, True)
         # Save the transformed image
         # cv2.imwrite(str(PATH_SAVE), FINAL_IMAGE)
 
         # Plot the final image
-        FINAL_IMAGE[FINAL_LABEL[0], FINAL_LABEL[1]] = [0, 0, 255]
+        FINAL_IMAGE[int(FINAL_LABEL[0]), int(FINAL_LABEL[1])] = [0, 0, 255]
         print(FINAL_LABEL)
         cv2.imshow("Final Image", FINAL_IMAGE.astype("uint8"))
         cv2.waitKey(0)
@@ -10,16 +10,19 @@ import numpy.random as rd
 from src.d4_modelling_neural.loading_data.transformations.tools.rescale import rescale
 
 
-def augment(image):
+def augment(image, random_generator=rd):
     """
     Change the color channel of the image.
 
     Args:
         image (array): the input image.
+
+        random_generator (Generator): the generator of the random numbers.
+            Default value = numpy.random
     """
     # Change the color
-    image *= rd.uniform(0, 1.5, 3)
-    image += rd.uniform(-15, 15, 3) + rd.uniform(-25, 25, image.shape)
+    image *= random_generator.uniform(0, 1.5, 3)
+    image += random_generator.uniform(-15, 15, 3) + random_generator.uniform(-25, 25, image.shape)
 
     np.clip(image, 0, 255, image)
 
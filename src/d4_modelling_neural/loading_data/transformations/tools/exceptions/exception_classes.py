@@ -5,6 +5,7 @@ Classes:
     FindPathDataError
     PaddingError
     SwimmingWayError
+    PackingError
 """
 
 
@@ -46,3 +47,19 @@ class SwimmingWayError(Exception):
 
     def __repr__(self):
         return "The swimming way label of the video {} has not been registered.".format(self.name_video)
+
+
+class PackingError(Exception):
+    """The exception class error to tell that the packed lanes do not have the asked scale or dimensions."""
+    def __init__(self, path_packed, scale, dimensions):
+        """
+        Construct the path_packed, the scale and the dimensions.
+        """
+        self.path_packed = path_packed
+        self.scale = scale
+        self.dimensions = dimensions
+
+    def __repr__(self):
+        beginning = "The lanes packed in {} ".format(self.path_packed)
+        end = "do not have the scale {} and the dimensions {}, {}. ".format(self.scale, self.dimensions[0], self.dimensions[1])
+        return beginning + end + "Please pack the lanes again."
@@ -0,0 +1,88 @@
+"""
+This module writes an image in a float32 buffer.
+The augmentation, the standardization and the padding are done while writing the image.
+"""
+from pathlib import Path
+from time import time
+import numpy as np
+import numpy.random as rd
+import cv2
+
+# To find the position of the image in the padded image
+from src.d4_modelling_neural.loading_data.transformations.tools.pad import get_padding
+
+
+def fill(image, destination, augmentation, standardization, random_generator=rd):
+    """
+    Write the image in the middle of the destination and fill the rest with zeros.
+    It does the same as augment, standardize and pad, without copying the image.
+
+    Args:
+        image (array, uint8): the rescaled image.
+
+        destination (array, float32): the padded image to fill.
+
+        augmentation (boolean): augment the image, if augmentation = True.
+
+        standardization (boolean): standardize the image, if standardization = True.
+
+        random_generator (Generator): the generator of the random numbers of the augmentation.
+            Default value = numpy.random
+
+    Returns:
+        (array of 2 integers): the position of the top left corner of the image in the destination. [vertical, horizontal]
+    """
+    (top, left) = get_padding(image.shape[: 2], destination.shape[: 2])
+    (bottom, right) = (top + image.shape[0], left + image.shape[1])
+
+    # Fill the padding with black pixels
+    destination[: top] = 0
+    destination[bottom:] = 0
+    destination[top: bottom, : left] = 0
+    destination[top: bottom, right:] = 0
+
+    # Work on the rows of pixels, the operations on the channels are then done on long contiguous rows
+    rows = destination.view()
+    rows.shape = (destination.shape[0], destination.shape[1] * 3)
+    window = rows[top: bottom, 3 * left: 3 * right]
+    window[:] = image.reshape(image.shape[0], image.shape[1] * 3)
+
+    # Change the color, as in augment
+    if augmentation:
+        window *= np.tile(random_generator.uniform(0, 1.5, 3), image.shape[1]).astype(np.float32)
+        offset = np.tile(random_generator.uniform(-15, 15, 3), image.shape[1])
+        noise = random_generator.uniform(-25, 25, image.shape).reshape(window.shape)
+        noise += offset
+        window += noise
+        np.maximum(window, 0, window)
+        np.minimum(window, 255, window)
+
+    # Standardize, as in standardize
+    if standardization:
+        window -= 100.
+        window /= 50.
+
+    return np.array([top, left])
+
+
+if __name__ == "__main__":
+    # Parameters
+    PATH_IMAGE = Path("../../../../../data/2_intermediate_top_down_lanes/lanes/tries/vid0/l1_f0275.jpg")
+    DIMENSIONS = [108, 1820]
+    NB_TRIES = 200
+
+    # Load the image
+    IMAGE = cv2.resize(cv2.imread(str(PATH_IMAGE)), (1500, DIMENSIONS[0]))
+    DESTINATION = np.empty((DIMENSIONS[0], DIMENSIONS[1], 3), dtype=np.float32)
+
+    for AUGMENTATION in [False, True]:
+        TIME_START = time()
+        for idx_try in range(NB_TRIES):
+            fill(IMAGE, DESTINATION, AUGMENTATION, True)
+        print("Augmentation : {}, {:.3f} ms per image".format(AUGMENTATION, 1000 * (time() - TIME_START) / NB_TRIES))
+
+    # Plot the image
+    fill(IMAGE, DESTINATION, True, False)
+    cv2.imshow("Filled image", DESTINATION.astype(np.uint8))
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
@@ -12,6 +12,29 @@ from src.d4_modelling_neural.loading_data.transformations.tools.exceptions.excep
 from src.d4_modelling_neural.loading_data.transformations.tools.rescale import rescale
 
 
+def get_padding(image_dimensions, dimensions):
+    """
+    Get the position of the image in the padded image.
+
+    Args:
+        image_dimensions (list of two integers): [vertic_dimension, horiz_dimension] of the image.
+
+        dimensions (list of two integers): [vertic_dimension, horiz_dimension] for padding.
+
+    Returns:
+        (array of 2 integers): the position of the top left corner of the image in the padded image. [vertical, horizontal]
+    """
+    # Compute padding dimensions
+    vertic_pad = dimensions[0] - image_dimensions[0]
+    horiz_pad = dimensions[1] - image_dimensions[1]
+
+    # Check if the padding is possible
+    if vertic_pad < 0 or horiz_pad < 0:
+        raise PaddingError(image_dimensions, dimensions)
+
+    return np.array([vertic_pad // 2, horiz_pad // 2])
+
+
 def pad(image, dimensions, label):
     """
     Pad the image with zeros.
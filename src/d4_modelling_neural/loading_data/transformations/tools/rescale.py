@@ -6,7 +6,7 @@ import cv2
 import numpy as np
 
 
-def rescale(image, scale, video_length, label, pixel_vertic_dim):
+def rescale(image, scale, video_length, label, pixel_vertic_dim, destination=None):
     """
     Rescale the image to the given scale for the horizontal axis and
     keep the size of the vertical axis.
@@ -22,6 +22,10 @@ def rescale(image, scale, video_length, label, pixel_vertic_dim):
 
         pixel_vertic_dim (integer): the dimension of the vertical axis that will be returned.
 
+        destination (array): if given, the rescaled image is written in it.
+            It has to have the dimensions of the rescaled image and the type of the image.
+            Default value = None
+
     Returns:
         (array): the rescaled image.
 
@@ -43,7 +47,7 @@ def rescale(image, scale, video_length, label, pixel_vertic_dim):
     rescaled_label[0] = int(np.floor(label[0] * scale_factor_vertic))
 
     # Resize the image
-    return cv2.resize(image, (pixels_horiz_dim, pixel_vertic_dim)), rescaled_label
+    return cv2.resize(image, (pixels_horiz_dim, pixel_vertic_dim), dst=destination), rescaled_label
 
 
 if __name__ == "__main__":
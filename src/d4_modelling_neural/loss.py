@@ -7,11 +7,17 @@ import numpy as np
 from tensorflow import GradientTape
 
 # To compute the gradient while computing a sum
-from tensorflow import reduce_sum
+from tensorflow import reduce_sum, where
+
+# To compile the steps
+from tensorflow import function, TensorSpec, float32, shape
 
 # For the classification problem
 from tensorflow.keras.losses import binary_crossentropy
 
+# To compute the statistics of a step
+from src.d4_modelling_neural.metrics import compute_accuracy, compute_mae
+
 
 def get_loss(model, sub_lanes, sub_labels, trade_off):
     """
@@ -96,16 +102,8 @@ def regression_loss(labels, predictions):
     Returns:
         (float): the MSE.
     """
-    nb_sub_images = len(predictions)
-    # Sum of the errors
-    sum_reg = 0
-
-    for idx_sub_image in range(nb_sub_images):
-        if labels[idx_sub_image] >= 0:
-            # L2 loss update
-            sum_reg += (predictions[idx_sub_image] - labels[idx_sub_image]) ** 2
-
-    return sum_reg
+    # Only the sub-images with a head count
+    return reduce_sum(where(labels >= 0, (predictions - labels) ** 2, 0))
 
 
 def evaluate_loss(model, sub_lanes, sub_labels, trade_off):
@@ -135,6 +133,68 @@ def evaluate_loss(model, sub_lanes, sub_labels, trade_off):
     return compute_loss(sub_labels, predictions, trade_off), predictions
 
 
+def get_train_step(model, optimizer, trade_off, sub_lane_shape, metrics):
+    """
+    Compile a whole training step : the loss, the gradients, the optimization and the update of the metrics.
+    The step is traced once, for batches of any length of sub-lanes of the given shape.
+
+    Args:
+        model (TensorFlow Model): the MODEL.
+
+        optimizer (TensorFlow Optimizer): the optimizer.
+
+        trade_off (float): the trade off between the classification loss and the regression loss.
+
+        sub_lane_shape (tuple of 3 integers): the shape of a sub-lane. (height, window_size, 3)
+
+        metrics (MetricsMagnifier): the metric's manager, its counters are updated in the step.
+
+    Returns:
+        (function): the step, that takes the sub-lanes and the sub-labels and returns the loss.
+    """
+    @function(input_signature=[TensorSpec((None,) + tuple(sub_lane_shape), float32), TensorSpec((None, 3), float32)])
+    def train_step(sub_lanes, sub_labels):
+        (grads, loss_value, predictions) = get_loss(model, sub_lanes, sub_labels, trade_off)
+
+        # Optimize
+        optimizer.apply_gradients(zip(grads, model.trainable_variables))
+
+        # Register statistics
+        metrics.update(loss_value, compute_accuracy(sub_labels[:, :2], predictions[:, :2]), compute_mae(sub_labels[:, 2], predictions[:, 2]), shape(sub_labels)[0])
+
+        return loss_value
+
+    return train_step
+
+
+def get_evaluate_step(model, trade_off, sub_lane_shape, metrics):
+    """
+    Compile a whole evaluation step : the loss and the update of the metrics.
+
+    Args:
+        model (TensorFlow Model): the MODEL.
+
+        trade_off (float): the trade off between the classification loss and the regression loss.
+
+        sub_lane_shape (tuple of 3 integers): the shape of a sub-lane. (height, window_size, 3)
+
+        metrics (MetricsMagnifier): the metric's manager, its counters are updated in the step.
+
+    Returns:
+        (function): the step, that takes the sub-lanes and the sub-labels and returns the loss.
+    """
+    @function(input_signature=[TensorSpec((None,) + tuple(sub_lane_shape), float32), TensorSpec((None, 3), float32)])
+    def evaluate_step(sub_lanes, sub_labels):
+        (loss_value, predictions) = evaluate_loss(model, sub_lanes, sub_labels, trade_off)
+
+        # Register statistics
+        metrics.update(loss_value, compute_accuracy(sub_labels[:, :2], predictions[:, :2]), compute_mae(sub_labels[:, 2], predictions[:, 2]), shape(sub_labels)[0], train=False)
+
+        return loss_value
+
+    return evaluate_step
+
+
 if __name__ == "__main__":
     LABELS = np.array([[0, 1, -1], [0, 1, -1], [1, 0, 10]], dtype=np.float)
     PRED_GOOD = np.array([[-1, 201, 933], [10, 29, -88], [110, -7, 15]], dtype=np.float)
@@ -2,15 +2,54 @@
 This module manage the metric during the training.
 """
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+# To compute the statistics in the graph of the steps
+from tensorflow import Variable, argmax, cast, reduce_mean, reduce_sum, where, stack, zeros, abs as tf_abs, float32
+from tensorflow.math import divide_no_nan
+
+
+def compute_accuracy(labels, predictions):
+    """
+    Compute the accuracy of a batch with TensorFlow operations, as update_acc does.
+
+    Args:
+        labels (tensor of 2 dimensions): list of [is_in_image, is_not_in_image].
+
+        predictions (tensor of 2 dimensions): list of [pred_is_in_image, pred_is_not_in_image].
+
+    Returns:
+        (tensor): the accuracy.
+    """
+    pred_prob = 1 - cast(argmax(predictions, axis=1), float32)
+
+    return reduce_mean(cast(labels[:, 0] == pred_prob, float32))
+
+
+def compute_mae(labels, predictions):
+    """
+    Compute the mean absolute error of a batch with TensorFlow operations, as update_mae does.
+
+    Args:
+        labels (tensor of 1 dimension): list of [column], column = -1 where there is no head.
+
+        predictions (tensor of 1 dimension): list of [pred_column].
+
+    Returns:
+        (tensor): the mean absolute error, 0 if there is no head.
+    """
+    is_head = labels != -1
+
+    return divide_no_nan(reduce_sum(where(is_head, tf_abs(labels - predictions), 0)), reduce_sum(cast(is_head, float32)))
+
 
 class MetricsMagnifier:
     """
     The class of the metric manager.
     """
-    def __init__(self, window_size, nb_epochs, batch_size):
+    def __init__(self, window_size, nb_epochs, batch_size, log_interval=0):
         """
         Declaration of the variables.
 
@@ -20,6 +59,10 @@ class MetricsMagnifier:
             nb_epochs (integer): the number of epochs performed during the training.
 
             batch_size (integer): the  size of the batch used during the training.
+
+            log_interval (integer): the number of batches between two prints of the running metrics.
+                if 0, the metrics are only read at the end of the epochs.
+                Default value = 0
         """
         # For the loss
         self.losses_train = []
@@ -43,6 +86,13 @@ class MetricsMagnifier:
         self.nb_batches_train = 0
         self.nb_batches_valid = 0
 
+        # The counters filled by update without leaving the device : [loss, accuracy, mae, number of batches]
+        self.counters = {True: Variable(zeros(4), trainable=False), False: Variable(zeros(4), trainable=False)}
+        self.log_interval = log_interval
+
+        # The durations of the steps : one dictionary per batch
+        self.timings = []
+
         # For the savings
         self.window_size = window_size
         self.nb_epochs = nb_epochs
@@ -122,6 +172,112 @@ class MetricsMagnifier:
         else:
             self.mae_valid += mae
 
+    def update(self, loss_value, accuracy, mae, nb_samples, train=True):
+        """
+        Add the statistics of a batch to the counters.
+        The counters are TensorFlow variables, so it can be called in a compiled step without synchronisation.
+
+        Args:
+            loss_value (tensor): the value of the loss.
+
+            accuracy (tensor): the accuracy of the batch.
+
+            mae (tensor): the mean absolute error of the batch.
+
+            nb_samples (integer or tensor): the number of samples that correspond to the loss value.
+
+            train (boolean): says if the update is done during training.
+                Default value = True
+        """
+        self.counters[train].assign_add(stack([loss_value / cast(nb_samples, float32), accuracy, mae, 1.]))
+
+    def read_counters(self, train=True):
+        """
+        Read the counters, this waits for the steps that update them.
+
+        Args:
+            train (boolean): says if the counters of the training are read.
+                Default value = True
+
+        Returns:
+            (array of 4 floats): the sums of the loss, the accuracy and the mae, and the number of batches.
+        """
+        return self.counters[train].numpy()
+
+    def flush_counters(self):
+        """
+        Add the counters to the sums of update_loss, update_acc, update_mae and update_nb_batches, then reset them.
+        """
+        (loss, accuracy, mae, nb_batches) = self.read_counters()
+        self.loss_train += loss
+        self.acc_train += accuracy
+        self.mae_train += mae
+        self.nb_batches_train += int(nb_batches)
+
+        (loss, accuracy, mae, nb_batches) = self.read_counters(train=False)
+        self.loss_valid += loss
+        self.acc_valid += accuracy
+        self.mae_valid += mae
+        self.nb_batches_valid += int(nb_batches)
+
+        self.counters[True].assign(zeros(4))
+        self.counters[False].assign(zeros(4))
+
+    def log(self, idx_batch, train=True):
+        """
+        Print the running means of the epoch every log_interval batches.
+
+        Args:
+            idx_batch (integer): the index of the batch in the epoch.
+
+            train (boolean): says if the training metrics are printed.
+                Default value = True
+        """
+        if self.log_interval > 0 and (idx_batch + 1) % self.log_interval == 0:
+            (loss, accuracy, mae, nb_batches) = self.read_counters(train)
+            print("Batch {} : loss {:.4f}, accuracy {:.4f}, mae {:.4f}".format(idx_batch, loss / nb_batches, accuracy / nb_batches, mae / nb_batches))
+
+    def get_state(self):
+        """
+        Get the state of the metrics, to be saved in a checkpoint.
+        The counters are read, so this waits for the steps that update them.
+
+        Returns:
+            (dictionary): the attributes and the values of the counters.
+        """
+        state = {name: value for (name, value) in self.__dict__.items() if name != "counters"}
+        state["counters"] = {train: self.read_counters(train) for train in [True, False]}
+
+        return state
+
+    def set_state(self, state):
+        """
+        Restore the state given by get_state.
+
+        Args:
+            state (dictionary): the state of the metrics.
+        """
+        for (name, value) in state.items():
+            if name != "counters":
+                setattr(self, name, value)
+        for train in [True, False]:
+            self.counters[train].assign(state["counters"][train])
+
+    def update_timings(self, epoch, idx_batch, train, **durations):
+        """
+        Register the durations of a step.
+
+        Args:
+            epoch (integer): the index of the epoch.
+
+            idx_batch (integer): the index of the batch in the epoch.
+
+            train (boolean): says if the step is a training step.
+
+            **durations (floats): the durations of the parts of the step, in seconds.
+        """
+        self.timings.append(dict(epoch=epoch, batch=idx_batch, train=train, **durations))
+
     def update_nb_batches(self, train=True):
         """
         Update the number of batch.
@@ -140,6 +296,8 @@ class MetricsMagnifier:
         """
         Update the lists of metric.
         """
+        self.flush_counters()
+
         # Update lists
         self.losses_train.append(self.loss_train / self.nb_batches_train)
         self.losses_valid.append(self.loss_valid / self.nb_batches_valid)
@@ -160,10 +318,10 @@ class MetricsMagnifier:
         self.nb_batches_valid = 0
 
         # Print the results
-        print("The loss on the training set is", np.float(self.losses_train[-1]))
+        print("The loss on the training set is", float(self.losses_train[-1]))
         print("The accuracy on the training set is", self.accuracies_train[-1])
         print("The mae on the training set is", self.maes_train[-1])
-        print("The loss on the validation set is", np.float(self.losses_valid[-1]))
+        print("The loss on the validation set is", float(self.losses_valid[-1]))
         print("The accuracy on the validation set is", self.accuracies_valid[-1])
         print("The mae on the validation set is", self.maes_valid[-1])
 
@@ -206,6 +364,11 @@ class MetricsMagnifier:
         plt.savefig(path_mae)
         plt.close()
 
+        # Save the durations of the steps
+        if len(self.timings) > 0:
+            path_timings = starting_path / "timings_{}_epoch_{}_batch_{}_{}{}.csv".format(self.window_size, self.nb_epochs, self.batch_size, trade_off_info, number_training)
+            pd.DataFrame(self.timings).to_csv(path_timings, index=False)
+
     def get_final_result(self):
         """
         Returns the results.
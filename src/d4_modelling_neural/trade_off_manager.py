@@ -30,14 +30,22 @@ class TradeOffManager:
         # The trade offs
         self.trade_offs = np.geomspace(first_trade_off, last_trade_off, nb_trade_off)
 
+        # The number of epochs of a complete training
+        self.nb_epochs = nb_epochs
+
         # To name of the figure that will be stored
         self.save_name = "window_{}_epoch_{}_batch_{}.jpg".format(window_size, nb_epochs, batch_size)
 
-        # The lists that will be plotted
-        self.error_rates_train = []
-        self.maes_train = []
-        self.error_rates_valid = []
-        self.maes_valid = []
+        # The lists that will be plotted, nan until the training of the trade off is added
+        self.error_rates_train = np.full(nb_trade_off, np.nan)
+        self.maes_train = np.full(nb_trade_off, np.nan)
+        self.error_rates_valid = np.full(nb_trade_off, np.nan)
+        self.maes_valid = np.full(nb_trade_off, np.nan)
+        self.nb_added = 0
+
+        # The validation results of the trainings stopped early, nan for the complete ones
+        self.stopped_error_rates_valid = np.full(nb_trade_off, np.nan)
+        self.stopped_maes_valid = np.full(nb_trade_off, np.nan)
 
     def __len__(self):
         return len(self.trade_offs)
@@ -48,17 +56,36 @@ class TradeOffManager:
         """
         return self.trade_offs[item]
 
-    def add(self, training_information):
+    def add(self, training_information, idx_trade_off=None, nb_epochs_done=None):
         """
         Add the training information to the lists.
+        The trainings stopped early are not compared with the complete ones, they stay nan in the lists
+        and their validation results are plotted apart.
 
         Args:
             training_information (list of 4 floats): accuracy on train, mae on train, accuracy on validation, mae on validation.
+
+            idx_trade_off (integer): the index of the trade off of the training, the trainings can be added in any order.
+                if None, it is the trade off after the last one added.
+                Default value = None
+
+            nb_epochs_done (integer): the number of epochs of the training.
+                if None, the training is complete.
+                Default value = None
         """
-        self.error_rates_train.append(1 - training_information[0])
-        self.maes_train.append(training_information[1])
-        self.error_rates_valid.append(1 - training_information[2])
-        self.maes_valid.append(training_information[3])
+        if idx_trade_off is None:
+            idx_trade_off = self.nb_added
+        self.nb_added += 1
+
+        if nb_epochs_done is not None and nb_epochs_done < self.nb_epochs:
+            self.stopped_error_rates_valid[idx_trade_off] = 1 - training_information[2]
+            self.stopped_maes_valid[idx_trade_off] = training_information[3]
+            return
+
+        self.error_rates_train[idx_trade_off] = 1 - training_information[0]
+        self.maes_train[idx_trade_off] = training_information[1]
+        self.error_rates_valid[idx_trade_off] = 1 - training_information[2]
+        self.maes_valid[idx_trade_off] = training_information[3]
 
     def save(self, path_root):
         """
@@ -70,23 +97,30 @@ class TradeOffManager:
         (fig, ax_error) = plt.subplots()
         ax_mae = ax_error.twinx()
 
+        # The curves join the complete trainings, even if the trainings between them were stopped
+        is_complete = ~np.isnan(self.error_rates_valid)
+        trade_offs = self.trade_offs[is_complete]
+
         # Set the error rate figure
-        ax_error.plot(self.trade_offs, self.error_rates_train, label="Train", color="red", linestyle="dashed")
-        ax_error.plot(self.trade_offs, self.error_rates_valid, label="Validation", color="red")
+        ax_error.plot(trade_offs, self.error_rates_train[is_complete], label="Train", color="red", linestyle="dashed")
+        ax_error.plot(trade_offs, self.error_rates_valid[is_complete], label="Validation", color="red")
+        ax_error.scatter(self.trade_offs, self.stopped_error_rates_valid, color="red", marker="x")
         ax_error.set_xlabel("Values of the trade off")
         ax_error.set_ylabel("Error rates", color="red")
         ax_error.tick_params(axis='y', labelcolor="red")
 
         # Set the mean absolute error figure
-        ax_mae.plot(self.trade_offs, self.maes_train, color="black", linestyle="dashed")
-        ax_mae.plot(self.trade_offs, self.maes_valid, color="black")
+        ax_mae.plot(trade_offs, self.maes_train[is_complete], color="black", linestyle="dashed")
+        ax_mae.plot(trade_offs, self.maes_valid[is_complete], color="black")
+        ax_mae.scatter(self.trade_offs, self.stopped_maes_valid, color="black", marker="x")
         ax_mae.set_ylabel("Mean absolute error", color="black")
         ax_mae.tick_params(axis='y', labelcolor="black")
 
         train_legend = mlines.Line2D([], [], color='black', linestyle="dashed", label='Train')
         validation_legend = mlines.Line2D([], [], color='black', label='Validation')
+        stopped_legend = mlines.Line2D([], [], color='black', marker="x", linestyle="None", label='Validation, stopped early')
 
-        plt.legend(handles=[train_legend, validation_legend])
+        plt.legend(handles=[train_legend, validation_legend, stopped_legend])
         plt.xscale("log")
         plt.savefig(path_root / self.save_name)
         plt.close()
@@ -0,0 +1,180 @@
+"""
+This module trains a model for each trade off of a TradeOffManager, in parallel processes.
+The runs that are clearly worse than the others are stopped early, by successive halving.
+"""
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# To train the model
+from src.d4_modelling_neural_magnifier import train_magnifier
+
+
+def set_process_threads(nb_threads):
+    """
+    Limit the number of threads used by TensorFlow in a process, so that the processes do not compete for the CPU.
+    It has to be called before TensorFlow computes anything in the process.
+
+    Args:
+        nb_threads (integer): the number of threads of the operations.
+    """
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(nb_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(nb_threads)
+
+
+def get_rungs(nb_epochs, reduction_factor):
+    """
+    Get the epochs after which the runs are compared : 1, reduction_factor, reduction_factor ** 2, ... epochs.
+    The last epoch is never a rung.
+
+    Args:
+        nb_epochs (integer): the number of epochs of a complete run.
+
+        reduction_factor (integer): the growth of the number of epochs between two rungs.
+
+    Returns:
+        (list of integers): the indexes of the epochs.
+    """
+    rungs = []
+    nb_epochs_rung = 1
+    while nb_epochs_rung < nb_epochs:
+        rungs.append(nb_epochs_rung - 1)
+        nb_epochs_rung *= reduction_factor
+
+    return rungs
+
+
+class SuccessiveHalving:
+    """
+    The class that decides, at each rung, if a run continues.
+    A run continues if it is among the 1 / reduction_factor best runs that reached the rung.
+    The results are shared by the processes, the first runs to reach a rung always continue.
+    """
+    def __init__(self, results, lock, rungs, reduction_factor, window_size):
+        """
+        Construct the stopper.
+
+        Args:
+            results (DictProxy): associates a rung to the list of the scores of the runs that reached it.
+
+            lock (Lock): the lock of the results.
+
+            rungs (list of integers): the epochs after which the runs are compared.
+
+            reduction_factor (integer): the inverse of the proportion of runs that continue at each rung.
+
+            window_size (integer): the width of the sub-images, to normalize the mean absolute error.
+        """
+        self.results = results
+        self.lock = lock
+        self.rungs = rungs
+        self.reduction_factor = reduction_factor
+        self.window_size = window_size
+
+    def get_score(self, accuracy, mae):
+        """
+        Compute the score of a run, the lower the better.
+        The trade off changes the scale of the loss, so the runs are compared with the error rate
+        and the mean absolute error as a fraction of the window.
+
+        Args:
+            accuracy (float): the accuracy on the validation set.
+
+            mae (float): the mean absolute error on the validation set.
+
+        Returns:
+            (float): the score.
+        """
+        return 1 - accuracy + mae / self.window_size
+
+    def __call__(self, epoch, accuracy, mae):
+        """
+        Register the score of the run if the epoch is a rung and say if the run has to stop.
+
+        Args:
+            epoch (integer): the index of the epoch that just ended.
+
+            accuracy (float): the accuracy on the validation set.
+
+            mae (float): the mean absolute error on the validation set.
+
+        Returns:
+            (boolean): True if the run has to stop.
+        """
+        if epoch not in self.rungs:
+            return False
+
+        score = self.get_score(accuracy, mae)
+        with self.lock:
+            scores = self.results.get(epoch, []) + [score]
+            self.results[epoch] = scores
+
+        if len(scores) < self.reduction_factor:
+            return False
+
+        # Rank of the run among the runs that reached the rung
+        return np.sum(np.array(scores) < score) >= len(scores) // self.reduction_factor
+
+
+def run_sweep(trade_off_manager, data_param, loading_param, training_param, tries, model_type, packed_lanes=None,
+              nb_processes=2, nb_threads=1, reduction_factor=2):
+    """
+    Train a model for each trade off, in parallel processes, and add the results to the trade off manager as they arrive.
+
+    Args:
+        trade_off_manager (TradeOffManager): the trade offs.
+
+        data_param (list): (video_names_train, video_names_valid, number_training, dimensions, vadid_lane_number)
+
+        loading_param (list): (scale, augmentation, flip, nb_workers, seed)
+
+        training_param (list): (nb_epochs, batch_size, window_size, nb_samples, distribution, margin, trade_off, close_to_head)
+            the trade_off is replaced by the ones of the trade off manager.
+
+        tries (string): says if the training is done on colab : tries = "" or on the computer : tries = "/tries".
+
+        model_type (string): says the type of model to be used.
+
+        packed_lanes (dictionary): associates the name of a video to its PackedLanes.
+            The arrays are memory-mapped, so the processes share them instead of decoding the images.
+            Default value = None
+
+        nb_processes (integer): the number of trainings run at the same time.
+            Default value = 2
+
+        nb_threads (integer): the number of threads of TensorFlow in each process.
+            Default value = 1
+
+        reduction_factor (integer): the inverse of the proportion of runs that continue at each rung.
+            if 1, no run is stopped.
+            Default value = 2
+    """
+    (nb_epochs, window_size) = (training_param[0], training_param[2])
+
+    # TensorFlow can not be forked
+    context = get_context("spawn")
+    with context.Manager() as manager:
+        stopper = None
+        if reduction_factor > 1:
+            stopper = SuccessiveHalving(manager.dict(), manager.Lock(), get_rungs(nb_epochs, reduction_factor), reduction_factor, window_size)
+
+        with ProcessPoolExecutor(nb_processes, mp_context=context, initializer=set_process_threads, initargs=(nb_threads,)) as executor:
+            futures = {}
+            for (idx_trade_off, trade_off) in enumerate(trade_off_manager):
+                training_param_trade_off = list(training_param)
+                training_param_trade_off[-2] = trade_off
+
+                future = executor.submit(train_magnifier, data_param, loading_param, training_param_trade_off, tries, model_type,
+                                         packed_lanes=packed_lanes, stopper=stopper)
+                futures[future] = idx_trade_off
+
+            # Register the training information, a failed training does not stop the others
+            for future in as_completed(futures):
+                try:
+                    (training_information, nb_epochs_done) = future.result()
+                except Exception as error:
+                    print("Trade off {} failed : {}".format(trade_off_manager[futures[future]], error.__repr__()))
+                    continue
+                trade_off_manager.add(training_information, futures[future], nb_epochs_done)
+                print("Trade off {} done after {} epochs, {}/{} trainings".format(trade_off_manager[futures[future]], nb_epochs_done, trade_off_manager.nb_added, len(trade_off_manager)))
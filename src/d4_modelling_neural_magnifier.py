@@ -2,6 +2,7 @@
 This script trains a MODEL with the magnifier concept.
 """
 from pathlib import Path
+from time import perf_counter
 import numpy as np
 
 # Exception
@@ -12,6 +13,7 @@ from src.d4_modelling_neural.loading_data.data_generator import generate_data
 
 # To load the sets
 from src.d4_modelling_neural.loading_data.data_loader import DataLoader
+from src.d4_modelling_neural.loading_data.prefetch_loader import PrefetchLoader
 
 # The models
 from src.d4_modelling_neural.zoom_model import ZoomModel
@@ -21,7 +23,7 @@ from src.d4_modelling_neural.zoom_model_deep import ZoomModelDeep
 from src.d4_modelling_neural.sample_lane.sample_lanes import sample_lanes
 
 # The loss
-from src.d4_modelling_neural.loss import get_loss, evaluate_loss
+from src.d4_modelling_neural.loss import get_train_step, get_evaluate_step
 
 # The optimizer
 from tensorflow.keras.optimizers import Adam
@@ -29,15 +31,46 @@ from tensorflow.keras.optimizers import Adam
 # The metric's manager
 from src.d4_modelling_neural.metrics import MetricsMagnifier
 
+# To resume the training
+from src.d4_modelling_neural.checkpoint import TrainingCheckpoint
 
-def train_magnifier(data_param, loading_param, training_param, tries, model_type):
+
+def get_training_state(epoch, idx_batch, shuffled, train_loader, sampler, metrics):
+    """
+    Gather the state of the training loop that is saved in a checkpoint.
+
+    Args:
+        epoch (integer): the epoch where the training resumes.
+
+        idx_batch (integer): the batch where the training resumes.
+
+        shuffled (boolean): says if the training set has already been shuffled for this epoch.
+
+        train_loader (DataLoader): the loader of the training set.
+
+        sampler (Generator): the generator of the random numbers of sample_lanes.
+
+        metrics (MetricsMagnifier): the metric's manager.
+
+    Returns:
+        (dictionary): the state.
+    """
+    return {"epoch": epoch, "idx_batch": idx_batch, "shuffled": shuffled,
+            "order": train_loader.order.copy(), "loader_epoch": train_loader.epoch,
+            "numpy_state": np.random.get_state(), "sampler_state": sampler.bit_generator.state,
+            "metrics": metrics.get_state()}
+
+
+def train_magnifier(data_param, loading_param, training_param, tries, model_type, log_interval=0, packed_lanes=None, stopper=None,
+                    checkpoint_interval=0):
     """
     Train the model magnifier.
 
     Args:
         data_param (list): (video_names_train, video_names_valid, number_training, dimensions, vadid_lane_number)
 
-        loading_param (list): (scale, augmentation, flip)
+        loading_param (list): (scale, augmentation, flip, nb_workers, seed)
+            if nb_workers > 0, the batches are loaded in the background by nb_workers threads.
 
         training_param (list): (nb_epochs, batch_size, window_size, nb_samples, distribution, margin, trade_off, close_to_head)
 
@@ -45,13 +78,33 @@ def train_magnifier(data_param, loading_param, training_param, tries, model_type
 
         model_type (string): says the type of model to be used.
 
+        log_interval (integer): the number of batches between two prints of the running metrics.
+            if 0, the metrics are only read at the end of the epochs.
+            Default value = 0
+
+        packed_lanes (dictionary): associates the name of a video to its PackedLanes.
+            if None, the images are read from the jpg files.
+            Default value = None
+
+        stopper (function): called at the end of each epoch with (epoch, accuracy on validation, mae on validation),
+            the training stops if it returns True. The weights and the metrics of a stopped training are then saved
+            with the number of epochs done and "stopped" in their names.
+            Default value = None
+
+        checkpoint_interval (integer): the number of batches between two checkpoints, the end of each epoch is also saved.
+            If a checkpoint exists, the training resumes from it. The checkpoint is deleted when the training is done.
+            if 0, there is no checkpoint.
+            Default value = 0
+
     Returns:
         (list of 4 float): accuracy on train, mae on train, accuracy on validation, mae on validation.
+
+        (integer): the number of epochs done, smaller than nb_epochs if the stopper stopped the training.
     """
 
     # Unpack the arguments
     (video_names_train, video_names_valid, number_training, dimensions, valid_lane_number) = data_param
-    (scale, augmentation, flip) = loading_param
+    (scale, augmentation, flip, nb_workers, seed) = loading_param
     (nb_epochs, batch_size, window_size, nb_samples, distribution, margin, trade_off, close_to_head) = training_param
 
     # Take into account the trade off if it is different from 0.
@@ -82,8 +135,14 @@ def train_magnifier(data_param, loading_param, training_param, tries, model_type
     train_data = generate_data(paths_label_train, starting_data_paths, starting_calibration_paths)
     valid_data = generate_data(paths_label_valid, starting_data_paths, starting_calibration_paths, lane_number=valid_lane_number)
 
-    train_set = DataLoader(train_data, batch_size=batch_size, scale=scale, dimensions=dimensions, augmentation=augmentation, flip=flip)
-    valid_set = DataLoader(valid_data, batch_size=batch_size, scale=scale, dimensions=dimensions, augmentation=False, flip=flip)
+    # The batches are not kept after their step, their buffers can be reused
+    train_loader = DataLoader(train_data, batch_size=batch_size, scale=scale, dimensions=dimensions, augmentation=augmentation, flip=flip, seed=seed, nb_buffers=1, packed_lanes=packed_lanes)
+    valid_loader = DataLoader(valid_data, batch_size=batch_size, scale=scale, dimensions=dimensions, augmentation=False, flip=flip, seed=seed, nb_buffers=1, packed_lanes=packed_lanes)
+    if nb_workers > 0:
+        train_set = PrefetchLoader(train_loader, nb_workers=nb_workers)
+        valid_set = PrefetchLoader(valid_loader, nb_workers=nb_workers)
+    else:
+        (train_set, valid_set) = (train_loader, valid_loader)
     print("The training set is composed of {} images".format(len(train_data)))
     print("The validation set is composed of {} images".format(len(valid_data)))
 
@@ -93,81 +152,125 @@ def train_magnifier(data_param, loading_param, training_param, tries, model_type
     else:
         model = ZoomModel(close_to_head)
 
-    # Get the weights of the previous trainings
-    if number_training > 1:
-        # Get the input shape to build the MODEL
-        # Build the MODEL to load the weights
-        (lanes, labels) = train_set[0]
-        # Get the sub images
-        (sub_lanes, sub_labels) = sample_lanes(lanes, labels, window_size, nb_samples, distribution, margin, close_to_head)
-
-        # Build the MODEL
-        model.build(sub_lanes.shape)
+    # Optimizer
+    optimizer = Adam()
 
+    # --- For statistics --- #
+    metrics = MetricsMagnifier(window_size, nb_epochs, batch_size, log_interval)
+
+    # The compiled steps
+    sub_lane_shape = (dimensions[0], window_size, 3)
+    train_step = get_train_step(model, optimizer, trade_off, sub_lane_shape, metrics)
+    evaluate_step = get_evaluate_step(model, trade_off, sub_lane_shape, metrics)
+
+    # Build the MODEL to load the weights
+    model.build((None,) + sub_lane_shape)
+
+    # The generator of sample_lanes, its state is saved in the checkpoints
+    sampler = np.random.default_rng(seed)
+
+    # --- Resume the training or get the weights of the previous trainings --- #
+    checkpoint = TrainingCheckpoint(path_weight / "checkpoint_{}".format(path_new_weight.stem), model, optimizer)
+    (start_epoch, shuffled) = (0, False)
+    if checkpoint_interval > 0 and checkpoint.exists():
+        state = checkpoint.restore()
+        (start_epoch, shuffled) = (state["epoch"], state["shuffled"])
+        (train_loader.order, train_loader.epoch, train_loader.start_batch) = (state["order"], state["loader_epoch"], state["idx_batch"])
+        np.random.set_state(state["numpy_state"])
+        sampler.bit_generator.state = state["sampler_state"]
+        metrics.set_state(state["metrics"])
+        print("Training resumed at epoch n° {}, batch n° {}".format(start_epoch, state["idx_batch"]))
+
+    elif number_training > 1:
         path_former_training = path_weight / "window_{}_epoch_{}_batch_{}_{}{}.h5".format(window_size, nb_epochs, batch_size, trade_off_info, number_training - 1)
 
         # Load the weights
         model.load_weights(str(path_former_training))
 
-    # Optimizer
-    optimizer = Adam()
-
-    # --- For statistics --- #
-    metrics = MetricsMagnifier(window_size, nb_epochs, batch_size)
-
     # --- Training --- #
-    for epoch in range(nb_epochs):
-        # Shuffle data
-        train_set.on_epoch_end()
+    for epoch in range(start_epoch, nb_epochs):
+        # Shuffle data, unless the epoch is resumed
+        if not shuffled:
+            train_set.on_epoch_end()
+        shuffled = False
 
         # - Train on the train set - #
         print("Training, epoch n ° {}".format(epoch))
         model.trainable = True
-        for (idx_batch, batch) in enumerate(train_set):
+        time_start = perf_counter()
+        for (idx_batch, batch) in enumerate(train_set, train_loader.start_batch):
             # Print the progress
             if idx_batch % 100 == 0:
                 print(np.round(100 * idx_batch // len(train_set)), "% of the training done")
             (lanes, labels) = batch
 
             # Get the sub images
-            (sub_lanes, sub_labels) = sample_lanes(lanes, labels, window_size, nb_samples, distribution, margin, close_to_head)
-            # Compute the loss, the gradients and the PREDICTIONS
-            (grads, loss_value, predictions) = get_loss(model, sub_lanes, sub_labels, trade_off)
+            (sub_lanes, sub_labels) = sample_lanes(lanes, labels, window_size, nb_samples, distribution, margin, close_to_head, sampler)
+            time_data = perf_counter()
 
-            # Optimize
-            optimizer.apply_gradients(zip(grads, model.trainable_variables))
+            # Compute the loss, optimize and register the statistics
+            train_step(sub_lanes, sub_labels)
+            time_step = perf_counter()
 
-            # Register statistics
-            metrics.update_loss(loss_value, len(sub_labels))
-            metrics.update_acc(sub_labels[:, :2], predictions[:, :2])
-            metrics.update_mae(sub_labels[:, 2], predictions[:, 2])
-            metrics.update_nb_batches()
+            metrics.log(idx_batch)
+            time_end = perf_counter()
+            metrics.update_timings(epoch, idx_batch, True, data=time_data - time_start, step=time_step - time_data, metrics=time_end - time_step)
+
+            # Save the checkpoint, the training will resume at the next batch
+            if checkpoint_interval > 0 and (idx_batch + 1) % checkpoint_interval == 0:
+                checkpoint.save(get_training_state(epoch, idx_batch + 1, True, train_loader, sampler, metrics))
+            time_start = perf_counter()
 
         # - Evaluate the validation set - #
         print("Validation, epoch n° {}".format(epoch))
         model.trainable = False
+        time_start = perf_counter()
         for (idx_batch, batch) in enumerate(valid_set):
             (lanes, labels) = batch
 
             # Get the sub images
-            (sub_lanes, sub_labels) = sample_lanes(lanes, labels, window_size, nb_samples, distribution, margin, close_to_head)
-            # Compute the loss value and the PREDICTIONS
-            (loss_value, predictions) = evaluate_loss(model, sub_lanes, sub_labels, trade_off)
+            (sub_lanes, sub_labels) = sample_lanes(lanes, labels, window_size, nb_samples, distribution, margin, close_to_head, sampler)
+            time_data = perf_counter()
+
+            # Compute the loss value and register the statistics
+            evaluate_step(sub_lanes, sub_labels)
+            time_step = perf_counter()
 
-            # Register statistics
-            metrics.update_loss(loss_value, len(sub_labels), train=False)
-            metrics.update_acc(sub_labels[:, :2], predictions[:, :2], train=False)
-            metrics.update_mae(sub_labels[:, 2], predictions[:, 2], train=False)
-            metrics.update_nb_batches(train=False)
+            metrics.log(idx_batch, train=False)
+            time_end = perf_counter()
+            metrics.update_timings(epoch, idx_batch, False, data=time_data - time_start, step=time_step - time_data, metrics=time_end - time_step)
+            time_start = time_end
 
         # Update the metrics
         metrics.on_epoch_end()
 
+        # Stop the runs that are worse than the others
+        if stopper is not None and stopper(epoch, metrics.accuracies_valid[-1], metrics.maes_valid[-1]):
+            print("Training stopped after epoch n° {}".format(epoch))
+            break
+
+        # Save the checkpoint, the training will resume at the next epoch
+        if checkpoint_interval > 0:
+            checkpoint.save(get_training_state(epoch + 1, 0, False, train_loader, sampler, metrics))
+
+    # Stop the workers
+    if nb_workers > 0:
+        train_set.close()
+        valid_set.close()
+
+    # A training stopped early is saved under the number of epochs done, so that it is not taken for a complete one
+    nb_epochs_done = len(metrics.accuracies_valid)
+    if nb_epochs_done < nb_epochs:
+        trade_off_info += "stopped_"
+        metrics.nb_epochs = nb_epochs_done
+        path_new_weight = path_weight / "window_{}_epoch_{}_batch_{}_{}{}.h5".format(window_size, nb_epochs_done, batch_size, trade_off_info, number_training)
+
     # --- Save the weights --- #
     model.save_weights(str(path_new_weight))
+    checkpoint.remove()
 
     # To save the plots
     starting_path_save = Path("reports/figures_results/zoom_model{}{}".format(tries, model_type))
     metrics.save(starting_path_save, number_training, trade_off_info)
 
-    return metrics.get_final_result()
+    return metrics.get_final_result(), nb_epochs_done
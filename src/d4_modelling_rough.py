@@ -2,13 +2,14 @@
 import cv2
 import os
 import numpy as np
-from time import time
+from time import time, sleep
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-from src.d2_intermediate_calibration import calibrate_video
-from src.d0_utils.calibration_from_txt import calibrate_from_txt
+from src.d2_intermediate_calibration import calibrate_video_text
+from src.d0_utils.calibration_from_txt import calibrate_frames_from_txt
 
-from src.d0_utils.split_and_save_data.crop.crop_lines import crop_list
+from src.d0_utils.split_and_save_data.crop.crop_lines import crop
 
 from src.d4_modelling_rough.draw_rectangle.draw_rectangle import draw_rectangle
 from src.d4_modelling_rough.draw_rectangle.plot_evolution_graph import plot_graphs
@@ -16,29 +17,24 @@ from src.d4_modelling_rough.draw_rectangle.exception_classes import VideoAlready
 
 from src.d0_utils.extractions.exceptions.exception_classes import TimeError, FindPathExtractError
 
-from src.d0_utils.store_load_data.make_video import make_video
+from src.d0_utils.store_load_data.make_video import VideoSink
+from src.d0_utils.store_load_data.exceptions.exception_classes import AlreadyExistError
 
 
-from src.d4_modelling_rough.swimmer_detection import edges
-from src.d4_modelling_rough.draw_rectangle.extreme_active_pixels import extreme_white_pixels
+from src.d4_modelling_rough.roi_tracking import detect_box, RoiTracker
+from src.d7_visualization.tools.get_meters_video import get_meters_video
 
 
-def boxes_list(list_lines, list_y):
-    rectangles = []
-    for line, y in zip(list_lines, list_y):
-        x0, y0, x1, y1 = extreme_white_pixels(edges(line, sigma=3, threshold=8)[:, :-150])
-        y0 += y
-        y1 += y
+def boxes_list(list_lines, list_y, executor=None):
+    """
+    Detects the box of the swimmer in each lane.
+    If an executor is given, the lanes are processed by its workers, OpenCV and numpy release the GIL.
+    """
+    max_width = np.shape(list_lines[0])[1] / 8
+    if executor is None:
+        return [detect_box(line, y, max_width) for line, y in zip(list_lines, list_y)]
 
-        # To check that we detected the swimmer but not sth else.
-        # Boxes must be smaller than 1/8 of the swimming pool size.
-        if abs(x1 - x0) < np.shape(list_lines[0])[1] / 8:
-            rectangles.append([x0, y0, x1, y1])
-
-        else:
-            # print("Detection of swimmer from line " + str(list_y.index(y) + 1) + " failed.")
-            rectangles.append([0, 0, 0, 0])
-    return rectangles
+    return list(executor.map(detect_box, list_lines, list_y, [max_width] * len(list_lines)))
 
 
 def boxes_list_images(list_images_crop, list_y):
@@ -50,53 +46,55 @@ def boxes_list_images(list_images_crop, list_y):
 
 def animation_red_boxes(path_video, lines, margin, time_begin=0, time_end=-1, create_video=False,
                         destination_video=Path("../output/tries/"), path_txt=Path("../data/calibration")):
-    if create_video:
-        name_video = path_video.parts[-1]
-        corrected_video = "boxes_" + name_video
-        if os.path.exists(str(destination_video / corrected_video)):
-            raise VideoAlreadyExists(corrected_video)
+    """
+    Detects the swimmers and draws their boxes on the top-down view of the video.
+    The frames are calibrated, processed and written one by one, so the memory does not depend on the length of the clip.
+    If the video is not calibrated yet, the calibration points are asked first.
+
+    Args:
+        path_video (WindowsPath): the path that leads to the video.
+        lines (list of integers): the vertical positions of the lines of the lanes.
+        margin (integer): the number of lines of pixels ignored for each lane.
+        time_begin (integer): the beginning time in second.
+        time_end (integer): the ending time in second, if -1, the video is read until the end.
+        create_video (boolean): if True, the frames with the boxes are written in a video.
+        destination_video (WindowsPath): the folder of the video.
+        path_txt (WindowsPath): the folder of the calibration files.
+
+    Returns:
+        (list of lists of [x0, y0, x1, y1]): the boxes of the swimmers in each frame.
+    """
+    corrected_video = "boxes_" + path_video.parts[-1]
+    if create_video and os.path.exists(str(destination_video / corrected_video)):
+        raise VideoAlreadyExists(corrected_video)
 
     t = time()
 
-    whole_path_txt = str(path_txt / "{}.txt".format(path_video.parts[-1][: -4]))
-    if os.path.exists(whole_path_txt):
-        corrected_images = calibrate_from_txt(path_video, whole_path_txt, time_begin, time_end)
-    else:
+    whole_path_txt = path_txt / "{}.txt".format(path_video.parts[-1][: -4])
+    if not whole_path_txt.exists():
         print("Calibration parameters file not found. Please calibrate the video manually.")
-        corrected_images = calibrate_video(path_video, time_begin, time_end, destination_video,
-                                           destination_txt=Path(path_txt), create_txt=True)
+        calibrate_video_text(path_video, time_begin, destination_txt=path_txt)
 
-    n_images = len(corrected_images)
-
-    for i in range(n_images):
-        corrected_images[i] = cv2.cvtColor(corrected_images[i], cv2.COLOR_BGR2RGB)
+    # Get the fps
+    video = cv2.VideoCapture(str(path_video))
+    fps_video = int(video.get(cv2.CAP_PROP_FPS))
 
     print("Swimmers detection...")
-    list_images_crop = crop_list(corrected_images, lines, margin)
-    list_rectangles = boxes_list_images(list_images_crop, lines)
-
-    im = np.copy(corrected_images)
-
-    for i in range(len(im)):
-        for swimmer in list_rectangles[i]:
-            im[i] = draw_rectangle(im[i],
-                                   swimmer[0],
-                                   swimmer[1] + margin,
-                                   swimmer[2],
-                                   swimmer[3] + margin,
-                                   3)
-
+    (list_rectangles, latencies) = ([], [])
+    sink = VideoSink(corrected_video, fps_video, destination_video, background=True) if create_video else None
+    try:
+        frames = calibrate_frames_from_txt(path_video, whole_path_txt, time_begin, time_end)
+        for (index_frame, rectangles, image, latency) in track_red_boxes(frames, lines, margin):
+            list_rectangles.append(rectangles)
+            latencies.append(latency)
+            if sink is not None:
+                sink.write(image)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    print("Detection and drawing latency : ", round(1000 * np.mean(latencies), 3) if len(latencies) > 0 else 0, " ms per frame.")
     if create_video:
-        for i in range(n_images):
-            im[i] = cv2.cvtColor(im[i], cv2.COLOR_RGB2BGR)
-
-        # Get the fps
-        video = cv2.VideoCapture(str(path_video))
-        fps_video = int(video.get(cv2.CAP_PROP_FPS))
-
-        # Make the video
-        print("Make the animation video ...")
-        make_video(corrected_video, im, fps_video, destination_video)
         print("The video has been created with success! Check", corrected_video)
 
     print("Process finished. Runtime : ", round(time() - t, 3), " seconds.")
@@ -104,6 +102,136 @@ def animation_red_boxes(path_video, lines, margin, time_begin=0, time_end=-1, cr
     return list_rectangles
 
 
+def track_red_boxes(frames, lines, margin, executor=None, tracker=None):
+    """
+    Detects the swimmers and draws their boxes on the frames one by one.
+
+    Args:
+        frames (iterable of (integer, float, array)): the index, the time and the top-down BGR image of each frame.
+        lines (list of integers): the vertical positions of the lines of the lanes.
+        margin (integer): the number of lines of pixels ignored for each lane.
+        executor (Executor): the workers that process the lanes of a frame.
+            Default value = None
+        tracker (RoiTracker): if given, the swimmers are searched around their previous box.
+            Default value = None
+
+    Returns:
+        (integer): the index of the frame.
+        (list of [x0, y0, x1, y1]): the boxes of the swimmers.
+        (array): the BGR image with the boxes, it is the image of the frame, modified.
+        (float): the time spent on the frame in seconds.
+    """
+    previous_index_frame = None
+    for (index_frame, time_frame, image) in frames:
+        t = time()
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if tracker is None:
+            rectangles = boxes_list(crop(rgb_image, lines, margin), lines, executor)
+        else:
+            nb_frames = 1 if previous_index_frame is None else index_frame - previous_index_frame
+            rectangles = tracker.get_boxes(crop(rgb_image, lines, margin), lines, executor, nb_frames)
+        previous_index_frame = index_frame
+
+        for swimmer in rectangles:
+            draw_rectangle(rgb_image, swimmer[0], swimmer[1] + margin, swimmer[2], swimmer[3] + margin, 3)
+
+        yield index_frame, rectangles, cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR, dst=image), time() - t
+
+
+def pace_frames(frames, fps):
+    """
+    Replays the frames at the given rate, like a live capture.
+    A frame is dropped if the previous ones took so long that it is already outdated.
+
+    Args:
+        frames (iterable of (integer, float, array)): the index, the time and the image of each frame.
+        fps (float): the number of frames per second.
+
+    Returns:
+        (integer, float, array): the frames that are not dropped.
+    """
+    t_start = None
+    for (index_frame, time_frame, image) in frames:
+        if t_start is None:
+            t_start = time() - time_frame
+        delay = t_start + time_frame - time()
+        if delay > 0:
+            sleep(delay)
+        if delay > - 1 / fps:
+            yield index_frame, time_frame, image
+
+
+def live_red_boxes(path_video, lines, margin, time_begin=0, time_end=-1, create_video=False,
+                   destination_video=Path("../output/tries/"), path_txt=Path("../data/calibration"),
+                   nb_workers=8, real_time=True, max_speed=None):
+    """
+    Streaming version of animation_red_boxes : the frames are calibrated, processed and written one by one.
+    The video has to be calibrated already.
+
+    Args:
+        path_video (WindowsPath): the path that leads to the video.
+        lines (list of integers): the vertical positions of the lines of the lanes.
+        margin (integer): the number of lines of pixels ignored for each lane.
+        time_begin (integer): the beginning time in second.
+        time_end (integer): the ending time in second, if -1, the video is read until the end.
+        create_video (boolean): if True, the frames with the boxes are written in a video.
+        destination_video (WindowsPath): the folder of the video.
+        path_txt (WindowsPath): the folder of the calibration files.
+        nb_workers (integer): the number of threads that process the lanes of a frame.
+        real_time (boolean): if True, the video is replayed at its fps and the outdated frames are dropped.
+            In the created video, the last processed frame is written again for each dropped frame, so that it keeps the fps of the original.
+        max_speed (float): the maximal speed of a swimmer in meters per second.
+            If given, the swimmers are searched around their previous box, see RoiTracker.
+
+    Returns:
+        (dictionary): associates the index of a processed frame to the boxes of the swimmers.
+            The dropped frames are not in it, see the frames argument of plot_graphs.
+        (array of floats): the time spent on each processed frame in seconds.
+    """
+    whole_path_txt = path_txt / "{}.txt".format(path_video.parts[-1][: -4])
+    video = cv2.VideoCapture(str(path_video))
+    fps_video = video.get(cv2.CAP_PROP_FPS)
+
+    frames = calibrate_frames_from_txt(path_video, whole_path_txt, time_begin, time_end)
+    if real_time:
+        frames = pace_frames(frames, fps_video)
+
+    tracker = None
+    if max_speed is not None:
+        tracker = RoiTracker(len(lines) - 1, max_speed, fps_video, get_meters_video(whole_path_txt)[1])
+
+    (tracks, latencies) = ({}, [])
+    sink = VideoSink("boxes_" + path_video.parts[-1], int(fps_video), destination_video, background=True) if create_video else None
+    (previous_index_frame, previous_image) = (None, None)
+    t = time()
+    try:
+        with ThreadPoolExecutor(nb_workers) as executor:
+            for (index_frame, rectangles, image, latency) in track_red_boxes(frames, lines, margin, executor, tracker=tracker):
+                tracks[index_frame] = rectangles
+                latencies.append(latency)
+                if sink is not None:
+                    # Repeat the last image for the dropped frames, so that the video stays in sync
+                    if previous_index_frame is not None:
+                        for idx_dropped in range(index_frame - previous_index_frame - 1):
+                            sink.write(previous_image)
+                    sink.write(image)
+                (previous_index_frame, previous_image) = (index_frame, image)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    latencies = np.array(latencies)
+    if len(latencies) > 0:
+        print("Processed frames : ", len(latencies), ", rate : ", round(len(latencies) / (time() - t), 2), " fps.")
+        print("Latency : mean ", round(1000 * np.mean(latencies), 2), " ms, 95th percentile ",
+              round(1000 * np.percentile(latencies, 95), 2), " ms, max ", round(1000 * np.max(latencies), 2), " ms.")
+    if tracker is not None:
+        (hits, misses, searched_fraction) = tracker.get_statistics()
+        print("Tracking : ", hits, " hits, ", misses, " misses, ", round(100 * searched_fraction, 1), " % of the columns searched.")
+
+    return tracks, latencies
+
+
 if __name__ == "__main__":
 
     PATH_VIDEO = Path("../data/videos/vid0.mp4")
@@ -114,18 +242,31 @@ if __name__ == "__main__":
     # number of lines of pixels we ignore for each lane_magnifier
     MARGIN = 15
 
+    # if True, the frames are processed one by one at the fps of the video
+    LIVE = False
+    # The maximal speed of a swimmer in meters per second, to search the swimmers around their previous box
+    MAX_SPEED = 2.5
+
     try:
-        RECTANGLES = animation_red_boxes(PATH_VIDEO, LINES, MARGIN, 12, 13, True)
+        if LIVE:
+            TRACKS = live_red_boxes(PATH_VIDEO, LINES, MARGIN, 12, 13, True, max_speed=MAX_SPEED)[0]
+            (FRAMES, RECTANGLES) = (list(TRACKS.keys()), list(TRACKS.values()))
+        else:
+            RECTANGLES = animation_red_boxes(PATH_VIDEO, LINES, MARGIN, 12, 13, True)
+            FRAMES = None
 
         # LANES we want to plot the swim frequency
         LINES_TO_PLOT = [0, 1, 2]
 
         PARAMETER_TO_PLOT = "x_front"
-        plot_graphs(RECTANGLES, LINES_TO_PLOT, PARAMETER_TO_PLOT)
+        plot_graphs(RECTANGLES, LINES_TO_PLOT, PARAMETER_TO_PLOT, FRAMES)
 
     except VideoAlreadyExists as already_exists:
         print(already_exists.__repr__())
 
+    except AlreadyExistError as already_exist_error:
+        print(already_exist_error.__repr__())
+
     except TimeError as time_error:
         print(time_error.__repr__())
 
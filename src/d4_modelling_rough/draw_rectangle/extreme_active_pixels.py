@@ -1,9 +1,29 @@
 import numpy as np
 
 
+def get_extremes(is_white):
+    """
+    Finds the minimum and maximum index of the True values of a boolean vector.
+    The index 0 is not taken into account for the minimum.
+
+    Args:
+        is_white (numpy array): a boolean vector
+
+    Returns:
+        minimum, maximum (integers): the minimum is 2 * len(is_white) and the maximum is 0 if there is no True value
+    """
+    length = len(is_white)
+    minimum = 1 + int(np.argmax(is_white[1:])) if np.any(is_white[1:]) else 2 * length
+    maximum = length - 1 - int(np.argmax(is_white[::-1])) if np.any(is_white) else 0
+
+    return minimum, maximum
+
+
 def extreme_white_pixels(image):
     """
-    Among the white pixels of a binary image, finds the minimum and maximum x and y
+    Among the white pixels of a binary image, finds the minimum and maximum x and y.
+    The first column and the first row are not taken into account for the minimums,
+    and the minimums are twice the dimensions of the image if there is no white pixel.
 
     Args:
         image(numpy array) : a binary image
@@ -11,17 +31,7 @@ def extreme_white_pixels(image):
     Returns:
         x_min, y_min, x_max, y_max (integers): 2 couples of coordinates, in pixels
     """
+    (x_min, x_max) = get_extremes(np.any(image, axis=0))
+    (y_min, y_max) = get_extremes(np.any(image, axis=1))
 
-    y_min, x_min = image.shape[0], image.shape[1]
-
-    a = np.linspace(0, x_min - 1, x_min)
-    b = np.linspace(0, y_min - 1, y_min)
-    c, d = np.meshgrid(a, b)
-    ci = c * image
-    di = d * image
-
-    return (int(np.min(ci + 2 * x_min * (ci == 0))),
-            int(np.min(di + 2 * y_min * (di == 0))),
-            int(np.max(ci)),
-            int(np.max(di))
-            )
+    return x_min, y_min, x_max, y_max
@@ -22,7 +22,7 @@ def area(rectangles, i, j):
     return y_size(rectangles, i, j) * x_size(rectangles, i, j)
 
 
-def plot_graphs(rect, rectangles_to_plot, parameter="x_front"):
+def plot_graphs(rect, rectangles_to_plot, parameter="x_front", frames=None):
     """
     To plot the evolution of dimensions of a list of rectangles
     Args:
@@ -33,6 +33,8 @@ def plot_graphs(rect, rectangles_to_plot, parameter="x_front"):
             y1 (integer): the y-coordinate of the bottom right pixel of the rectangle
         rectangles_to_plot (list of integers): rectangles to plot the evolution of
         parameter (string): the dimension to plot the evolution of. See the four functions below.
+        frames (list of integers): the index of the frame of each element of rect, when frames were dropped.
+            if None, the frames are 0, 1, 2...
         smooth (bool): if True, graphs will be smoothed
 
     Returns:
@@ -40,7 +42,7 @@ def plot_graphs(rect, rectangles_to_plot, parameter="x_front"):
 
     """
     n = len(rect)
-    x = np.arange(n)
+    x = np.arange(n) if frames is None else np.array(frames)
 
     # transform_image to a numpy array
     rect_np = np.array(rect)
@@ -1,10 +1,11 @@
 from scipy import ndimage
 import numpy as np
+import cv2
 
 
-def compute_gradient(image, sigma=0):
+def compute_gradient_scipy(image, sigma=0):
     """
-    Computes the norm of the gradient of an image.
+    Computes the norm of the gradient of an image with SciPy.
     Args:
         image(numpy array) : image we want the gradient of
         sigma(integer) : parameter of the gaussian filter the algorithm apply
@@ -23,3 +24,77 @@ def compute_gradient(image, sigma=0):
     gradient_x = ndimage.convolve(image, x)
     gradient_norm = np.sqrt(gradient_y ** 2 + gradient_x ** 2)
     return gradient_norm
+
+
+def compute_gradient_opencv(image, sigma=0):
+    """
+    Computes the norm of the gradient of an image with OpenCV.
+    The filters are the ones of compute_gradient_scipy : a gaussian filter with a constant border
+    and the Sobel filters divided by 9 with a reflected border.
+    Like SciPy, the results are truncated after each filter if the image is made of integers,
+    the computations are then done in float64 so that the truncated values are the same, otherwise in float32.
+    Args:
+        image(numpy array) : image we want the gradient of
+        sigma(integer) : parameter of the gaussian filter the algorithm apply
+
+    Returns:
+        gradient_norm (numpy array): the norm of the gradient of the input image
+    """
+    is_integer = np.issubdtype(image.dtype, np.integer)
+    (dtype, cv_dtype) = (np.float64, cv2.CV_64F) if is_integer else (np.float32, cv2.CV_32F)
+    image = image.astype(dtype)
+
+    if sigma > 0:
+        # Same kernel as SciPy, which filters the vertical axis and then the horizontal axis
+        radius = int(4 * sigma + 0.5)
+        kernel = cv2.getGaussianKernel(2 * radius + 1, sigma, cv_dtype)
+        identity = np.ones(1, dtype=dtype)
+        for (kernel_x, kernel_y) in [(identity, kernel), (kernel, identity)]:
+            image = cv2.sepFilter2D(image, -1, kernel_x, kernel_y, borderType=cv2.BORDER_CONSTANT)
+            if is_integer:
+                np.trunc(image, out=image)
+
+    # OpenCV correlates, the kernels of the convolutions of SciPy are flipped
+    kernel_y = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=dtype) / 9
+    gradient_y = cv2.filter2D(image, -1, kernel_y, borderType=cv2.BORDER_REFLECT)
+    gradient_x = cv2.filter2D(image, -1, kernel_y.T, borderType=cv2.BORDER_REFLECT)
+    if is_integer:
+        np.trunc(gradient_y, out=gradient_y)
+        np.trunc(gradient_x, out=gradient_x)
+
+    return cv2.magnitude(gradient_y, gradient_x)
+
+
+# The functions that compute the gradient
+GRADIENT_BACKENDS = {"scipy": compute_gradient_scipy, "opencv": compute_gradient_opencv}
+
+
+def compute_gradient(image, sigma=0, backend="opencv"):
+    """
+    Computes the norm of the gradient of an image.
+    Args:
+        image(numpy array) : image we want the gradient of
+        sigma(integer) : parameter of the gaussian filter the algorithm apply
+        backend(string) : the library that computes the gradient, "opencv" or "scipy"
+
+    Returns:
+        gradient_norm (numpy array): the norm of the gradient of the input image
+    """
+    return GRADIENT_BACKENDS[backend](image, sigma)
+
+
+if __name__ == "__main__":
+    from time import time
+
+    # Parity of the thresholded gradients on binary images of blobs, as given by keep_skin
+    RANDOM_GENERATOR = np.random.default_rng(0)
+    IMAGE = (ndimage.gaussian_filter(RANDOM_GENERATOR.random((90, 1770)), 4) > 0.52) * 255
+
+    for BACKEND in ["scipy", "opencv"]:
+        TIME = time()
+        for i in range(10):
+            GRADIENT = compute_gradient(IMAGE, 3, BACKEND)
+        print("Backend {} : {} ms per lane".format(BACKEND, round(100 * (time() - TIME), 3)))
+
+    MISMATCHES = (compute_gradient(IMAGE, 3, "scipy") > 8) != (compute_gradient(IMAGE, 3, "opencv") > 8)
+    print("Pixels which threshold differs : {} out of {}".format(np.sum(MISMATCHES), MISMATCHES.size))
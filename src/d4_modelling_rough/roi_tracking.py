@@ -0,0 +1,169 @@
+"""
+This module detects the swimmers in a window around their previous box, instead of in the whole lane.
+"""
+import numpy as np
+
+from src.d4_modelling_rough.swimmer_detection import edges
+from src.d4_modelling_rough.draw_rectangle.extreme_active_pixels import extreme_white_pixels
+
+
+# The number of columns at the right of the lanes that are not searched
+RIGHT_MARGIN = 150
+
+# The number of columns around a window that are filtered with it, larger than the gaussian filter of edges
+PADDING = 16
+
+
+def detect_box(line, y, max_width, left=0, right=None):
+    """
+    Detects the box of the swimmer between two columns of a lane.
+    On the whole lane, it is the box of boxes_list.
+
+    Args:
+        line (numpy array): the lane.
+        y (integer): the vertical position of the lane in the image.
+        max_width (float): the maximal width of a box.
+        left (integer): the first column of the window.
+            Default value = 0
+        right (integer): the column after the window, if None, the lane is searched until RIGHT_MARGIN columns before its end.
+            Default value = None
+
+    Returns:
+        (list of 4 integers): the box [x0, y0, x1, y1], [0, 0, 0, 0] if no swimmer is detected.
+    """
+    width = line.shape[1]
+    right = width - RIGHT_MARGIN if right is None else right
+
+    # The columns around the window are filtered so that the window is not modified by the border of the filters
+    (first_column, last_column) = (max(left - PADDING, 0), min(right + PADDING, width))
+    binary = edges(line[:, first_column: last_column], sigma=3, threshold=8)
+
+    # The first column is not taken into account by extreme_white_pixels, the window starts one column before
+    start = max(left - 1, 0)
+    binary = binary[:, start - first_column: right - first_column]
+    if left > 0:
+        binary[:, 0] = False
+
+    if not np.any(binary):
+        return [0, 0, 0, 0]
+
+    x0, y0, x1, y1 = extreme_white_pixels(binary)
+
+    # To check that we detected the swimmer but not sth else.
+    if abs(x1 - x0) >= max_width:
+        return [0, 0, 0, 0]
+
+    return [x0 + start, y0 + y, x1 + start, y1 + y]
+
+
+class RoiTracker:
+    """
+    The class that searches each swimmer around its previous box, sized from the maximal speed of a swimmer.
+    When the swimmer is not found in the window, or touches its border, the whole lane is searched.
+    """
+    def __init__(self, nb_lanes, max_speed, fps, length_video, min_margin=20):
+        """
+        Construct the tracker.
+
+        Args:
+            nb_lanes (integer): the number of lanes.
+            max_speed (float): the maximal speed of a swimmer in meters per second.
+            fps (float): the number of frames per second of the video.
+            length_video (float): the length of the pool seen in the images, in meters.
+            min_margin (integer): the number of pixels added around the previous box, for the changes of its size.
+                Default value = 20
+        """
+        self.previous_boxes = [None] * nb_lanes
+        self.max_speed = max_speed
+        self.fps = fps
+        self.length_video = length_video
+        self.min_margin = min_margin
+
+        # The statistics
+        self.hits = 0
+        self.misses = 0
+        self.searched_columns = 0
+        self.lane_columns = 0
+
+    def get_search_margin(self, width, nb_frames):
+        """
+        Computes the number of columns that the swimmer can swim since its previous box.
+
+        Args:
+            width (integer): the width of the lanes in pixels.
+            nb_frames (integer): the number of frames since the previous box.
+
+        Returns:
+            (integer): the number of columns added on each side of the previous box.
+        """
+        return int(np.ceil(self.max_speed * nb_frames / self.fps * width / self.length_video)) + self.min_margin
+
+    def track_lane(self, idx_lane, line, y, max_width, search_margin):
+        """
+        Detects the swimmer of a lane, around its previous box if there is one.
+
+        Returns:
+            (list of 4 integers): the box.
+            (boolean or None): True if the swimmer was found in the window, False if the whole lane was searched after,
+                None if there was no window.
+            (integer): the number of searched columns.
+        """
+        full_width = line.shape[1] - RIGHT_MARGIN
+        previous_box = self.previous_boxes[idx_lane]
+        if previous_box is not None:
+            left = max(previous_box[0] - search_margin, 0)
+            right = min(previous_box[2] + 1 + search_margin, full_width)
+            box = detect_box(line, y, max_width, left, right)
+
+            # The swimmer may be cut by a border of the window that is not a border of the lane
+            is_cut = (box[0] == left and left > 0) or (box[2] == right - 1 and right < full_width)
+            if box != [0, 0, 0, 0] and not is_cut:
+                return box, True, right - left
+            return detect_box(line, y, max_width), False, right - left + full_width
+
+        return detect_box(line, y, max_width), None, full_width
+
+    def get_boxes(self, list_lines, list_y, executor=None, nb_frames=1):
+        """
+        Detects the box of the swimmer in each lane.
+
+        Args:
+            list_lines (list of numpy arrays): the lanes.
+            list_y (list of integers): the vertical positions of the lanes.
+            executor (Executor): the workers that process the lanes.
+                Default value = None
+            nb_frames (integer): the number of frames since the previous call, if frames were dropped.
+                Default value = 1
+
+        Returns:
+            (list of [x0, y0, x1, y1]): the boxes, [0, 0, 0, 0] if no swimmer is detected.
+        """
+        width = list_lines[0].shape[1]
+        max_width = width / 8
+        search_margin = self.get_search_margin(width, nb_frames)
+        arguments = (range(len(list_lines)), list_lines, list_y, [max_width] * len(list_lines), [search_margin] * len(list_lines))
+        if executor is None:
+            results = list(map(self.track_lane, *arguments))
+        else:
+            results = list(executor.map(self.track_lane, *arguments))
+
+        rectangles = []
+        for (idx_lane, (box, is_hit, nb_columns)) in enumerate(results):
+            self.hits += is_hit is True
+            self.misses += is_hit is False
+            self.searched_columns += nb_columns
+            self.lane_columns += width - RIGHT_MARGIN
+
+            self.previous_boxes[idx_lane] = None if box == [0, 0, 0, 0] else box
+            rectangles.append(box)
+
+        return rectangles
+
+    def get_statistics(self):
+        """
+        Returns:
+            (integer): the number of swimmers found in their window.
+            (integer): the number of swimmers not found in their window.
+            (float): the fraction of the columns of the lanes that were searched.
+        """
+        return self.hits, self.misses, self.searched_columns / max(self.lane_columns, 1)
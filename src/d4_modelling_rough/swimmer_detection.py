@@ -10,7 +10,7 @@ import matplotlib.pyplot as plt
 plt.rcParams['image.cmap'] = 'gray'
 
 
-def edges(image, threshold=8, sigma=3, method=2, figures=False):
+def edges(image, threshold=8, sigma=3, method=2, figures=False, backend="opencv"):
     """
     From a given image, compute a binary image with swimmer's pixels in white, others in black
 
@@ -20,12 +20,13 @@ def edges(image, threshold=8, sigma=3, method=2, figures=False):
         threshold (integer): parameter of the method
         method (integer): method of extraction of colors. See load_red docstring
         figures (boolean): if True, plot the returned image
+        backend (string): the library that computes the gradient, "opencv" or "scipy". See compute_gradient docstring
 
     Returns:
         threshold_gradient (numpy array): binary image with swimmer's pixels in white, others in black
     """
     red_image = keep_skin(image, method) * 255
-    gradient = compute_gradient(red_image, sigma)
+    gradient = compute_gradient(red_image, sigma, backend)
     threshold_gradient = gradient > threshold
 
     if figures:
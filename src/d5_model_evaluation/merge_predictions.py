@@ -19,18 +19,25 @@ def merge_predictions(predictions, lane_iterator):
 
         (integer): the predicted position of the head.
     """
+    predictions = np.asarray(predictions)
+
     # Get the index where the head can be
     indicative_function = 1 - np.argmax(predictions[:, : 2], axis=1)
     indexes_head = np.where(indicative_function == 1)[0]
 
-    # Will count the number of time that a head can be in a specific column
-    witness_classification = np.zeros(lane_iterator.image_horiz_size)
-    witness_regression = np.zeros(lane_iterator.image_horiz_size)
+    (begin_limits, end_limits) = lane_iterator.get_all_limits()
+    (begin_limits, end_limits) = (begin_limits[indexes_head], end_limits[indexes_head])
 
-    for idx_sub_image in indexes_head:
-        (begin_limit, end_limit) = lane_iterator.get_limits(idx_sub_image)
-        witness_classification[begin_limit: end_limit] += 1
-        witness_regression[np.clip(begin_limit + int(predictions[idx_sub_image, -1]), 0, lane_iterator.image_horiz_size - 1)] += 1
+    # Will count the number of time that a head can be in a specific column,
+    # the sub-images over each column are given by the cumulated sum of their borders
+    borders = np.zeros(lane_iterator.image_horiz_size + 1)
+    np.add.at(borders, begin_limits, 1)
+    np.add.at(borders, end_limits, -1)
+    witness_classification = np.cumsum(borders[: -1])
+
+    witness_regression = np.zeros(lane_iterator.image_horiz_size)
+    columns_regression = np.clip(begin_limits + predictions[indexes_head, -1].astype(int), 0, lane_iterator.image_horiz_size - 1)
+    np.add.at(witness_regression, columns_regression, 1)
 
     # Take the columns with the highest probabilities
     classification_columns = np.where(witness_classification == max(witness_classification))[0]
@@ -47,6 +54,54 @@ def merge_predictions(predictions, lane_iterator):
     return classification_columns, final_regression
 
 
+def merge_lanes_predictions(predictions, begin_limits, window_size, image_horiz_sizes):
+    """
+    Merge the predictions of several lanes at once, as merge_predictions does for each lane.
+    The sub-images that are not in a lane have to be predicted without head.
+
+    Args:
+        predictions (array of 3 dimensions): the predictions of all the sub-images of all the lanes.
+            (lanes, sub-images, [is_in_sub_image, is_not_in_sub_image, column])
+
+        begin_limits (array of 2 dimensions): the beginning limits of the sub-images. (lanes, sub-images)
+
+        window_size (integer): the width of the sub-images.
+
+        image_horiz_sizes (array of integers): the horizontal size of each lane.
+
+    Returns:
+        (array of integers): the first column where the head can be, for each lane.
+
+        (array of integers): the last column where the head can be, for each lane.
+
+        (array of integers): the predicted position of the head, for each lane.
+    """
+    predictions = np.asarray(predictions)
+    nb_lanes = len(predictions)
+    idx_lanes = np.repeat(np.arange(nb_lanes), predictions.shape[1])
+    is_head = np.argmax(predictions[:, :, : 2], axis=2) == 0
+    weights = is_head.ravel().astype(int)
+
+    # Count the number of time that a head can be in a specific column, with the cumulated sum of the borders
+    borders = np.zeros((nb_lanes, np.max(image_horiz_sizes) + 1))
+    np.add.at(borders, (idx_lanes, begin_limits.ravel()), weights)
+    np.add.at(borders, (idx_lanes, begin_limits.ravel() + window_size), - weights)
+    witness_classification = np.cumsum(borders[:, : -1], axis=1)
+    witness_classification[np.arange(witness_classification.shape[1]) >= image_horiz_sizes[:, np.newaxis]] = -1
+
+    # Take the first and the last columns with the highest probabilities
+    is_max = witness_classification == np.max(witness_classification, axis=1)[:, np.newaxis]
+    first_columns = np.argmax(is_max, axis=1)
+    last_columns = is_max.shape[1] - 1 - np.argmax(is_max[:, :: -1], axis=1)
+
+    # Take the last column predicted by the regression, or the middle of the lane if there is none
+    columns_regression = np.clip(begin_limits + predictions[:, :, -1].astype(int), 0, image_horiz_sizes[:, np.newaxis] - 1)
+    final_regressions = np.max(np.where(is_head, columns_regression, -1), axis=1)
+    final_regressions = np.where(final_regressions == -1, image_horiz_sizes // 2, final_regressions)
+
+    return first_columns, last_columns, final_regressions
+
+
 if __name__ == "__main__":
     # To have a lane iterator
     from src.d5_model_evaluation.slice_lane.image_magnifier.lane_iterator import LaneIterator
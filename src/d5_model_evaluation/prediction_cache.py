@@ -0,0 +1,231 @@
+"""
+This module stores the predictions of the models on the disk, so that the models are not evaluated twice on the same frames.
+
+An entry contains the predictions of a pair of models on a video, in a .npz file of columns :
+    lane, frame : the key of each row.
+    begin, end, regression : the merged predictions, in the lane.
+    rough_predictions, tight_predictions : the outputs of the models on each sub-image.
+    tight_left_columns : the first column of the crop evaluated by the tight model.
+The least recently used entries are deleted when the cache is bigger than its maximal size.
+"""
+import os
+import hashlib
+import numpy as np
+
+# Exceptions
+from src.d0_utils.store_load_data.exceptions.exception_classes import FindPathError
+
+
+# The columns of an entry
+COLUMNS = ["lane", "frame", "begin", "end", "regression", "rough_predictions", "tight_predictions", "tight_left_columns"]
+
+
+def get_weights_hash(path_weight):
+    """
+    Compute the hash of a file of weights.
+
+    Args:
+        path_weight (WindowsPath): the path to the weights.
+
+    Returns:
+        (string): the hexadecimal hash.
+    """
+    if not path_weight.exists():
+        raise FindPathError(path_weight)
+
+    hash_weight = hashlib.sha1()
+    with open(path_weight, "rb") as file:
+        for block in iter(lambda: file.read(2 ** 20), b""):
+            hash_weight.update(block)
+
+    return hash_weight.hexdigest()
+
+
+def get_models_key(paths_weight, window_sizes, recoveries, dimensions, scale):
+    """
+    Compute the key of the predictions of two models.
+    It changes if the weights or the parameters of the evaluation change.
+
+    Args:
+        paths_weight (list of 2 WindowsPath): the paths to the weights of the rough and of the tight model.
+
+        window_sizes (list of 2 integers): the two window sizes.
+
+        recoveries (list of 2 integers): the two recoveries.
+
+        dimensions (list of 2 integers): the dimensions of the lanes. [vertical, horizontal]
+
+        scale (integer): the number of pixel per meters.
+
+    Returns:
+        (string): the key.
+    """
+    description = [get_weights_hash(path_weight) for path_weight in paths_weight]
+    description += [str(list(window_sizes)), str(list(recoveries)), str(list(dimensions)), str(scale)]
+
+    return hashlib.sha1("_".join(description).encode()).hexdigest()[: 16]
+
+
+def pad_predictions(predictions):
+    """
+    Concatenate predictions which number of sub-images differ.
+    The missing sub-images are predicted without head.
+
+    Args:
+        predictions (list of arrays of 3 dimensions): the predictions. (lanes, sub-images, 3)
+
+    Returns:
+        (array of 3 dimensions): the concatenated predictions.
+    """
+    nb_sub_images = max(prediction.shape[1] for prediction in predictions)
+    padded_predictions = np.zeros((sum(len(prediction) for prediction in predictions), nb_sub_images, 3), dtype=np.float32)
+    padded_predictions[:] = [0, 1, -1]
+
+    idx_lane = 0
+    for prediction in predictions:
+        padded_predictions[idx_lane: idx_lane + len(prediction), : prediction.shape[1]] = prediction
+        idx_lane += len(prediction)
+
+    return padded_predictions
+
+
+def get_keys(lanes, frames):
+    """
+    Combine the lanes and the frames in a single integer key.
+
+    Args:
+        lanes (array of integers): the lane numbers.
+
+        frames (array of integers): the frame numbers.
+
+    Returns:
+        (array of integers): the keys.
+    """
+    return (np.asarray(lanes, dtype=np.int64) << 32) + np.asarray(frames, dtype=np.int64)
+
+
+class PredictionCache:
+    """
+    The class that stores the predictions of the models on the disk.
+    """
+    def __init__(self, path_cache, max_size=2 ** 28):
+        """
+        Construct the cache.
+
+        Args:
+            path_cache (WindowsPath): the folder of the cache.
+
+            max_size (integer): the maximal size of the cache in bytes.
+                The last entry written is always kept.
+                Default value = 2 ** 28
+        """
+        self.path_cache = path_cache
+        self.path_cache.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    def get_path(self, video_name, models_key):
+        """
+        Get the path of an entry.
+        """
+        return self.path_cache / "{}_{}.npz".format(video_name, models_key)
+
+    def load(self, video_name, models_key):
+        """
+        Load the predictions of the models on a video.
+
+        Args:
+            video_name (string): the name of the video.
+
+            models_key (string): the key given by get_models_key.
+
+        Returns:
+            (dictionary): associates the name of a column to its array, None if the entry does not exist.
+        """
+        path_entry = self.get_path(video_name, models_key)
+        if not path_entry.exists():
+            return None
+
+        # The entry becomes the most recently used one
+        os.utime(path_entry)
+        with np.load(path_entry) as entry:
+            return {column: entry[column] for column in COLUMNS}
+
+    def find(self, entry, lanes, frames):
+        """
+        Find the rows of the entry that contain the lanes and the frames.
+
+        Args:
+            entry (dictionary): the entry given by load, or None.
+
+            lanes (array of integers): the lane numbers.
+
+            frames (array of integers): the frame numbers.
+
+        Returns:
+            (array of integers): the index of the row of each lane and frame, -1 if it is not in the entry.
+        """
+        idx_rows = np.full(len(lanes), -1)
+        if entry is None or len(entry["lane"]) == 0:
+            return idx_rows
+
+        entry_keys = get_keys(entry["lane"], entry["frame"])
+        order = np.argsort(entry_keys)
+        keys = get_keys(lanes, frames)
+        positions = np.minimum(np.searchsorted(entry_keys, keys, sorter=order), len(order) - 1)
+        is_found = entry_keys[order[positions]] == keys
+        idx_rows[is_found] = order[positions[is_found]]
+
+        return idx_rows
+
+    def add(self, video_name, models_key, predictions):
+        """
+        Add predictions to an entry and delete the least recently used entries if the cache is too big.
+        The rows that are already in the entry are replaced.
+
+        Args:
+            video_name (string): the name of the video.
+
+            models_key (string): the key given by get_models_key.
+
+            predictions (dictionary): associates the name of a column to its array.
+
+        Returns:
+            (dictionary): the updated entry.
+        """
+        entry = self.load(video_name, models_key)
+        if entry is not None:
+            # Keep the former rows that are not predicted again
+            is_kept = self.find(predictions, entry["lane"], entry["frame"]) == -1
+            predictions = {column: [entry[column][is_kept], predictions[column]] for column in COLUMNS}
+            for column in COLUMNS:
+                if column in ["rough_predictions", "tight_predictions"]:
+                    predictions[column] = pad_predictions(predictions[column])
+                else:
+                    predictions[column] = np.concatenate(predictions[column])
+
+        # Write the entry atomically
+        path_entry = self.get_path(video_name, models_key)
+        path_tmp = path_entry.with_suffix(".tmp.npz")
+        np.savez(path_tmp, **predictions)
+        os.replace(path_tmp, path_entry)
+
+        self.evict(path_entry)
+
+        return predictions
+
+    def evict(self, path_kept):
+        """
+        Delete the least recently used entries until the cache is smaller than its maximal size.
+
+        Args:
+            path_kept (WindowsPath): an entry that is not deleted.
+        """
+        paths_entry = sorted(self.path_cache.glob("*.npz"), key=lambda path: path.stat().st_mtime)
+        size = sum(path.stat().st_size for path in paths_entry)
+
+        for path_entry in paths_entry:
+            if size <= self.max_size:
+                break
+            if path_entry != path_kept:
+                size -= path_entry.stat().st_size
+                path_entry.unlink()
@@ -74,7 +74,7 @@ class ImageMagnifier:
         elif idx == self.nb_sub_images - 1:
             # Compute the label
             if self.dimensions[1] - self.window_size < self.label[1] < self.dimensions[1]:
-                label = [1, 0, self.label[1] - self.dimensions[1] - self.window_size]
+                label = [1, 0, self.label[1] - (self.dimensions[1] - self.window_size)]
             else:
                 label = [0, 1, -1]
 
@@ -1,6 +1,35 @@
 """
 This module contains the class LaneIterator.
 """
+import numpy as np
+
+
+def get_limits_lanes(image_horiz_sizes, window_size, recovery):
+    """
+    Compute the beginning limits of the sub-images of several lanes of different widths at once.
+    The sub-images are the ones of slice_lane, the limits are given as in LaneIterator.get_all_limits.
+
+    Args:
+        image_horiz_sizes (array of integers): the horizontal size of each lane.
+
+        window_size (integer): the width of the sub-image.
+
+        recovery (integer): the number of pixels to be taken twice per sub-image.
+
+    Returns:
+        (array of 2 dimensions): the beginning limits, padded with the last one. (lanes, sub-images)
+
+        (array of integers): the number of sub-images of each lane.
+    """
+    pixel_step = window_size - recovery
+    last_limits = image_horiz_sizes - window_size
+    nb_sub_images = np.ceil(image_horiz_sizes / pixel_step).astype(int) - window_size // pixel_step + 1
+
+    idx_sub_images = np.arange(np.max(nb_sub_images))
+    begin_limits = np.where(idx_sub_images < nb_sub_images[:, np.newaxis] - 1, idx_sub_images * pixel_step, last_limits[:, np.newaxis])
+    begin_limits = np.minimum(begin_limits, last_limits[:, np.newaxis])
+
+    return begin_limits, nb_sub_images
 
 
 class LaneIterator:
@@ -46,6 +75,23 @@ class LaneIterator:
         else:
             return None, None
 
+    def get_all_limits(self):
+        """
+        Compute the limits of all the sub-images at once.
+        The last sub-image is given with positive limits : [image_horiz_size - window_size, image_horiz_size].
+        The sub-images that would go beyond the image are moved back inside it.
+
+        Returns:
+             (array of integers): the beginning limits.
+
+             (array of integers): the ending limits.
+        """
+        begin_limits = np.arange(self.nb_sub_images) * (self.window_size - self.recovery)
+        begin_limits = np.minimum(begin_limits, self.image_horiz_size - self.window_size)
+        begin_limits[-1] = self.image_horiz_size - self.window_size
+
+        return begin_limits, begin_limits + self.window_size
+
 
 if __name__ == "__main__":
     # Imports
@@ -4,14 +4,16 @@ This module slices a list of LANES with its LABELS.
 from pathlib import Path
 import cv2
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from src.d5_model_evaluation.slice_lane.image_magnifier.image_magnifier import ImageMagnifier
 from src.d5_model_evaluation.slice_lane.image_magnifier.lane_iterator import LaneIterator
 
 
 def slice_lane(lane, label, window_size, recovery):
     """
-    Slices the list of lanes with its labels.
-    The LANES are sliced one after the order.
+    Slices the lane with its label.
+    The sub-images are a read-only view on the lane : no window is copied,
+    except when the last sub-image is not on the step of the others.
 
     Args:
         lane (array of 3 dimensions): the lane.
@@ -31,16 +33,27 @@ def slice_lane(lane, label, window_size, recovery):
 
         (LaneIterator): the lane iterator that enables to have the limits of the sub-images.
     """
-    sub_lanes = []
-    sub_labels = []
+    pixel_step = window_size - recovery
+    lane_iterator = LaneIterator(len(ImageMagnifier(lane, label, window_size, recovery)), window_size, recovery, lane.shape[1])
+    (begin_limits, end_limits) = lane_iterator.get_all_limits()
 
-    magnifier = ImageMagnifier(lane, label, window_size, recovery)
+    # All the windows of the lane : (columns, height, window_size, channels)
+    windows = np.moveaxis(sliding_window_view(lane.astype(np.float32, copy=False), window_size, axis=1), (1, 3), (0, 2))
 
-    for (sub_lane, sub_label) in magnifier:
-        sub_lanes.append(sub_lane.astype(dtype='float32'))
-        sub_labels.append(sub_label)
+    if begin_limits[-1] == (lane_iterator.nb_sub_images - 1) * pixel_step:
+        sub_lanes = windows[: begin_limits[-1] + 1: pixel_step]
+    else:
+        sub_lanes = windows[begin_limits]
+        sub_lanes.flags.writeable = False
 
-    return np.array(sub_lanes), np.array(sub_labels).astype(dtype='float32'), LaneIterator(len(magnifier), window_size, recovery, lane.shape[1])
+    # Compute the labels
+    contain_head = (begin_limits < label[1]) & (label[1] < end_limits)
+    sub_labels = np.zeros((lane_iterator.nb_sub_images, 3), dtype=np.float32)
+    sub_labels[:, 0] = contain_head
+    sub_labels[:, 1] = ~contain_head
+    sub_labels[:, 2] = np.where(contain_head, label[1] - begin_limits, -1)
+
+    return sub_lanes, sub_labels, lane_iterator
 
 
 if __name__ == "__main__":
@@ -62,6 +75,7 @@ if __name__ == "__main__":
 
     # Slice the image
     (SUB_LANES, SUB_LABELS, LANE_ITERATOR) = slice_lane(LANE, LABEL, WINDOW_SIZE, RECOVERY)
+    SUB_LANES = SUB_LANES.copy()
 
     # Plot the sub-LANES
     NB_SUB_LANES = len(SUB_LANES)
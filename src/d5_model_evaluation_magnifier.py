@@ -1,11 +1,13 @@
 """
 This module computes the predictions by evaluating two models : a first rough model and a second more precise model.
 """
-# To slice the lane
-from src.d5_model_evaluation.slice_lane.slice_lanes import slice_lane
+import numpy as np
+
+# To compute the predictions on all the sub-images of the lane
+from src.d4_modelling_neural.fully_convolutional import predict_lane, predict_lanes
 
 # To merge the predictions
-from src.d5_model_evaluation.merge_predictions import merge_predictions
+from src.d5_model_evaluation.merge_predictions import merge_predictions, merge_lanes_predictions
 
 
 def evaluate_model(model_rough, model_tight, lane, label, window_sizes, recoveries):
@@ -31,25 +33,79 @@ def evaluate_model(model_rough, model_tight, lane, label, window_sizes, recoveri
         index_regression_pred (integer): the predicted position of the head.
     """
     # -- Get the first rough predictions -- #
-    # Get the large sub-images
-    (sub_lanes_rough, sub_labels_rough, lane_iterator_rough) = slice_lane(lane, label, window_sizes[0], recoveries[0])
-    # Compute rough predictions
-    rough_predictions = model_rough(sub_lanes_rough)
+    # Compute rough predictions on the large sub-images
+    (rough_predictions, lane_iterator_rough) = predict_lane(model_rough, lane, window_sizes[0], recoveries[0])
 
     # -- Merge the rough predictions -- #
     (index_rough_predictions, index_rough_regression_pred) = merge_predictions(rough_predictions, lane_iterator_rough)
     (left_rough_pred, right_rough_pred) = (index_rough_predictions[0], index_rough_predictions[-1] + 1)
 
     # -- Get the second tight predictions -- #
-    # Adapt the label
-    label_tight = label.copy()
-    label_tight[1] -= left_rough_pred
-    # Get the tight sub-images
-    (sub_lanes_tight, sub_labels_tight, lane_iterator_tight) = slice_lane(lane[:, left_rough_pred: right_rough_pred], label_tight, window_sizes[1], recoveries[1])
-    # Compute tight predictions
-    tight_predictions = model_tight(sub_lanes_tight)
+    # Compute tight predictions on the tight sub-images
+    (tight_predictions, lane_iterator_tight) = predict_lane(model_tight, lane[:, left_rough_pred: right_rough_pred], window_sizes[1], recoveries[1])
 
     # -- Merge the rough predictions -- #
     (index_tight_predictions, index_regression_pred) = merge_predictions(tight_predictions, lane_iterator_tight)
 
     return index_tight_predictions + left_rough_pred, int(index_regression_pred) + left_rough_pred
+
+
+def evaluate_lanes(model_rough, model_tight, lanes, window_sizes, recoveries, return_predictions=False):
+    """
+    Evaluate the models on several lanes at once, as evaluate_model does on each lane.
+    The rough model runs once on all the lanes, then the tight model runs once on all the crops.
+
+    Args:
+        model_rough (Trained Model): the first rough model.
+
+        model_tight (Trained Model): the second tight model.
+
+        lanes (array of 4 dimensions): the list of LANES.
+
+        window_sizes (array of integer): the two window sizes.
+
+        recoveries (array of integer): the two recoveries.
+
+        return_predictions (boolean): if True, the outputs of the models on the sub-images are also returned.
+            Default value = False
+
+    Returns:
+        (array of integers): the first column that might contain a head, for each lane.
+
+        (array of integers): the last column that might contain a head, for each lane.
+
+        (array of integers): the predicted position of the head, for each lane.
+
+        if return_predictions:
+            (array of 3 dimensions): the outputs of the rough model. (lanes, sub-images, 3)
+
+            (array of 3 dimensions): the outputs of the tight model on the crops. (lanes, sub-images, 3)
+
+            (array of integers): the first column of the crop of each lane.
+    """
+    (nb_lanes, lane_width) = (len(lanes), lanes.shape[2])
+
+    # -- Get the first rough predictions -- #
+    (left_lanes, right_lanes) = (np.zeros(nb_lanes, dtype=int), np.full(nb_lanes, lane_width))
+    (rough_predictions, rough_limits) = predict_lanes(model_rough, lanes, window_sizes[0], recoveries[0], left_lanes, right_lanes)
+
+    # -- Merge the rough predictions -- #
+    (left_rough_preds, right_rough_preds) = merge_lanes_predictions(rough_predictions, rough_limits, window_sizes[0], right_lanes)[: 2]
+    right_rough_preds += 1
+
+    # The crops have to contain at least one tight sub-image
+    right_rough_preds = np.maximum(right_rough_preds, left_rough_preds + window_sizes[1])
+    left_rough_preds = np.minimum(left_rough_preds, lane_width - window_sizes[1])
+    right_rough_preds = np.minimum(right_rough_preds, lane_width)
+
+    # -- Get the second tight predictions -- #
+    (tight_predictions, tight_limits) = predict_lanes(model_tight, lanes, window_sizes[1], recoveries[1], left_rough_preds, right_rough_preds)
+
+    # -- Merge the tight predictions -- #
+    (left_tight_preds, right_tight_preds, regression_preds) = merge_lanes_predictions(tight_predictions, tight_limits, window_sizes[1], right_rough_preds - left_rough_preds)
+
+    merged_predictions = (left_tight_preds + left_rough_preds, right_tight_preds + left_rough_preds, regression_preds + left_rough_preds)
+    if return_predictions:
+        return merged_predictions + (rough_predictions, tight_predictions, left_rough_preds)
+
+    return merged_predictions
@@ -38,7 +38,7 @@ class GraphicManager:
         self.time = np.zeros(self.nb_images)
 
         # Label in the original coordinates
-        labels = prediction_memories.data[:, 2]
+        labels = prediction_memories.data["x_head"].copy()
         unlabelled_lanes = np.where(labels < 0)
         # Label in the transformed coordinates
         labels /= prediction_memories.unscaled_factor
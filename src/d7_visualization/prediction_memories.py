@@ -22,11 +22,11 @@ class PredictionMemories:
         starting_calibration_path,
         dimensions,
         scale,
-        extract_image,
+        video_frames,
         generate_data,
         DataLoader,
         read_homography,
-        get_original_image,
+        project_points,
     ):
         """
         Construct the list of all the predictions.
@@ -44,7 +44,7 @@ class PredictionMemories:
 
             scale (integer): the number of pixels per meters of the transformed images.
 
-            extract_image (function): extract the images.
+            video_frames (class): class that reads the frames of a video one by one.
 
             generate_data (function): generate the wanted data.
 
@@ -52,7 +52,7 @@ class PredictionMemories:
 
             read_homography (function): read a registered homography from a path.
 
-            get_original_image (function): get the original image from a top-view image and an homography.
+            project_points (function): get the points of the original image from points of a top-view image and an homography.
         """
         # --- General variables --- #
         video = cv2.VideoCapture(str(path_video))
@@ -76,7 +76,7 @@ class PredictionMemories:
         self.added_pad = (dimensions[1] - int(scale * length_video)) // 2
 
         # --- For the original video --- #
-        self.extract_image = extract_image
+        self.video_frames = video_frames
 
         # Get the original dimensions of the original video clip
         self.original_dimensions = [int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(video.get(cv2.CAP_PROP_FRAME_WIDTH))]
@@ -85,7 +85,7 @@ class PredictionMemories:
 
         # To undo the perspective
         self.homography = read_homography(self.calibration_path)
-        self.get_original_image = get_original_image
+        self.project_points = project_points
 
         # --- For the lane video and the graphic --- #
         self.generate_data = generate_data
@@ -100,14 +100,14 @@ class PredictionMemories:
         Select the lanes that are after the beginning frame and before the ending frame.
 
         Args:
-            data (list): list of [path_to_image, y_head, x_head, swimming_way, video_length].
+            data (structured array): the array given by generate_data.
 
         Returns:
-            (list): list of [path_to_image, y_head, x_head, swimming_way, video_length].
+            (structured array): the array given by generate_data.
                 Only the interesting elements are kept.
         """
         # Get the frame numbers
-        frame_numbers = np.array([int(element[0].parts[-1][:-4].split("f")[1]) for element in data])
+        frame_numbers = data["frame"]
         # Get the indexes separately
         index_selection_low = np.where(frame_numbers >= self.begin_frame, True, False)
         index_selection_high = np.where(frame_numbers < self.end_frame, True, False)
@@ -137,34 +137,35 @@ class PredictionMemories:
 
     def get_original_frames(self):
         """
-        Get the original images with the predictions.
+        Yield the original images with the predictions one by one.
+        The frames are decoded in the same array, so the memory does not depend on the number of frames.
 
         Returns:
-            original_frames (4d-array): the list of the images
+            (array): the image with the predictions. The same array is yielded at each step, copy it to keep a frame.
         """
-        # Extract the original images
-        original_frames = np.array(self.extract_image(self.path_video, self.begin_time, self.end_time), dtype=float)
-        print("preds", self.preds)
-        # For each frame, we add the prediction
-        for idx_frame in range(self.end_frame - self.begin_frame):
-            original_frames[idx_frame] += self.merge_preds_original(idx_frame)
-            np.clip(original_frames[idx_frame], 0, 255, original_frames[idx_frame])
+        buffer = np.zeros((self.original_dimensions[0], self.original_dimensions[1], 3), dtype=np.uint8)
 
-        return original_frames.astype(np.uint8)
+        # Read the original images one by one and add the predictions
+        with self.video_frames(self.path_video, self.begin_time, self.end_time, buffer=buffer) as frames:
+            for (index_frame, time_frame, frame) in frames:
+                # The video can give a frame after the last predicted one, it is kept without predictions
+                if index_frame - self.begin_frame < len(self.preds):
+                    self.merge_preds_original(index_frame - self.begin_frame, frame)
+                yield frame
 
-    def merge_preds_original(self, idx_frame):
+    def merge_preds_original(self, idx_frame, frame):
         """"
-        Merge the predictions for the idx_frame^th frame.
+        Draw the predictions for the idx_frame^th frame on the original image.
+        Only the corners of the predicted zones and the ends of the predicted columns are projected with the homography.
 
         Args:
             idx_frame (integer): the index of the frame minus the first frame index.
 
+            frame (array of 3 dimensions): the original image, it is modified.
+
         Returns:
-            (3d-array): the image of the prediction in the original video clip point of view.
+            (3d-array): the original image with the predictions.
         """
-        # Initialise with a black picture
-        transformed_image = np.zeros((self.original_dimensions[0], self.original_dimensions[1], 3))
-
         # For each lane, we add the prediction
         for (lane_number, index_pred_left, index_pred_right, index_regression) in self.preds[idx_frame]:
             # Vertical rescaling
@@ -172,19 +173,39 @@ class PredictionMemories:
             vertical_pixel_end = int((lane_number + 1) * self.original_dimensions[0] / 10)
 
             # Horizontal rescaling
-            origin_index_left = int((index_pred_left - self.added_pad) * self.unscaled_factor)
-            origin_index_rigth = int((index_pred_right - self.added_pad) * self.unscaled_factor)
-            origin_index_regression = int((index_regression - self.added_pad) * self.unscaled_factor)
-
-            transformed_image[vertical_pixel_begin:vertical_pixel_end, origin_index_left:origin_index_rigth] += 40
-
-            # [-255, -255, 255] to be sure that after the clip, it will be [0, 0, 255]
-            transformed_image[
-                vertical_pixel_begin:vertical_pixel_end,
-                np.clip(origin_index_regression, 0, self.original_dimensions[1] - 1),
-            ] = [-255, -255, 255]
-
-        return self.get_original_image(transformed_image, self.homography, self.original_dimensions)
+            (origin_index_left, origin_index_rigth, origin_index_regression) = np.clip(
+                [int((index - self.added_pad) * self.unscaled_factor) for index in [index_pred_left, index_pred_right, index_regression]],
+                0,
+                self.original_dimensions[1] - 1,
+            )
+
+            # Project the predicted zone and the predicted column
+            points = self.project_points(
+                [
+                    [origin_index_left, vertical_pixel_begin],
+                    [origin_index_rigth, vertical_pixel_begin],
+                    [origin_index_rigth, vertical_pixel_end],
+                    [origin_index_left, vertical_pixel_end],
+                    [origin_index_regression, vertical_pixel_begin],
+                    [origin_index_regression, vertical_pixel_end],
+                ],
+                self.homography,
+            )
+            points = np.round(points).astype(np.int32)
+
+            # Lighten the zone, only in the box around it
+            (left, top, width, height) = cv2.boundingRect(points[: 4])
+            (left, top) = (max(left, 0), max(top, 0))
+            (right, bottom) = (min(left + width, frame.shape[1]), min(top + height, frame.shape[0]))
+            if left < right and top < bottom:
+                mask = np.zeros((bottom - top, right - left), dtype=np.uint8)
+                cv2.fillPoly(mask, [points[: 4] - [left, top]], 255)
+                box = frame[top:bottom, left:right]
+                cv2.add(box, (40, 40, 40, 0), dst=box, mask=mask)
+
+            cv2.line(frame, tuple(points[4].tolist()), tuple(points[5].tolist()), (0, 0, 255))
+
+        return frame
 
     def get_lanes(self, lane_number, tries):
         """
@@ -196,7 +217,7 @@ class PredictionMemories:
             tries (string): indicates if it is a real run.
 
         Returns:
-            list_lanes (list of array): list of the lanes.
+            (generator of array): the lanes, they are loaded one by one when the generator is read.
         """
         # Get the lanes
         path_label = [Path("data/3_processed_positions{}/{}.csv".format(tries, self.video_name))]
@@ -215,18 +236,26 @@ class PredictionMemories:
             augmentation=False,
             flip=False,
         )
-        list_lanes = np.zeros((len(self.data), self.dimensions[0], self.dimensions[1], 3))
 
+        return self.yield_lanes(set_visu)
+
+    def yield_lanes(self, set_visu):
+        """
+        Yield the lanes with the predictions one by one.
+
+        Args:
+            set_visu (DataLoader): the loader of the lanes of self.data.
+
+        Returns:
+            (array): the lane with the prediction.
+        """
         # For each image
         for (idx_lane, batch) in enumerate(set_visu):
             (lanes, labels) = batch
             lane = lanes[0]
-            frame_name = self.data[idx_lane, 0].parts[-1][:-4]
-            frame_number = int(frame_name.split("f")[1])
-
-            list_lanes[idx_lane] = self.merge_preds_lane(frame_number - self.begin_frame, lane)
+            frame_number = self.data["frame"][idx_lane]
 
-        return list_lanes.astype(np.uint8)
+            yield self.merge_preds_lane(frame_number - self.begin_frame, lane).astype(np.uint8)
 
     def merge_preds_lane(self, idx_frame, lane):
         """
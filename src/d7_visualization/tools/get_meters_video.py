@@ -1,7 +1,8 @@
 """
 This module computes the left limit in meters of a video.
 """
-import numpy as np
+# To read the calibration file
+from src.d0_utils.perspective_correction.calibration import load_calibration
 
 
 def get_meters_video(path_calibration):
@@ -16,8 +17,6 @@ def get_meters_video(path_calibration):
 
         (float): the length of the video in meters.
     """
-    file = open(path_calibration, 'r')
-    lines = file.readlines()
-    extreme_values = np.fromstring(lines[-1], dtype=float, sep=',')
+    calibration = load_calibration(path_calibration)
 
-    return extreme_values[0], abs(extreme_values[2] - extreme_values[0])
+    return calibration.left_limit, calibration.length_video
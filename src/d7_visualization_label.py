@@ -17,6 +17,26 @@ from src.d4_modelling_neural.loading_data.data_loader import DataLoader
 from src.d0_utils.store_load_data.make_video import make_video
 
 
+def get_labelled_lanes(set_loader):
+    """
+    Yield the lanes with their label one by one.
+
+    Args:
+        set_loader (DataLoader): the loader of the lanes, with batches of one lane.
+
+    Returns:
+        (array): the lane with the label.
+    """
+    for idx_sample in range(len(set_loader)):
+        print(idx_sample)
+        (lanes, labels) = set_loader[idx_sample]
+        (lane, label) = (lanes[0].astype(np.uint8), labels[0].astype(int))
+        # Modify the lane_magnifier if the head has been seen
+        if label[0] >= 0:
+            lane[:, label[1]] = [0, 0, 255]
+        yield lane
+
+
 # --- BEGIN : !! TO MODIFY !! --- #
 REAL_RUN = False
 VIDEO_NAME = "100_NL_D_FA-Canet"
@@ -49,22 +69,11 @@ try:
     SET = DataLoader(DATA, scale=SCALE, batch_size=1, dimensions=DIMENSIONS, standardization=False, augmentation=False, flip=True)
     print("The set is composed of {} images".format(len(DATA)))
 
-    # --- Get every LANES --- #
-    EVERY_LANES = [0] * len(DATA)
-    for idx_sample in range(len(SET)):
-        print(idx_sample)
-        (lanes, labels) = SET[idx_sample]
-        (lane, label) = (lanes[0].astype(np.uint8), labels[0].astype(int))
-        # Modify the lane_magnifier if the head has been seen
-        if label[0] >= 0:
-            lane[:, label[1]] = [0, 0, 255]
-        EVERY_LANES[idx_sample] = lane
-
     # --- Make the video --- #
     print("Making the video...")
     DESTINATION_VIDEO = Path("../data/5_model_output/videos/labelled_videos{}".format(TRIES))
     NAME_LABELLED_VIDEO = "labelled_flip_{}.mp4".format(VIDEO_NAME)
-    make_video(NAME_LABELLED_VIDEO, EVERY_LANES, fps=FPS, destination=DESTINATION_VIDEO)
+    make_video(NAME_LABELLED_VIDEO, get_labelled_lanes(SET), fps=FPS, destination=DESTINATION_VIDEO, background=True)
 
 except FindPathDataError as find_path_data_error:
     print(find_path_data_error.__repr__())
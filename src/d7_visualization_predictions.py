@@ -2,6 +2,7 @@
 This script creates a video where the predicted labels are printed on the original video clip.
 """
 from pathlib import Path
+import numpy as np
 
 # To generate and load data
 from src.d4_modelling_neural.loading_data.data_generator import generate_data
@@ -11,20 +12,109 @@ from src.d4_modelling_neural.loading_data.data_loader import DataLoader
 from src.d4_modelling_neural.zoom_model import ZoomModel
 from src.d4_modelling_neural.zoom_model_deep import ZoomModelDeep
 
-# To slice the lanes
-from src.d5_model_evaluation.slice_lane.slice_lanes import slice_lane
+# To store the predictions
+from src.d5_model_evaluation.prediction_cache import get_models_key, pad_predictions
 
 # To manage the predictions
 from src.d7_visualization.prediction_memories import PredictionMemories
 
 # To undo the perspective
-from src.d0_utils.perspective_correction.undo_perspective import read_homography, get_original_image
+from src.d0_utils.perspective_correction.undo_perspective import read_homography, project_points
 
-# To extract the images
-from src.d0_utils.extractions.extract_image import extract_image_video
+# To read the images
+from src.d0_utils.extractions.video_frames import VideoFrames
 
 
-def observe_model(data_param, models_param, model_evaluator, tries):
+def load_models(model_types, paths_weight, dimensions, window_sizes):
+    """
+    Define the rough and the tight models and load their weights.
+
+    Args:
+        model_types (list of 2 strings): the types of the rough and of the tight model.
+
+        paths_weight (list of 2 WindowsPath): the paths to the weights of the rough and of the tight model.
+
+        dimensions (list of 2 integers): the dimensions of the lanes. [vertical, horizontal]
+
+        window_sizes (list of 2 integers): the two window sizes.
+
+    Returns:
+        (list of 2 models): the rough and the tight models.
+    """
+    models = []
+    for (model_type, path_weight, window_size, close_to_head) in zip(model_types, paths_weight, window_sizes, [False, True]):
+        if model_type == "/deep_model":
+            model = ZoomModelDeep(close_to_head)
+        else:
+            model = ZoomModel(close_to_head)
+
+        # Build the model to load the weights
+        model.build((None, dimensions[0], window_size, 3))
+        model.load_weights(str(path_weight))
+        model.trainable = False
+        models.append(model)
+
+    return models
+
+
+def evaluate_data(data, models, model_evaluator, window_sizes, recoveries, dimensions, scale, batch_size):
+    """
+    Evaluate the models on the lanes of the data.
+
+    Args:
+        data (structured array): the array given by generate_data.
+
+        models (list of 2 models): the rough and the tight models.
+
+        model_evaluator (function): function to evaluate the models on a batch of lanes.
+
+        window_sizes (list of 2 integers): the two window sizes.
+
+        recoveries (list of 2 integers): the two recoveries.
+
+        dimensions (list of 2 integers): the dimensions of the lanes. [vertical, horizontal]
+
+        scale (integer): the number of pixel per meters.
+
+        batch_size (integer): the number of frames that are evaluated at once.
+
+    Returns:
+        (dictionary): associates the name of a column of the prediction cache to its array.
+    """
+    set_loader = DataLoader(
+        data, batch_size=batch_size, scale=scale, dimensions=dimensions, standardization=True, augmentation=False, flip=True
+    )
+    print("{} images are evaluated".format(len(data)))
+
+    batches_predictions = []
+    for (idx_batch, batch) in enumerate(set_loader):
+        (lanes, labels) = batch
+        swimming_ways = data["swimming_way"][idx_batch * batch_size: idx_batch * batch_size + len(lanes)]
+
+        # -- Get the predictions -- #
+        (begin_preds, end_preds, regression_preds, rough_predictions, tight_predictions, tight_left_columns) = model_evaluator(
+            models[0], models[1], lanes, window_sizes, recoveries, return_predictions=True
+        )
+        print("Prediction tight", np.stack((begin_preds, end_preds), axis=1))
+        print("Regression prediction", regression_preds)
+
+        # Take the swimming way into account
+        is_reversed = swimming_ways == -1
+        regression_preds = np.where(is_reversed, dimensions[1] - regression_preds, regression_preds)
+        (begin_preds, end_preds) = (np.where(is_reversed, dimensions[1] - begin_preds, begin_preds),
+                                    np.where(is_reversed, dimensions[1] - end_preds, end_preds))
+
+        batches_predictions.append([begin_preds, end_preds, regression_preds, rough_predictions, tight_predictions, tight_left_columns])
+
+    (begin_preds, end_preds, regression_preds, rough_predictions, tight_predictions, tight_left_columns) = zip(*batches_predictions)
+
+    return {"lane": data["lane"], "frame": data["frame"],
+            "begin": np.concatenate(begin_preds), "end": np.concatenate(end_preds), "regression": np.concatenate(regression_preds),
+            "rough_predictions": pad_predictions(rough_predictions), "tight_predictions": pad_predictions(tight_predictions),
+            "tight_left_columns": np.concatenate(tight_left_columns)}
+
+
+def observe_model(data_param, models_param, model_evaluator, tries, batch_size=16, prediction_cache=None):
     """
     Observe the models behavior.
 
@@ -33,10 +123,18 @@ def observe_model(data_param, models_param, model_evaluator, tries):
 
         models_param (list): (model_type1, model_type2, number_trainings, nb_epochs, batch_sizes, window_sizes, recoveries)
 
-        model_evaluator (function): function to evaluate the model.
+        model_evaluator (function): function to evaluate the models on a batch of lanes.
 
         tries (string): says if the training is done on colab : tries = "" or on the computer : tries = "/tries".
 
+        batch_size (integer): the number of frames that are evaluated at once.
+            Default value = 16
+
+        prediction_cache (PredictionCache): the cache of the predictions.
+            The models are only evaluated on the frames that are not in the cache.
+            if None, the models are evaluated on all the frames.
+            Default value = None
+
     Returns:
         prediction_memories (PredictionMemories): an object that contains the list of the predictions.
     """
@@ -59,6 +157,7 @@ def observe_model(data_param, models_param, model_evaluator, tries):
     path_current_weight_tight = path_weight_tight / "window_{}_epoch_{}_batch_{}_{}.h5".format(
         window_sizes[1], nb_epochs[1], batch_sizes[1], number_trainings[1]
     )
+    paths_weight = [path_current_weight_rough, path_current_weight_tight]
 
     # --- Define the prediction memories --- #
 
@@ -69,11 +168,11 @@ def observe_model(data_param, models_param, model_evaluator, tries):
         starting_calibration_path,
         dimensions,
         scale,
-        extract_image_video,
+        VideoFrames,
         generate_data,
         DataLoader,
         read_homography,
-        get_original_image,
+        project_points,
     )
 
     # --- Generate and load the sets --- #
@@ -84,58 +183,32 @@ def observe_model(data_param, models_param, model_evaluator, tries):
     # Withdraw the frame that are out of the laps of time of interest
     data = prediction_memories.in_time(data)
     print("data after in time", data)
-    set_loader = DataLoader(
-        data, batch_size=1, scale=scale, dimensions=dimensions, standardization=True, augmentation=False, flip=True
-    )
 
     print("The set is composed of {} images".format(len(data)))
 
-    # --- Define the MODELS --- #
-    if model_type1 == "/deep_model":
-        model_rough = ZoomModelDeep(False)
-    else:
-        model_rough = ZoomModel(False)
-    if model_type2 == "/deep_model":
-        model_tight = ZoomModelDeep(True)
+    # --- Get the predictions that are in the cache --- #
+    if prediction_cache is not None:
+        models_key = get_models_key(paths_weight, window_sizes, recoveries, dimensions, scale)
+        predictions = prediction_cache.load(video_name, models_key)
+        idx_rows = prediction_cache.find(predictions, data["lane"], data["frame"])
     else:
-        model_tight = ZoomModel(True)
-
-    # --- Get the weights of the trainings --- #
-    # Build the rough model to load the weights
-    (lanes, labels) = set_loader[0]
-    (sub_lanes, sub_labels) = slice_lane(lanes[0], labels[0], window_sizes[0], recoveries[0])[:2]
-    model_rough.build(sub_lanes.shape)
-    # Load the weights
-    model_rough.load_weights(str(path_current_weight_rough))
-
-    # Build the tight model to load the weights
-    (sub_lanes, sub_labels) = slice_lane(lanes[0], labels[0], window_sizes[1], recoveries[1])[:2]
-    model_tight.build(sub_lanes.shape)
-    # Load the weights
-    model_tight.load_weights(str(path_current_weight_tight))
-
-    # --- Evaluate the set --- #
-    model_rough.trainable = False
-    model_tight.trainable = False
-
-    for (idx_batch, batch) in enumerate(set_loader):
-        (lanes, labels) = batch
-        swimming_way = data[idx_batch, 3]
-
-        # -- Get the predictions -- #
-        (index_preds, index_regression_pred) = model_evaluator(
-            model_rough, model_tight, lanes[0], labels[0], window_sizes, recoveries
-        )
-        print("Prediction tight", index_preds)
-        print("Regression prediction", index_regression_pred)
-
-        # Take the swimming way into account
-        if swimming_way == -1:
-            index_regression_pred = dimensions[1] - index_regression_pred
-            index_preds = dimensions[1] - index_preds
-
-        # -- For the original video -- #
-        frame_name = data[idx_batch, 0].parts[-1][:-4]
-        prediction_memories.update(frame_name, index_preds[0], index_preds[-1], index_regression_pred)
+        (predictions, idx_rows) = (None, np.full(len(data), -1))
+    print("{} images are in the cache".format(np.sum(idx_rows >= 0)))
+
+    # --- Evaluate the other frames --- #
+    if np.any(idx_rows == -1):
+        models = load_models([model_type1, model_type2], paths_weight, dimensions, window_sizes)
+        new_predictions = evaluate_data(data[idx_rows == -1], models, model_evaluator, window_sizes, recoveries, dimensions, scale, batch_size)
+
+        if prediction_cache is not None:
+            predictions = prediction_cache.add(video_name, models_key, new_predictions)
+            idx_rows = prediction_cache.find(predictions, data["lane"], data["frame"])
+        else:
+            (predictions, idx_rows) = (new_predictions, np.arange(len(data)))
+
+    # -- For the original video -- #
+    for (idx_frame, idx_row) in enumerate(idx_rows):
+        frame_name = Path(data["path"][idx_frame]).stem
+        prediction_memories.update(frame_name, predictions["begin"][idx_row], predictions["end"][idx_row], predictions["regression"][idx_row])
 
     return prediction_memories